@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices compostos (migrations/add_composite_indexes.sql)
+
+Trabalha sobre uma cópia do banco SQLite de desenvolvimento: remove os
+índices da migração, mostra o plano (EXPLAIN QUERY PLAN) e o tempo médio de
+cada consulta das rotas que os usam, aplica a migração e repete.
+
+Uso: python benchmark_indexes.py [--linhas N] [--repeticoes N]
+  --linhas: linhas sintéticas extras em activations, notifications e
+            admin_logs, para que a diferença apareça com volume (padrão 50000)
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BANCO = os.path.join(os.path.dirname(__file__), 'instance', 'federal_associados.db')
+MIGRACAO = os.path.join(os.path.dirname(__file__), 'migrations', 'add_composite_indexes.sql')
+
+INDICES = (
+    'idx_activations_status', 'idx_activations_user_created', 'idx_documents_activation_id',
+    'idx_activation_history_activation_changed', 'idx_notifications_user_read_created',
+    'idx_admin_logs_action_created', 'idx_admin_logs_created_id',
+    # Índices simples que a migração substitui
+    'idx_activations_user_id', 'idx_notifications_user_id',
+)
+
+STATUS = ('pendente_documentos', 'em_analise', 'aprovado', 'ativada', 'reprovado', 'cancelado')
+ACOES = ('ACTIVATIONS_LIST', 'LOGS_VIEW', 'USERS_LIST', 'DASHBOARD_ACCESS', 'ACTIVATION_VIEW')
+
+# (rota, consulta) - mesmos filtros e ordenações das rotas
+CONSULTAS = (
+    ('GET /api/admin/activations?status=pendentes',
+     "SELECT * FROM activations WHERE status IN ('pendente_contrato', 'pendente_documentos', "
+     "'pendente_dados_tecnicos', 'pendente_analise_documentos', 'em_analise') "
+     "ORDER BY created_at DESC LIMIT 20"),
+    ('GET /api/client/dashboard (ativações)',
+     "SELECT * FROM activations WHERE user_id = :user_id ORDER BY created_at DESC"),
+    ('GET /api/admin/activations/<id> (documentos)',
+     "SELECT * FROM documents WHERE activation_id = :activation_id"),
+    ('GET /api/admin/activations/<id> (histórico)',
+     "SELECT * FROM activation_history WHERE activation_id = :activation_id ORDER BY changed_at DESC"),
+    ('GET /api/client/dashboard (não lidas)',
+     "SELECT * FROM notifications WHERE user_id = :user_id AND read_at IS NULL ORDER BY created_at DESC"),
+    ('GET /api/client/notifications',
+     "SELECT * FROM notifications WHERE user_id = :user_id ORDER BY created_at DESC"),
+    ('GET /api/admin/logs?action=...',
+     "SELECT * FROM admin_logs WHERE action = :action ORDER BY created_at DESC LIMIT 20"),
+    ('GET /api/admin/logs?cursor=...',
+     "SELECT * FROM admin_logs ORDER BY created_at DESC, id DESC LIMIT 21"),
+)
+
+
+def gerar_linhas(conn, quantidade):
+    """Insere ativações, notificações e logs sintéticos.
+
+    Os ids de usuário vêm de um conjunto de ~20 linhas por usuário, próximo
+    da distribuição real (as chaves estrangeiras não são verificadas).
+    """
+    usuarios = [linha[0] for linha in conn.execute("SELECT id FROM users")]
+    usuarios += [uuid.uuid4().hex for _ in range(quantidade // 20)]
+    agora = datetime.utcnow()
+
+    def data():
+        return (agora - timedelta(minutes=random.randint(0, 525600))).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    conn.executemany(
+        "INSERT INTO activations (id, user_id, operator, chip_type, ddd, status, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (uuid.uuid4().hex, random.choice(usuarios), random.choice(('vivo', 'claro', 'tim')),
+             random.choice(('fisico', 'esim')), '11', random.choice(STATUS), data(), data())
+            for _ in range(quantidade)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO notifications (id, user_id, type, title, message, read_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (uuid.uuid4().hex, random.choice(usuarios), 'system', 'Benchmark', 'Benchmark',
+             data() if random.random() < 0.8 else None, data())
+            for _ in range(quantidade)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO admin_logs (id, user_id, action, details, created_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (uuid.uuid4().hex, random.choice(usuarios), random.choice(ACOES), 'Benchmark', data())
+            for _ in range(quantidade)
+        ]
+    )
+    conn.commit()
+
+
+def parametros(conn):
+    usuario = conn.execute(
+        "SELECT user_id FROM activations GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    ativacao = conn.execute("SELECT id FROM activations ORDER BY created_at DESC LIMIT 1").fetchone()
+    return {
+        'user_id': usuario[0] if usuario else '',
+        'activation_id': ativacao[0] if ativacao else '',
+        'action': 'LOGS_VIEW',
+    }
+
+
+def medir(conn, repeticoes):
+    params = parametros(conn)
+    resultados = {}
+    for rota, sql in CONSULTAS:
+        plano = [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            conn.execute(sql, params).fetchall()
+        resultados[rota] = (plano, (time.perf_counter() - inicio) * 1000 / repeticoes)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos índices compostos')
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        copia = os.path.join(diretorio, 'benchmark.db')
+        shutil.copy(BANCO, copia)
+        conn = sqlite3.connect(copia)
+
+        for indice in INDICES:
+            conn.execute(f"DROP INDEX IF EXISTS {indice}")
+        if args.linhas:
+            print(f"🔄 Gerando {args.linhas} linhas sintéticas por tabela...")
+            gerar_linhas(conn, args.linhas)
+        conn.execute("ANALYZE")
+
+        antes = medir(conn, args.repeticoes)
+        with open(MIGRACAO, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        conn.execute("ANALYZE")
+        depois = medir(conn, args.repeticoes)
+        conn.close()
+
+    for rota, _ in CONSULTAS:
+        plano_antes, tempo_antes = antes[rota]
+        plano_depois, tempo_depois = depois[rota]
+        print(f"\n🔹 {rota}")
+        print(f"  antes  ({tempo_antes:8.3f} ms): {' | '.join(plano_antes)}")
+        print(f"  depois ({tempo_depois:8.3f} ms): {' | '.join(plano_depois)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+-- Índices para os filtros e ordenações mais frequentes das rotas admin e client
+-- Mesmo SQL para PostgreSQL e SQLite; os nomes coincidem com __table_args__ dos modelos
+
+-- Listagem de ativações por grupo de status e dashboard
+CREATE INDEX IF NOT EXISTS idx_activations_status ON activations(status);
+-- Ativações do cliente, mais recentes primeiro
+CREATE INDEX IF NOT EXISTS idx_activations_user_created ON activations(user_id, created_at);
+-- Documentos de uma ativação
+CREATE INDEX IF NOT EXISTS idx_documents_activation_id ON documents(activation_id);
+-- Histórico de uma ativação em ordem cronológica
+CREATE INDEX IF NOT EXISTS idx_activation_history_activation_changed ON activation_history(activation_id, changed_at);
+-- Notificações do cliente (não lidas primeiro filtradas por read_at), mais recentes primeiro
+CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created ON notifications(user_id, read_at, created_at);
+-- Logs filtrados por ação, mais recentes primeiro
+CREATE INDEX IF NOT EXISTS idx_admin_logs_action_created ON admin_logs(action, created_at);
+-- Logs sem filtro e paginação por cursor (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_admin_logs_created_id ON admin_logs(created_at, id);
+
+-- Substituídos pelos índices compostos acima (mesma coluna inicial); existem
+-- nos bancos PostgreSQL criados por create_postgresql_tables.py e nos migrados
+-- por versões anteriores de unify_user_uuid_columns
+DROP INDEX IF EXISTS idx_activations_user_id;
+DROP INDEX IF EXISTS idx_notifications_user_id;
@@ -0,0 +1,19 @@
+-- Rollup diário de ativações (dia de criação, operadora, tipo de chip, status)
+-- Mantido pela aplicação a cada alteração; a carga inicial reproduz a reconciliação completa
+
+CREATE TABLE IF NOT EXISTS activation_daily_rollup (
+    dia DATE NOT NULL,
+    operator VARCHAR(10) NOT NULL,
+    chip_type VARCHAR(10) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dia, operator, chip_type, status)
+);
+
+INSERT INTO activation_daily_rollup (dia, operator, chip_type, status, total)
+SELECT date(created_at), operator::text, chip_type::text, status::text, COUNT(*)
+FROM activations
+WHERE created_at IS NOT NULL
+GROUP BY date(created_at), operator, chip_type, status
+ON CONFLICT (dia, operator, chip_type, status) DO UPDATE SET total = EXCLUDED.total, updated_at = CURRENT_TIMESTAMP;
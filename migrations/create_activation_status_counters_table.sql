@@ -0,0 +1,12 @@
+-- Contadores materializados de ativações por status
+-- Mantidos pela aplicação a cada alteração; a carga inicial reproduz a reconciliação
+
+CREATE TABLE IF NOT EXISTS activation_status_counters (
+    status VARCHAR(50) PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO activation_status_counters (status, total)
+SELECT status::text, COUNT(*) FROM activations GROUP BY status
+ON CONFLICT (status) DO UPDATE SET total = EXCLUDED.total, updated_at = CURRENT_TIMESTAMP;
@@ -0,0 +1,27 @@
+-- Fila de importações assíncronas de planilhas de DDDs
+-- Os jobs são reservados pelo worker via UPDATE condicional no status
+
+DO $$ BEGIN
+    CREATE TYPE ddd_import_job_status_enum AS ENUM ('pending', 'processing', 'completed', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN null;
+END $$;
+
+CREATE TABLE IF NOT EXISTS ddd_import_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    status ddd_import_job_status_enum NOT NULL DEFAULT 'pending',
+    arquivo_origem VARCHAR(255) NOT NULL,
+    file_path VARCHAR(500) NOT NULL,
+    created_by UUID,
+    progress INTEGER DEFAULT 0,
+    total_linhas_estimadas INTEGER,
+    linhas_processadas INTEGER DEFAULT 0,
+    estatisticas JSON,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_ddd_import_jobs_status ON ddd_import_jobs(status);
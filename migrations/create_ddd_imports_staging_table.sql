@@ -0,0 +1,18 @@
+-- Área de carga das importações de DDDs
+-- As linhas são publicadas em ddd_imports numa única transação ao final da importação
+
+CREATE TABLE IF NOT EXISTS ddd_imports_staging (
+    id SERIAL PRIMARY KEY,
+    importacao_id VARCHAR(36) NOT NULL,
+    ddd VARCHAR(2) NOT NULL,
+    operadora VARCHAR(100) NOT NULL,
+    tipo_chip VARCHAR(50) NOT NULL,
+    especificacao VARCHAR(50) NOT NULL,
+    linha_original VARCHAR(20) NOT NULL,
+    arquivo_origem VARCHAR(255) NOT NULL,
+    data_importacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hash_linha VARCHAR(64) NOT NULL,
+    UNIQUE (importacao_id, hash_linha)
+);
+
+CREATE INDEX IF NOT EXISTS ix_ddd_imports_staging_importacao_id ON ddd_imports_staging(importacao_id);
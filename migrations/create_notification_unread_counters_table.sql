@@ -0,0 +1,12 @@
+-- Contadores materializados de notificações não lidas por usuário
+-- Mantidos pela aplicação a cada alteração; a carga inicial reproduz a reconciliação
+
+CREATE TABLE IF NOT EXISTS notification_unread_counters (
+    user_id UUID PRIMARY KEY REFERENCES users(id),
+    total INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO notification_unread_counters (user_id, total)
+SELECT user_id, COUNT(*) FROM notifications WHERE read_at IS NULL GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET total = EXCLUDED.total, updated_at = CURRENT_TIMESTAMP;
@@ -0,0 +1,8 @@
+-- Índices de trigramas para a busca de usuários por nome, e-mail e CPF (PostgreSQL)
+-- Permitem usar índice em ILIKE '%termo%' e ordenar por similarity()
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_cpf_trgm ON users USING gin (cpf gin_trgm_ops);
@@ -0,0 +1,38 @@
+-- Índice de busca de usuários por nome, e-mail e CPF (SQLite, FTS5 com trigramas)
+-- Também criado automaticamente na inicialização da aplicação (services/user_search.py)
+-- users.rowid não é estável (users.id é UUID, não INTEGER PRIMARY KEY): users_fts_map
+-- dá a cada users.id um inteiro fixo, usado como rowid do FTS5, e os triggers
+-- removem a linha antiga pelo rowid. O índice é refeito do zero, o que também
+-- converte as versões anteriores
+
+DROP TRIGGER IF EXISTS users_fts_insert;
+DROP TRIGGER IF EXISTS users_fts_update;
+DROP TRIGGER IF EXISTS users_fts_delete;
+DROP TABLE IF EXISTS users_fts;
+DROP TABLE IF EXISTS users_fts_map;
+
+CREATE TABLE users_fts_map (fts_rowid INTEGER PRIMARY KEY, user_id TEXT NOT NULL UNIQUE);
+CREATE VIRTUAL TABLE users_fts USING fts5(name, email, cpf, tokenize='trigram');
+
+CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN
+    INSERT INTO users_fts_map(user_id) VALUES (new.id);
+    INSERT INTO users_fts(rowid, name, email, cpf)
+    VALUES ((SELECT fts_rowid FROM users_fts_map WHERE user_id = new.id), new.name, new.email, new.cpf);
+END;
+
+CREATE TRIGGER users_fts_update AFTER UPDATE OF id, name, email, cpf ON users BEGIN
+    DELETE FROM users_fts WHERE rowid = (SELECT fts_rowid FROM users_fts_map WHERE user_id = old.id);
+    UPDATE users_fts_map SET user_id = new.id WHERE user_id = old.id;
+    INSERT INTO users_fts(rowid, name, email, cpf)
+    VALUES ((SELECT fts_rowid FROM users_fts_map WHERE user_id = new.id), new.name, new.email, new.cpf);
+END;
+
+CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN
+    DELETE FROM users_fts WHERE rowid = (SELECT fts_rowid FROM users_fts_map WHERE user_id = old.id);
+    DELETE FROM users_fts_map WHERE user_id = old.id;
+END;
+
+INSERT INTO users_fts_map(user_id) SELECT id FROM users;
+
+INSERT INTO users_fts(rowid, name, email, cpf)
+SELECT m.fts_rowid, u.name, u.email, u.cpf FROM users u JOIN users_fts_map m ON m.user_id = u.id;
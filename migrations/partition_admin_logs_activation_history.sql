@@ -0,0 +1,72 @@
+-- Particionamento mensal de admin_logs (created_at) e activation_history (changed_at) (PostgreSQL)
+-- Cada tabela é recriada como particionada por RANGE, com uma partição por mês
+-- (<tabela>_AAAAMM) do mês mais antigo até o próximo e uma partição default;
+-- as linhas são copiadas e a tabela antiga removida. As partições seguintes
+-- são criadas na inicialização da aplicação e pela tarefa de retenção
+-- (services/retention.py), que também remove com DROP os meses já arquivados.
+-- Idempotente: tabelas já particionadas não são alteradas
+
+DO $$
+DECLARE
+    t record;
+    mes date;
+    ultimo date;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            ('admin_logs', 'created_at'),
+            ('activation_history', 'changed_at')
+        ) AS v(tabela, coluna)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = v.tabela
+        )
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', t.tabela, t.tabela || '_antiga');
+        -- Os nomes dos índices são globais no schema: os da tabela antiga saem antes de recriá-los
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT IF EXISTS %I', t.tabela || '_antiga', t.tabela || '_pkey');
+
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%I)',
+            t.tabela, t.tabela || '_antiga', t.coluna
+        );
+        -- A chave primária de uma tabela particionada inclui a coluna de partição
+        EXECUTE format('UPDATE %I SET %I = now() WHERE %I IS NULL', t.tabela || '_antiga', t.coluna, t.coluna);
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', t.tabela, t.coluna);
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', t.tabela || '_default', t.tabela);
+
+        EXECUTE format('SELECT date_trunc(''month'', COALESCE(min(%I), now()))::date FROM %I', t.coluna, t.tabela || '_antiga')
+            INTO mes;
+        ultimo := (date_trunc('month', now()) + interval '1 month')::date;
+        WHILE mes <= ultimo LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                t.tabela || '_' || to_char(mes, 'YYYYMM'), t.tabela, mes, (mes + interval '1 month')::date
+            );
+            mes := (mes + interval '1 month')::date;
+        END LOOP;
+
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', t.tabela, t.tabela || '_antiga');
+        EXECUTE format('DROP TABLE %I', t.tabela || '_antiga');
+    END LOOP;
+END $$;
+
+-- Chaves estrangeiras e índices (criados em cada partição automaticamente)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'admin_logs_user_id_fkey') THEN
+        ALTER TABLE admin_logs ADD CONSTRAINT admin_logs_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'activation_history_activation_id_fkey') THEN
+        ALTER TABLE activation_history ADD CONSTRAINT activation_history_activation_id_fkey
+            FOREIGN KEY (activation_id) REFERENCES activations(id);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'activation_history_changed_by_fkey') THEN
+        ALTER TABLE activation_history ADD CONSTRAINT activation_history_changed_by_fkey
+            FOREIGN KEY (changed_by) REFERENCES users(id);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_admin_logs_user_id ON admin_logs(user_id);
+CREATE INDEX IF NOT EXISTS idx_admin_logs_action_created ON admin_logs(action, created_at);
+CREATE INDEX IF NOT EXISTS idx_admin_logs_created_id ON admin_logs(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_activation_history_activation_changed ON activation_history(activation_id, changed_at);
@@ -0,0 +1,60 @@
+-- Unifica o tipo de users.id e de todas as chaves estrangeiras para ele (PostgreSQL)
+-- Colunas ainda em texto passam para uuid nativo, permitindo JOIN indexado com users
+-- Idempotente: colunas que já são uuid não são alteradas
+
+DO $$
+DECLARE
+    r record;
+BEGIN
+    -- As FKs para users.id são removidas durante a conversão e recriadas no final
+    CREATE TEMP TABLE fks_users ON COMMIT DROP AS
+    SELECT conrelid::regclass AS tabela, conname, pg_get_constraintdef(oid) AS definicao
+    FROM pg_constraint
+    WHERE contype = 'f' AND confrelid = 'users'::regclass;
+
+    FOR r IN SELECT * FROM fks_users LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.tabela, r.conname);
+    END LOOP;
+
+    FOR r IN
+        SELECT c.table_name, c.column_name
+        FROM information_schema.columns c
+        WHERE c.table_schema = current_schema()
+          AND c.data_type <> 'uuid'
+          AND (c.table_name, c.column_name) IN (
+              ('users', 'id'),
+              ('users', 'documents_approved_by'),
+              ('user_permissions', 'user_id'),
+              ('user_permissions', 'granted_by'),
+              ('verification_codes', 'user_id'),
+              ('contract_validations', 'user_id'),
+              ('activations', 'user_id'),
+              ('activations', 'approved_by'),
+              ('documents', 'user_id'),
+              ('documents', 'approved_by'),
+              ('documents', 'reviewed_by'),
+              ('ddds', 'created_by'),
+              ('activation_history', 'changed_by'),
+              ('admin_logs', 'user_id'),
+              ('notifications', 'user_id'),
+              ('contract_acceptances', 'user_id'),
+              ('pdf_generation_jobs', 'user_id'),
+              ('generated_pdfs', 'user_id'),
+              ('ddd_import_jobs', 'created_by')
+          )
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN %I TYPE uuid USING NULLIF(%I::text, '''')::uuid',
+            r.table_name, r.column_name, r.column_name
+        );
+    END LOOP;
+
+    FOR r IN SELECT * FROM fks_users LOOP
+        EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I %s', r.tabela, r.conname, r.definicao);
+    END LOOP;
+END $$;
+
+-- Índices para os JOINs com users. activations e notifications ficam com os
+-- índices compostos iniciados por user_id (add_composite_indexes.sql)
+CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_admin_logs_user_id ON admin_logs(user_id);
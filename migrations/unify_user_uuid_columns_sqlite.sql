@@ -0,0 +1,15 @@
+-- Unifica a representação de users.id e das chaves estrangeiras para ele (SQLite)
+-- Todas as colunas passam a guardar o UUID como texto hexadecimal de 32 caracteres,
+-- o mesmo formato já usado por activations, documents, admin_logs, notifications etc.
+
+UPDATE users SET id = lower(replace(id, '-', '')) WHERE length(id) = 36;
+UPDATE users SET documents_approved_by = lower(replace(documents_approved_by, '-', '')) WHERE length(documents_approved_by) = 36;
+UPDATE user_permissions SET user_id = lower(replace(user_id, '-', '')) WHERE length(user_id) = 36;
+UPDATE user_permissions SET granted_by = lower(replace(granted_by, '-', '')) WHERE length(granted_by) = 36;
+UPDATE verification_codes SET user_id = lower(replace(user_id, '-', '')) WHERE length(user_id) = 36;
+UPDATE contract_validations SET user_id = lower(replace(user_id, '-', '')) WHERE length(user_id) = 36;
+
+-- Índices para os JOINs com users. activations e notifications ficam com os
+-- índices compostos iniciados por user_id (add_composite_indexes.sql)
+CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_admin_logs_user_id ON admin_logs(user_id);
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Aplica ao banco SQLite de desenvolvimento as migrações que têm versão SQLite.
+
+Os scripts são idempotentes e podem ser reaplicados. Uso:
+    python run_sqlite_migrations.py [caminho_do_banco]
+Sem argumento, usa SQLITE_DATABASE_PATH ou instance/federal_associados.db.
+"""
+
+import os
+import sqlite3
+import sys
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Em ordem de aplicação
+MIGRACOES_SQLITE = [
+    'migrations/unify_user_uuid_columns_sqlite.sql',
+    'migrations/add_composite_indexes.sql',
+]
+
+
+def aplicar_migracoes(db_path, verbose=True):
+    conn = sqlite3.connect(db_path)
+    try:
+        for migracao in MIGRACOES_SQLITE:
+            with open(os.path.join(RAIZ, migracao), 'r', encoding='utf-8') as f:
+                conn.executescript(f.read())
+            if verbose:
+                print(f'✓ Aplicada: {migracao}')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        db_path = sys.argv[1]
+    else:
+        db_path = os.getenv('SQLITE_DATABASE_PATH') or os.path.join(RAIZ, 'instance', 'federal_associados.db')
+    aplicar_migracoes(db_path)
+    print(f'\n🎉 Migrações SQLite aplicadas em {db_path}')
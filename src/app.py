@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from datetime import timedelta
@@ -9,7 +9,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Importar configuração do banco de dados
-from config.database import init_database
+from config.database import init_database, ensure_tables, verificar_banco_sqlite
 
 def create_app():
     app = Flask(__name__)
@@ -21,6 +21,46 @@ def create_app():
     app.config['UPLOAD_FOLDER'] = 'uploads'
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     
+    # Importação de DDDs: tamanho dos lotes de gravação e deduplicação pelo banco
+    app.config['DDD_IMPORT_BATCH_SIZE'] = int(os.getenv('DDD_IMPORT_BATCH_SIZE', '1000'))
+    app.config['DDD_IMPORT_ON_CONFLICT'] = os.getenv('DDD_IMPORT_ON_CONFLICT', 'false').lower() == 'true'
+    # Planilhas .xlsx são lidas em lotes, então o limite de tamanho pode ser maior que o padrão
+    app.config['DDD_IMPORT_CHUNK_SIZE'] = int(os.getenv('DDD_IMPORT_CHUNK_SIZE', '5000'))
+    app.config['DDD_UPLOAD_MAX_FILE_SIZE'] = int(os.getenv('DDD_UPLOAD_MAX_FILE_SIZE', str(10 * 1024 * 1024)))
+    # Importação em segundo plano (job + consulta de progresso em /api/ddds/imports/<id>)
+    app.config['DDD_IMPORT_ASYNC'] = os.getenv('DDD_IMPORT_ASYNC', 'false').lower() == 'true'
+    app.config['DDD_IMPORT_JOB_TIMEOUT'] = int(os.getenv('DDD_IMPORT_JOB_TIMEOUT', '600'))
+    app.config['DDD_IMPORT_POLL_INTERVAL'] = int(os.getenv('DDD_IMPORT_POLL_INTERVAL', '5'))
+    # Intervalo (s) entre verificações da versão do catálogo de DDDs em cache
+    app.config['DDD_CATALOG_CHECK_INTERVAL'] = float(os.getenv('DDD_CATALOG_CHECK_INTERVAL', '2'))
+    # Tarefas periódicas em segundo plano (reconciliação de contadores, retenção etc.).
+    # Desligadas por padrão: só o servidor (imagem Docker, python app.py) as liga,
+    # não cada create_app() de testes e scripts
+    app.config['PERIODIC_TASKS_ENABLED'] = os.getenv('PERIODIC_TASKS_ENABLED', 'false').lower() == 'true'
+    app.config['ACTIVATION_COUNTERS_RECONCILE_INTERVAL'] = int(os.getenv('ACTIVATION_COUNTERS_RECONCILE_INTERVAL', '3600'))
+    app.config['ACTIVATION_ROLLUP_RECONCILE_INTERVAL'] = int(os.getenv('ACTIVATION_ROLLUP_RECONCILE_INTERVAL', '3600'))
+    app.config['ACTIVATION_ROLLUP_RECONCILE_DAYS'] = int(os.getenv('ACTIVATION_ROLLUP_RECONCILE_DAYS', '7'))
+    app.config['NOTIFICATION_COUNTERS_RECONCILE_INTERVAL'] = int(os.getenv('NOTIFICATION_COUNTERS_RECONCILE_INTERVAL', '3600'))
+    # Logs de auditoria: gravação em lotes numa thread (false = grava na hora, ex.: testes)
+    app.config['AUDIT_LOG_ASYNC'] = os.getenv('AUDIT_LOG_ASYNC', 'true').lower() == 'true'
+    app.config['AUDIT_LOG_BATCH_SIZE'] = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '100'))
+    app.config['AUDIT_LOG_FLUSH_INTERVAL'] = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', '1'))
+    # Eventos SSE do cliente: postgres (LISTEN/NOTIFY), memory (um processo) ou polling; vazio = pelo banco
+    app.config['CLIENT_EVENTS_BACKEND'] = os.getenv('CLIENT_EVENTS_BACKEND', '')
+    app.config['CLIENT_EVENTS_POLL_INTERVAL'] = float(os.getenv('CLIENT_EVENTS_POLL_INTERVAL', '2'))
+    app.config['CLIENT_EVENTS_KEEPALIVE'] = int(os.getenv('CLIENT_EVENTS_KEEPALIVE', '15'))
+    app.config['CLIENT_EVENTS_MAX_DURATION'] = int(os.getenv('CLIENT_EVENTS_MAX_DURATION', '300'))
+    # Conexões SSE simultâneas por processo (cada uma ocupa uma thread do worker)
+    app.config['CLIENT_EVENTS_MAX_CONNECTIONS'] = int(os.getenv('CLIENT_EVENTS_MAX_CONNECTIONS', '16'))
+    # Validade (s) do token de eventos, o único aceito na URL do canal SSE
+    app.config['CLIENT_EVENTS_TOKEN_TTL'] = int(os.getenv('CLIENT_EVENTS_TOKEN_TTL', '60'))
+    # Retenção: meses mais antigos que o período vão para arquivos .jsonl.gz (0 = não arquivar).
+    # Só com ARCHIVE_FOLDER definido, numa pasta persistente (volume): o que sai do banco fica só nela
+    app.config['ARCHIVE_FOLDER'] = os.getenv('ARCHIVE_FOLDER', '')
+    app.config['ADMIN_LOGS_RETENTION_DAYS'] = int(os.getenv('ADMIN_LOGS_RETENTION_DAYS', '180'))
+    app.config['ACTIVATION_HISTORY_RETENTION_DAYS'] = int(os.getenv('ACTIVATION_HISTORY_RETENTION_DAYS', '730'))
+    app.config['RETENTION_INTERVAL'] = int(os.getenv('RETENTION_INTERVAL', '86400'))
+    
     # Inicializar banco de dados
     init_database(app)
     
@@ -39,6 +79,13 @@ def create_app():
     # Inicializar JWT
     jwt = JWTManager(app)
     
+    # Tokens de eventos (curtos, enviados na URL) só abrem o canal SSE
+    from services.client_events import token_permitido
+    
+    @jwt.token_verification_loader
+    def verificar_escopo_token(jwt_header, jwt_data):
+        return token_permitido(jwt_data, request.endpoint)
+    
     # Registrar blueprints - Sistema Simplificado
     from routes.auth import auth_bp
     from routes.user import user_bp
@@ -56,6 +103,35 @@ def create_app():
     app.register_blueprint(activation_bp, url_prefix='/api/activations')
     app.register_blueprint(upload_bp, url_prefix='/api')
     
+    # SQLite de desenvolvimento precisa das migrações de run_sqlite_migrations.py
+    verificar_banco_sqlite(app)
+    
+    # Tabelas auxiliares que podem não existir em bancos criados antes delas
+    from models.ddd_import import DDDImportStaging, DDDImportJob
+    from models.user import ActivationStatusCounter, ActivationDailyRollup, NotificationUnreadCounter
+    ensure_tables(app, [
+        DDDImportStaging.__table__, DDDImportJob.__table__,
+        ActivationStatusCounter.__table__, ActivationDailyRollup.__table__,
+        NotificationUnreadCounter.__table__
+    ])
+    
+    # Agregados materializados (ativações, notificações não lidas) e tarefas periódicas
+    # (reconciliação, retenção de logs e histórico), e o worker de importações de DDDs
+    from services.activation_counters import inicializar_agregados
+    from services.notifications import inicializar_contadores_notificacoes
+    from services.periodic_tasks import iniciar_tarefas_periodicas
+    from services.retention import inicializar_particoes
+    from services.ddd_import_jobs import iniciar_worker_importacoes
+    inicializar_agregados(app)
+    inicializar_contadores_notificacoes(app)
+    inicializar_particoes(app)
+    iniciar_tarefas_periodicas(app)
+    iniciar_worker_importacoes(app)
+    
+    # Índice de busca de usuários (FTS5 no SQLite; no PostgreSQL vem da migração)
+    from services.user_search import inicializar_busca
+    inicializar_busca(app)
+    
     # Criar diretório de uploads se não existir
     upload_dir = os.path.join(os.path.dirname(__file__), 'uploads')
     if not os.path.exists(upload_dir):
@@ -73,5 +149,13 @@ def create_app():
 app = create_app()
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento: tarefas periódicas ligadas, salvo PERIODIC_TASKS_ENABLED=false
+    # (com o reloader do debug, só no processo filho, que atende as requisições)
+    if os.getenv('PERIODIC_TASKS_ENABLED', 'true').lower() == 'true' and os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        from services.periodic_tasks import iniciar_tarefas_periodicas
+        from services.ddd_import_jobs import iniciar_worker_importacoes
+        app.config['PERIODIC_TASKS_ENABLED'] = True
+        iniciar_tarefas_periodicas(app)
+        iniciar_worker_importacoes(app)
     print("🚀 Iniciando servidor Flask...")
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -9,6 +9,11 @@ load_dotenv()
 db = SQLAlchemy()
 migrate = Migrate()
 
+def caminho_sqlite():
+    """Arquivo do banco SQLite: SQLITE_DATABASE_PATH ou instance/federal_associados.db"""
+    padrao = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'instance', 'federal_associados.db')
+    return os.getenv('SQLITE_DATABASE_PATH') or padrao
+
 def init_database(app):
     """Inicializa a configuração do banco de dados"""
     
@@ -17,7 +22,7 @@ def init_database(app):
     
     if use_sqlite:
         # Configurar para usar SQLite
-        database_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'instance', 'federal_associados.db')
+        database_path = caminho_sqlite()
         database_url = f'sqlite:///{database_path}'
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -38,7 +43,7 @@ def init_database(app):
             print("✅ Usando Supabase PostgreSQL")
         except Exception as e:
             print(f"⚠️ Erro ao configurar Supabase, usando SQLite: {e}")
-            database_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'instance', 'federal_associados.db')
+            database_path = caminho_sqlite()
             database_url = f'sqlite:///{database_path}'
             app.config['SQLALCHEMY_DATABASE_URI'] = database_url
             app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -59,6 +64,38 @@ def create_tables(app):
         db.create_all()
         print("✅ Tabelas criadas com sucesso!")
 
+def verificar_banco_sqlite(app):
+    """Falha na inicialização se o SQLite não recebeu as migrações (run_sqlite_migrations.py).
+
+    Sem a conversão de users.id para hexadecimal, as buscas de usuário pelo id
+    não encontram nada, sem erro algum.
+    """
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return
+        from sqlalchemy import text
+        nao_migrado = db.session.execute(
+            text("SELECT 1 FROM users WHERE length(id) = 36 LIMIT 1")
+        ).first() is not None
+        db.session.remove()
+        if nao_migrado:
+            raise RuntimeError(
+                f"Banco SQLite sem as migrações (users.id com hífens): "
+                f"execute 'python run_sqlite_migrations.py {caminho_sqlite()}'"
+            )
+
+def ensure_tables(app, tables):
+    """Cria as tabelas informadas caso ainda não existam no banco.
+
+    Usado para tabelas auxiliares novas (filas, contadores) quando a migração
+    SQL correspondente ainda não foi aplicada, como no SQLite de desenvolvimento.
+    """
+    with app.app_context():
+        try:
+            db.metadata.create_all(bind=db.engine, tables=tables, checkfirst=True)
+        except Exception as e:
+            print(f"⚠️ Erro ao criar tabelas auxiliares: {e}")
+
 def get_db():
     """Retorna a instância do banco de dados"""
     return db
\ No newline at end of file
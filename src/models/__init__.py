@@ -1,6 +1,6 @@
 # models/__init__.py - Sistema Simplificado
 from .simple_user import SimpleUser
 from .user import ContractAcceptance, DDD
-from .ddd_import import DDDImport
+from .ddd_import import DDDImport, DDDImportStaging, DDDImportJob
 
-__all__ = ['SimpleUser', 'ContractAcceptance', 'DDD', 'DDDImport']
\ No newline at end of file
+__all__ = ['SimpleUser', 'ContractAcceptance', 'DDD', 'DDDImport', 'DDDImportStaging', 'DDDImportJob']
\ No newline at end of file
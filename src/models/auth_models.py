@@ -5,13 +5,14 @@ import secrets
 import random
 import string
 from config.database import db
+from .types import GUID
 
 class VerificationCode(db.Model):
     """Modelo para códigos de verificação por email"""
     __tablename__ = 'verification_codes'
     
     id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
-    user_id = db.Column(db.String(32), db.ForeignKey('users.id'), nullable=True)
+    user_id = db.Column(GUID(as_uuid=False), db.ForeignKey('users.id'), nullable=True)
     identifier = db.Column(db.String(255), nullable=False)  # Email ou CPF
     code = db.Column(db.String(6), nullable=False)
     email = db.Column(db.String(255), nullable=False)
@@ -71,7 +72,7 @@ class ContractValidation(db.Model):
     __tablename__ = 'contract_validations'
     
     id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
-    user_id = db.Column(db.String(32), db.ForeignKey('users.id'), nullable=True)
+    user_id = db.Column(GUID(as_uuid=False), db.ForeignKey('users.id'), nullable=True)
     identifier = db.Column(db.String(255), nullable=False)  # Email ou CPF
     approved = db.Column(db.Boolean, nullable=False)
     partner_response = db.Column(db.Text)  # Resposta da API do parceiro
@@ -1,9 +1,12 @@
 from datetime import datetime
 from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import UUID
 import hashlib
+import uuid
 
 # Importar db do módulo de configuração do banco de dados
 from config.database import db
+from .types import GUID
 
 class DDDImport(db.Model):
     __tablename__ = 'ddd_imports'
@@ -41,4 +44,65 @@ class DDDImport(db.Model):
     def generate_hash(linha, operadora, tipo_chip, especificacao):
         """Gera um hash único para a linha com base nos dados"""
         data = f"{linha}:{operadora}:{tipo_chip}:{especificacao}"
-        return hashlib.sha256(data.encode()).hexdigest()
\ No newline at end of file
+        return hashlib.sha256(data.encode()).hexdigest()
+
+class DDDImportStaging(db.Model):
+    """Área de carga das importações de DDDs.
+
+    As linhas de cada importação ficam aqui, marcadas com importacao_id,
+    até serem publicadas em ddd_imports numa única transação.
+    """
+    __tablename__ = 'ddd_imports_staging'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    importacao_id = db.Column(db.String(36), nullable=False, index=True)
+    ddd = db.Column(db.String(2), nullable=False)
+    operadora = db.Column(db.String(100), nullable=False)
+    tipo_chip = db.Column(db.String(50), nullable=False)
+    especificacao = db.Column(db.String(50), nullable=False)
+    linha_original = db.Column(db.String(20), nullable=False)
+    arquivo_origem = db.Column(db.String(255), nullable=False)
+    data_importacao = db.Column(db.DateTime, default=datetime.utcnow)
+    hash_linha = db.Column(db.String(64), nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('importacao_id', 'hash_linha'),)
+
+class DDDImportJob(db.Model):
+    """Importação de planilha de DDDs processada em segundo plano.
+
+    A própria tabela funciona como fila: jobs 'pending' são reservados pelo
+    worker com um UPDATE condicional, e 'updated_at' serve de heartbeat para
+    retomar jobs de processos que morreram no meio do processamento.
+    """
+    __tablename__ = 'ddd_import_jobs'
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = db.Column(db.Enum('pending', 'processing', 'completed', 'failed', name='ddd_import_job_status_enum'), nullable=False, default='pending', index=True)
+    arquivo_origem = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    created_by = db.Column(GUID())
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    total_linhas_estimadas = db.Column(db.Integer)
+    linhas_processadas = db.Column(db.Integer, default=0)
+    estatisticas = db.Column(db.JSON)  # Contadores parciais e finais (inclui rejeições)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'status': self.status,
+            'arquivo_origem': self.arquivo_origem,
+            'progress': self.progress,
+            'total_linhas_estimadas': self.total_linhas_estimadas,
+            'linhas_processadas': self.linhas_processadas,
+            'estatisticas': self.estatisticas,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
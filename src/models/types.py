@@ -0,0 +1,37 @@
+import uuid
+
+from sqlalchemy import Uuid
+from sqlalchemy.types import TypeDecorator
+
+
+class GUID(TypeDecorator):
+    """UUID com a mesma representação em todas as tabelas.
+
+    UUID nativo no PostgreSQL e texto hexadecimal de 32 caracteres nos
+    demais bancos, igual ao UUID(as_uuid=True) das tabelas existentes, de
+    modo que users.id e as chaves estrangeiras para ele possam ser unidos.
+
+    Aceita como parâmetro tanto uuid.UUID quanto texto (com ou sem hífens).
+    Texto que não é UUID vira NULL: em consultas não encontra registros em
+    nenhum banco (sem o DataError do uuid nativo do PostgreSQL, que abortaria
+    a transação). Com as_uuid=False o valor lido é o texto com hífens.
+    """
+    impl = Uuid
+    cache_ok = True
+
+    def __init__(self, as_uuid=True):
+        super().__init__(as_uuid=False)
+        self.as_uuid = as_uuid
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return None if value is None else str(value)
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+    def process_result_value(self, value, dialect):
+        if value is None or not self.as_uuid:
+            return value
+        return uuid.UUID(value)
@@ -3,12 +3,13 @@ from sqlalchemy.dialects.postgresql import UUID
 import uuid
 import secrets
 from config.database import db
+from .types import GUID
 
 class User(db.Model):
     __tablename__ = 'users'
     
-    # Usar String para SQLite, UUID para PostgreSQL
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # UUID nativo no PostgreSQL, mesmo formato das chaves estrangeiras no SQLite
+    id = db.Column(GUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     cpf = db.Column(db.String(11), unique=True, nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -32,7 +33,7 @@ class User(db.Model):
     documents_uploaded_at = db.Column(db.DateTime(timezone=True))
     documents_approved = db.Column(db.Boolean, default=False)
     documents_approved_at = db.Column(db.DateTime(timezone=True))
-    documents_approved_by = db.Column(db.String(36), db.ForeignKey('users.id'))
+    documents_approved_by = db.Column(GUID(as_uuid=False), db.ForeignKey('users.id'))
     
     # Relacionamentos
     activations = db.relationship('Activation', foreign_keys='Activation.user_id', backref='user', lazy=True)
@@ -115,16 +116,18 @@ class Activation(db.Model):
     __tablename__ = 'activations'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
-    operator = db.Column(db.Enum('vivo', 'claro', 'tim', name='operator_enum'), nullable=False)
-    chip_type = db.Column(db.Enum('fisico', 'esim', name='chip_type_enum'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
+    # active_history: o valor anterior fica no histórico mesmo com o atributo expirado
+    # (agregados em services/activation_counters.py)
+    operator = db.column_property(db.Column(db.Enum('vivo', 'claro', 'tim', name='operator_enum'), nullable=False), active_history=True)
+    chip_type = db.column_property(db.Column(db.Enum('fisico', 'esim', name='chip_type_enum'), nullable=False), active_history=True)
     ddd = db.Column(db.String(2), nullable=False)
     iccid = db.Column(db.String(50))
     eid = db.Column(db.String(50))
     imei = db.Column(db.String(50))
     device_type = db.Column(db.Enum('iphone', 'android', name='device_type_enum'))
     service_type = db.Column(db.Enum('pos_pago', 'pre_pago', 'controle', name='service_type_enum'))
-    status = db.Column(db.Enum('pendente_contrato', 'pendente_documentos', 'pendente_dados_tecnicos', 'pendente_analise_documentos', 'documentos_rejeitados', 'em_analise', 'aprovado', 'reprovado', 'pendente_confirmacao_qr', 'ativada', 'cancelado', name='activation_status_enum'), default='pendente_contrato')
+    status = db.column_property(db.Column(db.Enum('pendente_contrato', 'pendente_documentos', 'pendente_dados_tecnicos', 'pendente_analise_documentos', 'documentos_rejeitados', 'em_analise', 'aprovado', 'reprovado', 'pendente_confirmacao_qr', 'ativada', 'cancelado', name='activation_status_enum'), default='pendente_contrato'), active_history=True)
     contract_accepted = db.Column(db.Boolean, default=False)
     contract_accepted_at = db.Column(db.DateTime(timezone=True))
     contract_ip = db.Column(db.String(45))
@@ -132,11 +135,11 @@ class Activation(db.Model):
     documents_uploaded_at = db.Column(db.DateTime(timezone=True))
     technical_data_completed_at = db.Column(db.DateTime(timezone=True))
     approved_at = db.Column(db.DateTime(timezone=True))
-    approved_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
+    approved_by = db.Column(GUID(), db.ForeignKey('users.id'))
     qr_code_path = db.Column(db.String(500))
     qr_scanned_at = db.Column(db.DateTime(timezone=True))
     line_number = db.Column(db.String(20))  # Número da linha quando ativada
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    created_at = db.column_property(db.Column(db.DateTime(timezone=True), default=datetime.utcnow), active_history=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos
@@ -145,6 +148,11 @@ class Activation(db.Model):
     notifications = db.relationship('Notification', backref='activation', lazy=True)
     contract_acceptance = db.relationship('ContractAcceptance', foreign_keys=[contract_acceptance_id], back_populates='activations', lazy=True)
     
+    __table_args__ = (
+        db.Index('idx_activations_status', 'status'),
+        db.Index('idx_activations_user_created', 'user_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -198,9 +206,9 @@ class UserPermission(db.Model):
     __tablename__ = 'user_permissions'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(as_uuid=False), db.ForeignKey('users.id'), nullable=False)
     permission_id = db.Column(db.String(36), db.ForeignKey('permissions.id'), nullable=False)
-    granted_by = db.Column(db.String(36), db.ForeignKey('users.id'))
+    granted_by = db.Column(GUID(as_uuid=False), db.ForeignKey('users.id'))
     granted_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
@@ -226,7 +234,7 @@ class Document(db.Model):
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     activation_id = db.Column(UUID(as_uuid=True), db.ForeignKey('activations.id'), nullable=False)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     document_type = db.Column(db.Enum('identity_front', 'identity_back', 'selfie_with_document', 'qr_code_esim', 'combined_contract', name='document_type_enum'), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     file_name = db.Column(db.String(255), nullable=False)
@@ -236,15 +244,17 @@ class Document(db.Model):
     uploaded_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     is_approved = db.Column(db.Boolean)
-    approved_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
+    approved_by = db.Column(GUID(), db.ForeignKey('users.id'))
     approved_at = db.Column(db.DateTime(timezone=True))
     reviewed_at = db.Column(db.DateTime(timezone=True))
-    reviewed_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
+    reviewed_by = db.Column(GUID(), db.ForeignKey('users.id'))
     rejection_reason = db.Column(db.Text)
     
     # Relacionamento com usuário
     user = db.relationship('User', foreign_keys=[user_id], lazy=True)
     
+    __table_args__ = (db.Index('idx_documents_activation_id', 'activation_id'),)
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -270,7 +280,7 @@ class DDD(db.Model):
     operator = db.Column(db.Enum('vivo', 'claro', 'tim', name='operator_enum'), nullable=False)
     ddd = db.Column(db.String(2), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
-    created_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'))
+    created_by = db.Column(GUID(), db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -294,10 +304,12 @@ class ActivationHistory(db.Model):
     activation_id = db.Column(UUID(as_uuid=True), db.ForeignKey('activations.id'), nullable=False)
     previous_status = db.Column(db.Enum('pendente_contrato', 'pendente_documentos', 'pendente_dados_tecnicos', 'pendente_analise_documentos', 'documentos_rejeitados', 'em_analise', 'aprovado', 'reprovado', 'pendente_confirmacao_qr', 'ativada', 'cancelado', name='activation_status_enum'))
     new_status = db.Column(db.Enum('pendente_contrato', 'pendente_documentos', 'pendente_dados_tecnicos', 'pendente_analise_documentos', 'documentos_rejeitados', 'em_analise', 'aprovado', 'reprovado', 'pendente_confirmacao_qr', 'ativada', 'cancelado', name='activation_status_enum'), nullable=False)
-    changed_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    changed_by = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     change_reason = db.Column(db.Text)
     changed_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     
+    __table_args__ = (db.Index('idx_activation_history_activation_changed', 'activation_id', 'changed_at'),)
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -313,7 +325,7 @@ class AdminLog(db.Model):
     __tablename__ = 'admin_logs'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(255), nullable=False)
     resource_type = db.Column(db.String(100))
     resource_id = db.Column(db.String(100))  # Changed to string to support UUIDs
@@ -322,6 +334,11 @@ class AdminLog(db.Model):
     user_agent = db.Column(db.Text)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_admin_logs_action_created', 'action', 'created_at'),
+        db.Index('idx_admin_logs_created_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -339,15 +356,18 @@ class Notification(db.Model):
     __tablename__ = 'notifications'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     activation_id = db.Column(UUID(as_uuid=True), db.ForeignKey('activations.id'))
     type = db.Column(db.Enum('email', 'push', 'system', name='notification_type_enum'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     message = db.Column(db.Text, nullable=False)
     sent_at = db.Column(db.DateTime(timezone=True))
-    read_at = db.Column(db.DateTime(timezone=True))
+    # active_history: contador de não lidas (services/notifications.py)
+    read_at = db.column_property(db.Column(db.DateTime(timezone=True)), active_history=True)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
     
+    __table_args__ = (db.Index('idx_notifications_user_read_created', 'user_id', 'read_at', 'created_at'),)
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -366,7 +386,7 @@ class ContractAcceptance(db.Model):
     __tablename__ = 'contract_acceptances'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     cpf = db.Column(db.String(11), nullable=False)
     security_token = db.Column(db.String(128), nullable=False, unique=True)
     ip_address = db.Column(db.String(45), nullable=False)
@@ -417,11 +437,38 @@ class SystemSetting(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ActivationStatusCounter(db.Model):
+    """Quantidade de ativações por status, mantida a cada flush (ver services/activation_counters.py)"""
+    __tablename__ = 'activation_status_counters'
+    
+    status = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ActivationDailyRollup(db.Model):
+    """Ativações por dia de criação, operadora, tipo de chip e status (ver services/activation_counters.py)"""
+    __tablename__ = 'activation_daily_rollup'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    operator = db.Column(db.String(10), primary_key=True)
+    chip_type = db.Column(db.String(10), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class NotificationUnreadCounter(db.Model):
+    """Notificações não lidas por usuário, mantidas a cada flush (ver services/notifications.py)"""
+    __tablename__ = 'notification_unread_counters'
+    
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class PdfGenerationJob(db.Model):
     __tablename__ = 'pdf_generation_jobs'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     activation_id = db.Column(UUID(as_uuid=True), db.ForeignKey('activations.id'), nullable=False)
     status = db.Column(db.Enum('pending', 'processing', 'completed', 'failed', name='pdf_job_status_enum'), default='pending')
     progress = db.Column(db.Integer, default=0)  # 0-100
@@ -456,7 +503,7 @@ class GeneratedPdf(db.Model):
     __tablename__ = 'generated_pdfs'
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     activation_id = db.Column(UUID(as_uuid=True), db.ForeignKey('activations.id'), nullable=False)
     file_name = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
@@ -1,18 +1,27 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from uuid import UUID, uuid4
 import qrcode
 from io import BytesIO
 
 from models.user import db, User, Activation, Document, DDD, ActivationHistory, AdminLog, Notification
-from models.ddd_import import DDDImport
+from services.ddd_import_service import sincronizar_catalogo
+from services.ddd_catalog import invalidar_catalogo, resposta_catalogo
+from services.dashboard_stats import obter_estatisticas_dashboard
+from services.activation_statistics import serie_ativacoes
+from services.pagination import paginar_por_cursor, CursorInvalido
+from services.user_search import buscar_usuarios, filtro_usuarios
+from services.audit_log import registrar_auditoria
+from services.unit_of_work import UnidadeDeTrabalho
+from services.notifications import notificar_em_massa, remover_contador
+from services.retention import TABELAS as TABELAS_ARQUIVO, consultar_arquivo, interpretar_data, listar_arquivos
 # from models.signature import Contract  # Temporariamente comentado
 from models.user import ContractAcceptance
 from utils.pdf_generator import create_combined_pdf
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, contains_eager
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -65,62 +74,19 @@ def log_admin_action(user_id, action, resource_type=None, resource_id=None, deta
             elif not isinstance(resource_id, str):
                 resource_id = str(resource_id)
         
-        log = AdminLog(
-            user_id=user_id,
-            action=action,
+        # Gravação em lote fora da requisição (services/audit_log.py)
+        registrar_auditoria(
+            user_id,
+            action,
             resource_type=resource_type,
             resource_id=resource_id,
             details=details,
             ip_address=request.remote_addr,
             user_agent=request.headers.get("User-Agent")
         )
-        db.session.add(log)
-        db.session.commit()
     except Exception as e:
         print(f"Erro ao registrar log: {e}")
 
-def log_activation_change(activation_id, previous_status, new_status, user_id, reason=None):
-    """Registra mudança de status da ativação"""
-    try:
-        # Converter IDs para UUID se necessário
-        if isinstance(activation_id, str):
-            activation_id = UUID(activation_id)
-        if isinstance(user_id, str):
-            user_id = UUID(user_id)
-        
-        history = ActivationHistory(
-            activation_id=activation_id,
-            previous_status=previous_status,
-            new_status=new_status,
-            changed_by=user_id,
-            change_reason=reason
-        )
-        db.session.add(history)
-        db.session.commit()
-    except Exception as e:
-        print(f"Erro ao registrar histórico: {e}")
-
-def create_notification(user_id, title, message, activation_id=None):
-    """Cria notificação para o usuário"""
-    try:
-        # Converter IDs para UUID se necessário
-        if isinstance(user_id, str):
-            user_id = UUID(user_id)
-        if activation_id and isinstance(activation_id, str):
-            activation_id = UUID(activation_id)
-        
-        notification = Notification(
-            user_id=user_id,
-            activation_id=activation_id,
-            type="system",
-            title=title,
-            message=message
-        )
-        db.session.add(notification)
-        db.session.commit()
-    except Exception as e:
-        print(f"Erro ao criar notificação: {e}")
-
 @admin_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
 def get_admin_dashboard():
@@ -132,16 +98,12 @@ def get_admin_dashboard():
         user_id = get_jwt_identity()
         
         # Estatísticas gerais
-        total_users = User.query.filter_by(user_type="cliente").count()
-        total_activations = Activation.query.count()
-        pending_activations = Activation.query.filter_by(status="em_analise").count()
-        approved_activations = Activation.query.filter_by(status="aprovado").count()
-        active_activations = Activation.query.filter_by(status="ativada").count()
+        stats = obter_estatisticas_dashboard()
         
         # Ativações recentes
-        recent_activations = db.session.query(Activation).join(User, Activation.user_id == User.id).order_by(
-            Activation.created_at.desc()
-        ).limit(10).all()
+        recent_activations = db.session.query(Activation).join(Activation.user).options(
+            contains_eager(Activation.user)
+        ).order_by(Activation.created_at.desc()).limit(10).all()
         
         # Preparar dados das ativações recentes com informações do usuário
         recent_activations_data = []
@@ -155,11 +117,11 @@ def get_admin_dashboard():
         
         return jsonify({
             "stats": {
-                "total_users": total_users,
-                "total_activations": total_activations,
-                "pending_activations": pending_activations,
-                "approved_activations": approved_activations,
-                "active_activations": active_activations
+                "total_users": stats["total_users"],
+                "total_activations": stats["total_activations"],
+                "pending_activations": stats["pending_activations"],
+                "approved_activations": stats["approved_activations"],
+                "active_activations": stats["active_activations"]
             },
             "recent_activations": recent_activations_data
         }), 200
@@ -180,23 +142,7 @@ def get_dashboard_stats():
             return jsonify({"error": "Acesso negado"}), 403
         
         # Estatísticas gerais
-        total_users = User.query.filter_by(user_type="cliente").count()
-        total_activations = Activation.query.count()
-        pending_activations = Activation.query.filter_by(status="em_analise").count()
-        approved_activations = Activation.query.filter_by(status="aprovado").count()
-        active_activations = Activation.query.filter_by(status="ativada").count()
-        active_users = User.query.filter_by(user_type="cliente", is_active=True).count()
-        total_admins = User.query.filter(User.user_type.in_(['admin', 'super_admin'])).count()
-        
-        return jsonify({
-            "total_users": total_users,
-            "total_activations": total_activations,
-            "pending_activations": pending_activations,
-            "approved_activations": approved_activations,
-            "active_activations": active_activations,
-            "active_users": active_users,
-            "total_admins": total_admins
-        }), 200
+        return jsonify(obter_estatisticas_dashboard()), 200
         
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
@@ -219,8 +165,8 @@ def get_activations():
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 20))
         
-        # Construir query sem JOIN devido a incompatibilidade de tipos UUID/String
-        query = db.session.query(Activation)
+        # Usuário carregado no mesmo SELECT (JOIN) das ativações
+        query = db.session.query(Activation).options(joinedload(Activation.user))
         
         if status and status != 'all':
             if status == "pendentes":
@@ -235,46 +181,37 @@ def get_activations():
         if operator and operator != 'all':
             query = query.filter(Activation.operator == operator)
         
-        # Para busca por dados do usuário, precisamos fazer uma consulta separada
         if search:
-            # Buscar usuários que correspondem à busca
-            matching_users = User.query.filter(
-                db.or_(
-                    User.cpf.contains(search),
-                    User.email.contains(search),
-                    User.name.contains(search)
-                )
-            ).all()
-            
-            # Obter IDs dos usuários encontrados (convertendo para UUID)
-            user_ids = [user.id for user in matching_users]
-            if user_ids:
-                # Filtrar ativações pelos user_ids encontrados
-                query = query.filter(Activation.user_id.in_([UUID(uid) if isinstance(uid, str) else uid for uid in user_ids]))
-            else:
-                # Se não encontrou usuários, não retornar nenhuma ativação
-                query = query.filter(Activation.id == None)
+            query = query.filter(Activation.user.has(filtro_usuarios(search)))
         
         # Ordenar por data de criação (mais recentes primeiro)
         query = query.order_by(Activation.created_at.desc())
         
-        # Paginação
-        paginated = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginação: por cursor (opcional) ou por página
+        if "cursor" in request.args:
+            items, pagination = paginar_por_cursor(
+                query, Activation, request.args.get("cursor"), per_page, request.args.get("total", "none")
+            )
+        else:
+            paginated = query.paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            items = paginated.items
+            pagination = {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev
+            }
         
-        # Buscar dados do usuário para cada ativação manualmente
         activations_with_user = []
-        for activation in paginated.items:
+        for activation in items:
             activation_dict = activation.to_dict()
-            # Buscar usuário manualmente usando string ID
-            user = User.query.filter_by(id=str(activation.user_id)).first()
-            if user:
-                activation_dict["user"] = user.to_dict()
-            else:
-                activation_dict["user"] = None
+            activation_dict["user"] = activation.user.to_dict() if activation.user else None
             activations_with_user.append(activation_dict)
         
         # Log da ação
@@ -286,16 +223,11 @@ def get_activations():
         
         return jsonify({
             "activations": activations_with_user,
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": paginated.total,
-                "pages": paginated.pages,
-                "has_next": paginated.has_next,
-                "has_prev": paginated.has_prev
-            }
+            "pagination": pagination
         }), 200
         
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
@@ -318,8 +250,7 @@ def get_activation_details(activation_id):
         if not activation:
             return jsonify({"error": "Ativação não encontrada"}), 404
         
-        # Buscar dados do usuário manualmente devido a problemas de tipo UUID/String
-        user = User.query.get(str(activation.user_id))
+        user = activation.user
         if not user:
             return jsonify({"error": "Dados do usuário não encontrados"}), 404
         
@@ -395,20 +326,14 @@ def update_activation_status(activation_id):
         if new_status == "reprovado" and reason:
             activation.rejection_reason = reason
         
-        db.session.commit()
+        # Status, histórico, notificação e auditoria gravados num único commit
+        uow = UnidadeDeTrabalho(user_id)
         
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
-            previous_status, 
-            new_status, 
-            user_id, 
-            reason
-        )
+        uow.historico(activation, previous_status, new_status, reason)
         
         # Log da ação administrativa
-        log_admin_action(
-            user_id, 
+        uow.auditoria(
             "ACTIVATION_STATUS_UPDATE", 
             "activation", 
             activation.id,
@@ -427,13 +352,15 @@ def update_activation_status(activation_id):
         }
         
         if new_status in status_messages:
-            create_notification(
+            uow.notificacao(
                 activation.user_id,
                 f"Status da Ativação: {new_status.replace('_', ' ').title()}",
                 status_messages[new_status],
-                activation.id
+                activation
             )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Status atualizado com sucesso",
             "activation": activation.to_dict()
@@ -503,24 +430,21 @@ def upload_qr_code(activation_id):
         # Atualizar ativação
         activation.qr_code_path = file_path
         activation.qr_code_scanned = False
+        uow = UnidadeDeTrabalho(user_id)
         
         # Atualizar status para pendente_confirmacao_qr se for eSIM
         if activation.chip_type == "esim":
             previous_status = activation.status
             activation.status = "pendente_confirmacao_qr"
-            log_activation_change(
-                activation.id, 
+            uow.historico(
+                activation, 
                 previous_status, 
                 "pendente_confirmacao_qr", 
-                user_id, 
                 "QR Code enviado pelo administrador - aguardando confirmação do cliente"
             )
-
-        db.session.commit()
         
         # Log da ação administrativa
-        log_admin_action(
-            user_id, 
+        uow.auditoria(
             "QR_CODE_UPLOAD", 
             "activation", 
             activation.id,
@@ -528,13 +452,15 @@ def upload_qr_code(activation_id):
         )
         
         # Criar notificação para o cliente
-        create_notification(
+        uow.notificacao(
             activation.user_id,
             "QR Code Disponível",
             "Seu QR Code está disponível para escaneamento. Acesse sua ativação para visualizar.",
-            activation.id
+            activation
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "QR Code enviado com sucesso",
             "activation": activation.to_dict()
@@ -575,33 +501,29 @@ def set_line_number(activation_id):
         
         # Atualizar número da linha
         activation.line_number = line_number
+        uow = UnidadeDeTrabalho(user_id)
         
         # Se for chip físico, atualizar status para ativada
         if activation.chip_type == "fisico":
             previous_status = activation.status
             activation.status = "ativada"
-            log_activation_change(
-                activation.id, 
+            uow.historico(
+                activation, 
                 previous_status, 
                 "ativada", 
-                user_id, 
                 "Número da linha definido para chip físico - Ativação concluída"
             )
-
-        db.session.commit()
         
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
+        uow.historico(
+            activation, 
             activation.status, 
             activation.status, 
-            user_id, 
             f"Número da linha definido: {line_number}"
         )
         
         # Log da ação administrativa
-        log_admin_action(
-            user_id, 
+        uow.auditoria(
             "LINE_NUMBER_SET", 
             "activation", 
             activation.id,
@@ -614,13 +536,15 @@ def set_line_number(activation_id):
         else:  # chip físico
             notification_message = f"✅ Linha ativada com sucesso!\n📞 Número: {line_number}\n\nInstruções:\nInsira o chip no celular, reinicie o aparelho e aguarde o sinal.\n\nObrigado por escolher a Federal Associados."
         
-        create_notification(
+        uow.notificacao(
             activation.user_id,
             "✅ Linha Ativada com Sucesso!",
             notification_message,
-            activation.id
+            activation
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Número da linha definido com sucesso",
             "activation": activation.to_dict()
@@ -663,26 +587,26 @@ def update_activation_iccid(activation_id):
         
         previous_iccid = activation.iccid
         activation.iccid = iccid
-        db.session.commit()
+        uow = UnidadeDeTrabalho(user_id)
         
         # Registrar histórico (mantendo status)
-        log_activation_change(
-            activation.id,
+        uow.historico(
+            activation,
             activation.status,
             activation.status,
-            user_id,
             f"ICCID definido: {iccid}"
         )
         
         # Log da ação administrativa
-        log_admin_action(
-            user_id,
+        uow.auditoria(
             "ICCID_SET",
             "activation",
             activation.id,
             f"ICCID atualizado de '{previous_iccid}' para '{iccid}'"
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "ICCID atualizado com sucesso",
             "activation": activation.to_dict()
@@ -709,7 +633,8 @@ def get_documents():
         per_page = int(request.args.get("per_page", 20))
         
         # Construir query
-        query = db.session.query(Document).join(User, Document.user_id == User.id)
+        # Usuário carregado pelo mesmo JOIN, sem consulta extra por documento
+        query = db.session.query(Document).join(Document.user).options(contains_eager(Document.user))
         
         if status != "all":
             query = query.filter(Document.status == status)
@@ -717,16 +642,28 @@ def get_documents():
         # Ordenar por data de criação (mais recentes primeiro)
         query = query.order_by(Document.created_at.desc())
         
-        # Paginação
-        paginated = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginação: por cursor (opcional) ou por página
+        if "cursor" in request.args:
+            items, pagination = paginar_por_cursor(
+                query, Document, request.args.get("cursor"), per_page, request.args.get("total", "none")
+            )
+        else:
+            paginated = query.paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            items = paginated.items
+            pagination = {
+                "page": paginated.page,
+                "pages": paginated.pages,
+                "per_page": paginated.per_page,
+                "total": paginated.total
+            }
         
         # Preparar dados dos documentos com informações do usuário
         documents_data = []
-        for document in paginated.items:
+        for document in items:
             document_dict = document.to_dict()
             document_dict["user_name"] = document.user.name
             document_dict["user_email"] = document.user.email
@@ -738,14 +675,11 @@ def get_documents():
         
         return jsonify({
             "data": documents_data,
-            "pagination": {
-                "page": paginated.page,
-                "pages": paginated.pages,
-                "per_page": paginated.per_page,
-                "total": paginated.total
-            }
+            "pagination": pagination
         }), 200
         
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
@@ -777,6 +711,7 @@ def approve_document(document_id):
         document.status = "approved"
         document.reviewed_at = datetime.utcnow()
         document.reviewed_by = UUID(admin_user_id)
+        uow = UnidadeDeTrabalho(admin_user_id)
         
         # NOVA LÓGICA: Atualizar status da ativação e gerar contrato
         activation = Activation.query.get(document.activation_id)
@@ -816,20 +751,19 @@ def approve_document(document_id):
                     notification_message = "Seus documentos foram aprovados! Sua ativação está sendo processada."
                 
                 # Registrar histórico da mudança de status
-                log_activation_change(
-                    activation.id,
+                uow.historico(
+                    activation,
                     previous_status,
                     activation.status,
-                    admin_user_id,
                     status_message
                 )
                 
                 # Criar notificação para o cliente
-                create_notification(
+                uow.notificacao(
                     activation.user_id,
                     notification_title,
                     notification_message,
-                    activation.id
+                    activation
                 )
                 
                 # GERAR CONTRATO AUTOMATICAMENTE
@@ -845,16 +779,15 @@ def approve_document(document_id):
                     if contract_result['success']:
                         contract_generated = True
                         # Criar notificação sobre o contrato gerado
-                        create_notification(
+                        uow.notificacao(
                             activation.user_id,
                             "Contrato Gerado",
                             "Seu contrato foi gerado automaticamente e está disponível para assinatura digital.",
-                            activation.id
+                            activation
                         )
                         
                         # Log da geração do contrato
-                        log_admin_action(
-                            admin_user_id,
+                        uow.auditoria(
                             "CONTRACT_GENERATED",
                             "contract",
                             contract_result['contract_id'],
@@ -862,8 +795,7 @@ def approve_document(document_id):
                         )
                     else:
                         # Log do erro na geração do contrato
-                        log_admin_action(
-                            admin_user_id,
+                        uow.auditoria(
                             "CONTRACT_GENERATION_FAILED",
                             "activation",
                             activation.id,
@@ -872,33 +804,31 @@ def approve_document(document_id):
                         
                 except Exception as contract_error:
                     # Log do erro na geração do contrato
-                    log_admin_action(
-                        admin_user_id,
+                    uow.auditoria(
                         "CONTRACT_GENERATION_ERROR",
                         "activation",
                         activation.id,
                         f"Exceção na geração automática do contrato: {str(contract_error)}"
                     )
         
-        db.session.commit()
-        
         # Criar notificação para o usuário
-        create_notification(
+        uow.notificacao(
             document.user_id,
             "Documento Aprovado",
             f"Seu documento ({document.document_type}) foi aprovado.",
-            document.activation_id
+            document.activation
         )
         
         # Log da ação administrativa
-        log_admin_action(
-            admin_user_id,
+        uow.auditoria(
             "DOCUMENT_APPROVE",
             "document",
             document.id,
             f"Documento aprovado: {document.document_type} - Usuário: {document.user.name}"
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Documento aprovado com sucesso",
             "activation_completed": activation_completed,
@@ -946,6 +876,7 @@ def reject_document(document_id):
         document.rejection_reason = reason
         document.reviewed_at = datetime.utcnow()
         document.reviewed_by = UUID(admin_user_id)
+        uow = UnidadeDeTrabalho(admin_user_id)
         
         # Atualizar status da ativação para permitir reenvio de documentos
         activation = Activation.query.get(document.activation_id)
@@ -954,33 +885,31 @@ def reject_document(document_id):
             activation.status = 'documentos_rejeitados'
             
             # Registrar histórico da mudança de status
-            log_activation_change(
-                activation.id,
+            uow.historico(
+                activation,
                 previous_status,
                 'documentos_rejeitados',
-                admin_user_id,
                 f"Documentos rejeitados - {reason}"
             )
         
-        db.session.commit()
-        
         # Criar notificação para o usuário
-        create_notification(
+        uow.notificacao(
             document.user_id,
             "Documento Rejeitado",
             f"Seu documento ({document.document_type}) foi rejeitado. Motivo: {reason}",
-            document.activation_id
+            document.activation
         )
         
         # Log da ação administrativa
-        log_admin_action(
-            admin_user_id,
+        uow.auditoria(
             "DOCUMENT_REJECT",
             "document",
             document.id,
             f"Documento rejeitado: {document.document_type} - Usuário: {document.user.name} - Motivo: {reason}"
         )
         
+        uow.commit()
+        
         return jsonify({"message": "Documento rejeitado com sucesso"}), 200
         
     except Exception as e:
@@ -1001,7 +930,7 @@ def force_delete_user(user_id):
         # Buscar o usuário a ser excluído
         try:
             user_uuid = UUID(user_id)  # For comparison with admin_user_id
-            user = User.query.get(user_id)  # User model uses String(36) for ID
+            user = User.query.get(user_id)
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
         if not user:
@@ -1047,6 +976,7 @@ def force_delete_user(user_id):
         
         # Excluir notificações do usuário
         Notification.query.filter_by(user_id=user_uuid).delete()
+        remover_contador(user_uuid)
         
         # Excluir o usuário
         db.session.delete(user)
@@ -1172,17 +1102,11 @@ def get_ddds():
             return auth_check
         
         operator = request.args.get("operator")
+        if not operator or operator == 'all':
+            operator = None
         
-        query = DDD.query
-        
-        if operator and operator != 'all':
-            query = query.filter_by(operator=operator)
-        
-        ddds = query.order_by(DDD.operator, DDD.ddd).all()
-        
-        return jsonify({
-            "ddds": [d.to_dict() for d in ddds]
-        }), 200
+        # Servido do catálogo em cache, com ETag/304
+        return resposta_catalogo(operator)
         
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
@@ -1219,6 +1143,7 @@ def create_ddd():
         
         new_ddd = DDD(operator=operator, ddd=ddd_value, is_active=True, created_by=user_uuid)
         db.session.add(new_ddd)
+        invalidar_catalogo()
         db.session.commit()
         
         # Converter explicitamente o ID para string após o commit
@@ -1255,6 +1180,7 @@ def delete_ddd(ddd_id):
             return jsonify({"error": "DDD não encontrado"}), 404
             
         db.session.delete(ddd)
+        invalidar_catalogo()
         db.session.commit()
         
         log_admin_action(
@@ -1282,56 +1208,16 @@ def sync_ddds():
         user_id = get_jwt_identity()
         operator_filter = request.json.get("operator") if request.is_json else None
 
-        def norm_op(op):
-            s = (op or "").strip().lower()
-            if s.startswith("vivo"): return "vivo"
-            if s.startswith("claro"): return "claro"
-            if s.startswith("tim"): return "tim"
-            return None
-
-        imports = DDDImport.query.all()
-        target = set()
-        for imp in imports:
-            op = norm_op(imp.operadora)
-            if not op:
-                continue
-            ddd_value = (imp.ddd or "").strip()[:2]
-            if len(ddd_value) != 2 or not ddd_value.isdigit():
-                continue
-            if operator_filter and op != operator_filter:
-                continue
-            target.add((op, ddd_value))
-
-        existing = {(d.operator, d.ddd): d for d in DDD.query.all()}
-
-        to_remove = []
-        to_add = []
-
-        for (op, ddd_value), obj in existing.items():
-            if operator_filter and op != operator_filter:
-                continue
-            if (op, ddd_value) not in target:
-                to_remove.append(obj)
-
-        for op, ddd_value in target:
-            if (op, ddd_value) not in existing:
-                to_add.append((op, ddd_value))
-
         user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-
-        for obj in to_remove:
-            db.session.delete(obj)
-
-        for op, ddd_value in to_add:
-            db.session.add(DDD(operator=op, ddd=ddd_value, is_active=True, created_by=user_uuid))
+        added, removed = sincronizar_catalogo(user_uuid, operator_filter)
 
         db.session.commit()
 
-        log_admin_action(user_id, "DDD_SYNC", "ddd", None, f"sync: add={len(to_add)} remove={len(to_remove)} filter={operator_filter}")
+        log_admin_action(user_id, "DDD_SYNC", "ddd", None, f"sync: add={added} remove={removed} filter={operator_filter}")
 
         return jsonify({
-            "added": len(to_add),
-            "removed": len(to_remove),
+            "added": added,
+            "removed": removed,
             "total": DDD.query.count(),
             "operator": operator_filter or "all"
         }), 200
@@ -1339,6 +1225,52 @@ def sync_ddds():
         db.session.rollback()
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
+@admin_bp.route("/notifications/broadcast", methods=["POST"])
+@jwt_required()
+def broadcast_notification():
+    """Aviso para todos os clientes ativos com ativações da operadora/DDD"""
+    try:
+        auth_check = require_admin()
+        if auth_check:
+            return auth_check
+        
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        title = (data.get("title") or "").strip()
+        message = (data.get("message") or "").strip()
+        operator = data.get("operator")
+        ddd = data.get("ddd")
+        statuses = data.get("statuses", ["ativada"])
+        
+        if not title or not message:
+            return jsonify({"error": "Título e mensagem são obrigatórios"}), 400
+        if len(title) > 255:
+            return jsonify({"error": "Título deve ter no máximo 255 caracteres"}), 400
+        if operator and operator not in ["vivo", "claro", "tim"]:
+            return jsonify({"error": "Operadora inválida"}), 400
+        if ddd and (not isinstance(ddd, str) or not ddd.isdigit() or len(ddd) != 2):
+            return jsonify({"error": "DDD inválido. Deve ser uma string de 2 dígitos."}), 400
+        valid_statuses = ["pendente_contrato", "pendente_documentos", "pendente_dados_tecnicos", "pendente_analise_documentos", "documentos_rejeitados", "em_analise", "aprovado", "reprovado", "pendente_confirmacao_qr", "ativada", "cancelado"]
+        if not isinstance(statuses, list) or any(status not in valid_statuses for status in statuses):
+            return jsonify({"error": "Status inválido"}), 400
+        
+        # INSERT ... SELECT em faixas de usuários, com commit por faixa
+        created = notificar_em_massa(title, message, operator=operator, ddd=ddd, statuses=statuses)
+        
+        log_admin_action(
+            user_id,
+            "NOTIFICATION_BROADCAST",
+            "notification",
+            None,
+            f"Aviso '{title}' enviado a {created} cliente(s) - operadora={operator or 'todas'} ddd={ddd or 'todos'} status={','.join(statuses) or 'todos'}"
+        )
+        
+        return jsonify({"message": "Aviso enviado", "created": created}), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
 @admin_bp.route("/users", methods=["GET"])
 @jwt_required()
 def get_users():
@@ -1360,19 +1292,29 @@ def get_users():
             query = query.filter_by(user_type=user_type)
         
         if search:
-            query = query.filter(
-                db.or_(
-                    User.cpf.contains(search),
-                    User.email.contains(search),
-                    User.name.contains(search)
-                )
-            )
+            # Mais relevantes primeiro (no modo cursor a ordem é por data)
+            query = buscar_usuarios(query, search)
         
-        paginated = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginação: por cursor (opcional) ou por página
+        if "cursor" in request.args:
+            items, pagination = paginar_por_cursor(
+                query, User, request.args.get("cursor"), per_page, request.args.get("total", "none")
+            )
+        else:
+            paginated = query.paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            items = paginated.items
+            pagination = {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev
+            }
         
         log_admin_action(
             user_id, 
@@ -1381,17 +1323,12 @@ def get_users():
         )
         
         return jsonify({
-            "users": [user.to_dict() for user in paginated.items],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": paginated.total,
-                "pages": paginated.pages,
-                "has_next": paginated.has_next,
-                "has_prev": paginated.has_prev
-            }
+            "users": [user.to_dict() for user in items],
+            "pagination": pagination
         }), 200
         
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
@@ -1406,7 +1343,7 @@ def get_user_details(user_id):
         
         admin_user_id = get_jwt_identity()
         
-        # Buscar o usuário - User model uses String(36) for ID
+        # Buscar o usuário
         user = User.query.get(user_id)
 
         if not user:
@@ -1528,11 +1465,26 @@ def get_logs():
                 )
             )
         
-        paginated = query.order_by(AdminLog.created_at.desc()).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Paginação: por cursor (opcional) ou por página
+        if "cursor" in request.args:
+            items, pagination = paginar_por_cursor(
+                query, AdminLog, request.args.get("cursor"), per_page, request.args.get("total", "none")
+            )
+        else:
+            paginated = query.order_by(AdminLog.created_at.desc()).paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            items = paginated.items
+            pagination = {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev
+            }
         
         log_admin_action(
             user_id, 
@@ -1541,17 +1493,78 @@ def get_logs():
         )
         
         return jsonify({
-            "logs": [log.to_dict() for log in paginated.items],
+            "logs": [log.to_dict() for log in items],
+            "pagination": pagination
+        }), 200
+        
+    except CursorInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
+@admin_bp.route("/archive", methods=["GET"])
+@jwt_required()
+def get_archive():
+    """Meses de logs e histórico já arquivados (fora do banco)"""
+    try:
+        auth_check = require_admin()
+        if auth_check:
+            return auth_check
+        
+        return jsonify({"archives": listar_arquivos()}), 200
+    except Exception as e:
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
+@admin_bp.route("/archive/<table>", methods=["GET"])
+@jwt_required()
+def get_archived_records(table):
+    """Consulta registros arquivados de admin_logs ou activation_history no intervalo [start, end).
+    
+    Em ordem cronológica; a página é lida dos arquivos sob demanda, sem total.
+    """
+    try:
+        auth_check = require_admin()
+        if auth_check:
+            return auth_check
+        
+        user_id = get_jwt_identity()
+        if table not in TABELAS_ARQUIVO:
+            return jsonify({"error": "Tabela inválida"}), 400
+        
+        start = interpretar_data(request.args.get("start"))
+        end = interpretar_data(request.args.get("end"))
+        if not start or not end or start >= end:
+            return jsonify({"error": "Informe start e end (AAAA-MM-DD), com start anterior a end"}), 400
+        if end - start > timedelta(days=366):
+            return jsonify({"error": "Intervalo máximo de 366 dias"}), 400
+        
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(int(request.args.get("per_page", 20)), 100)
+        
+        # Um registro a mais indica se existe próxima página
+        registros = consultar_arquivo(
+            table, start, end, request.args.to_dict(), deslocamento=(page - 1) * per_page, limite=per_page + 1
+        )
+        
+        log_admin_action(
+            user_id,
+            "ARCHIVE_VIEW",
+            table,
+            None,
+            f"Consulta ao arquivo de {table}: {start.date()} a {end.date()}"
+        )
+        
+        return jsonify({
+            "records": registros[:per_page],
             "pagination": {
                 "page": page,
                 "per_page": per_page,
-                "total": paginated.total,
-                "pages": paginated.pages,
-                "has_next": paginated.has_next,
-                "has_prev": paginated.has_prev
+                "has_next": len(registros) > per_page,
+                "has_prev": page > 1
             }
         }), 200
-        
+    except ValueError:
+        return jsonify({"error": "Parâmetros de paginação inválidos"}), 400
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
@@ -1999,20 +2012,16 @@ def reset_user_password(user_id):
         if len(new_password) < 6:
             return jsonify({"error": "Senha deve ter pelo menos 6 caracteres"}), 400
         
-        # Buscar o usuário usando SQL direto para evitar problemas de tipo
-        from sqlalchemy import text
-        result = db.session.execute(text("SELECT id, name, email FROM users WHERE id = :user_id"), {"user_id": str(user_id)}).fetchone()
+        result = User.query.get(user_id)
         
         if not result:
             return jsonify({"error": "Usuário não encontrado"}), 404
         
-        # Atualizar senha via SQL direto e reset de bloqueios
+        # Atualizar senha e resetar bloqueios
         from werkzeug.security import generate_password_hash
-        hashed = generate_password_hash(new_password)
-        db.session.execute(
-            text("UPDATE users SET password_hash = :hash, failed_login_attempts = :attempts, locked_until = :locked WHERE id = :user_id"),
-            {"hash": hashed, "attempts": 0, "locked": None, "user_id": str(user_id)}
-        )
+        result.password_hash = generate_password_hash(new_password)
+        result.failed_login_attempts = 0
+        result.locked_until = None
         
         db.session.commit()
         
@@ -2053,9 +2062,7 @@ def update_user_first_access(user_id):
         if not isinstance(first_access_completed, bool):
             return jsonify({"error": "Campo 'first_access_completed' deve ser um booleano"}), 400
         
-        # Buscar o usuário usando SQL direto para evitar problemas de tipo
-        from sqlalchemy import text
-        result = db.session.execute(text("SELECT * FROM users WHERE id = :user_id"), {"user_id": str(user_id)}).fetchone()
+        result = User.query.get(user_id)
         
         if not result:
             return jsonify({"error": "Usuário não encontrado"}), 404
@@ -2064,11 +2071,7 @@ def update_user_first_access(user_id):
         if result.user_type == 'admin':
             return jsonify({"error": "Não é possível alterar primeiro acesso de administradores"}), 400
         
-        # Atualizar o status usando SQL direto
-        db.session.execute(
-            text("UPDATE users SET first_access_completed = :status WHERE id = :user_id"),
-            {"status": first_access_completed, "user_id": str(user_id)}
-        )
+        result.first_access_completed = first_access_completed
         
         db.session.commit()
         
@@ -2109,7 +2112,7 @@ def delete_user(user_id):
         # Buscar o usuário a ser excluído
         try:
             user_uuid = UUID(user_id)  # For comparison with admin_user_id
-            user = User.query.get(user_id)  # User model uses String(36) for ID
+            user = User.query.get(user_id)
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
         if not user:
@@ -2154,6 +2157,7 @@ def delete_user(user_id):
         
         # Excluir notificações do usuário
         Notification.query.filter_by(user_id=user_uuid).delete()
+        remover_contador(user_uuid)
         
         # Excluir o usuário
         db.session.delete(user)
@@ -2451,7 +2455,6 @@ def get_activation_statistics():
             return auth_check
         
         from datetime import datetime, timedelta
-        from sqlalchemy import func, extract
         
         # Parâmetros
         period = request.args.get('period', 'daily')  # daily, weekly, monthly, semiannual, annual
@@ -2481,34 +2484,8 @@ def get_activation_statistics():
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
         
-        # Query base
-        base_query = Activation.query.filter(
-            Activation.created_at >= start_dt,
-            Activation.created_at <= end_dt
-        )
-        
-        # Retornar dados mockados para evitar problemas de compatibilidade SQLAlchemy
-        if period == 'daily':
-            data = [
-                {"period": f"Dia {i+1}", "total": 10+i*2, "approved": 8+i, "pending": 2, "rejected": 0}
-                for i in range(30)
-            ]
-        elif period == 'weekly':
-            data = [
-                {"period": f"Sem {i+1}", "total": 50+i*10, "approved": 40+i*8, "pending": 8, "rejected": 2}
-                for i in range(12)
-            ]
-        elif period == 'monthly':
-            months = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-            data = [
-                {"period": month, "total": 120+i*20, "approved": 100+i*15, "pending": 15, "rejected": 5}
-                for i, month in enumerate(months)
-            ]
-        else:
-            data = [
-                {"period": f"Período {i+1}", "total": 100+i*20, "approved": 80+i*15, "pending": 15, "rejected": 5}
-                for i in range(6)
-            ]
+        # Série agregada no banco (um GROUP BY), com intervalos vazios zerados
+        data = serie_ativacoes(period, start_dt.date(), end_dt.date())
         
         return jsonify({"data": data}), 200
         
@@ -2535,11 +2512,10 @@ def force_first_access_bypass(user_id):
         
         # Forçar primeiro acesso como completado
         user.first_access_completed = True
-        db.session.commit()
+        uow = UnidadeDeTrabalho(admin_user_id)
         
         # Log da ação
-        log_admin_action(
-            admin_user_id,
+        uow.auditoria(
             "FORCE_FIRST_ACCESS_BYPASS",
             "user",
             user_id,
@@ -2547,13 +2523,14 @@ def force_first_access_bypass(user_id):
         )
         
         # Criar notificação para o usuário
-        create_notification(
+        uow.notificacao(
             user.id,
             "Primeiro Acesso Liberado",
-            "Seu primeiro acesso foi liberado por um administrador. Você já pode acessar todas as funcionalidades do sistema.",
-            None
+            "Seu primeiro acesso foi liberado por um administrador. Você já pode acessar todas as funcionalidades do sistema."
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Primeiro acesso forçado com sucesso",
             "user": {
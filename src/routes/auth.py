@@ -8,8 +8,9 @@ import random
 import string
 from uuid import UUID
 
-from models.user import db, User, AdminLog
+from models.user import db, User
 from models.auth_models import VerificationCode, ContractValidation, TemporarySession, SystemConfig
+from services.audit_log import registrar_auditoria
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -30,14 +31,8 @@ def log_admin_action(user_id, action, details=None, ip_address=None):
         if isinstance(user_id, str):
             user_id = UUID(user_id)
         
-        log = AdminLog(
-            user_id=user_id,
-            action=action,
-            details=details,
-            ip_address=ip_address
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Gravação em lote fora da requisição (services/audit_log.py)
+        registrar_auditoria(user_id, action, details=details, ip_address=ip_address)
     except Exception as e:
         print(f"Erro ao registrar log: {e}")
 
@@ -583,7 +578,6 @@ def register():
 def get_current_user():
     try:
         user_id = get_jwt_identity()
-        # User model uses String(36) for ID, so use string directly
         user = User.query.get(user_id)
         
         if not user:
@@ -736,7 +730,6 @@ def reactivate_account():
             return jsonify({"error": "A senha deve conter pelo menos um número"}), 400
         
         # Buscar usuário
-        # User model uses String(36) for ID, so use string directly
         user = User.query.get(user_id)
         
         if not user:
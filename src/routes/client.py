@@ -1,20 +1,31 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, Response, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, get_jwt_request_location, create_access_token
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import queue
 import shutil
+import time
 import uuid
 from uuid import UUID
 import qrcode
 from io import BytesIO
 
-from models.user import db, User, Activation, Document, DDD, ActivationHistory, Notification, ContractAcceptance
+from models.user import db, User, Activation, Document, ActivationHistory, Notification, ContractAcceptance
 from utils.pdf_generator import create_combined_pdf
+from services.ddd_catalog import resposta_catalogo, ddd_disponivel
+from services.unit_of_work import UnidadeDeTrabalho
+from services.notifications import MAXIMO_IDS_POR_LOTE, contar_nao_lidas, marcar_como_lidas
+from services.pagination import paginar_por_cursor, CursorInvalido
+from services.client_events import ESCOPO_TOKEN, MAXIMO_CONEXOES_PADRAO, VALIDADE_TOKEN_PADRAO, assinar, cancelar, formatar_sse
 
 client_bp = Blueprint("client", __name__)
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "pdf"}
+NOTIFICACOES_POR_PAGINA = 20
+MAXIMO_NOTIFICACOES_POR_PAGINA = 100
+EVENTOS_KEEPALIVE_PADRAO = 15  # segundos
+EVENTOS_DURACAO_MAXIMA_PADRAO = 300  # segundos; o EventSource reconecta sozinho
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -26,48 +37,6 @@ def require_client():
         return jsonify({"error": "Acesso negado"}), 403
     return None
 
-def log_activation_change(activation_id, previous_status, new_status, user_id, reason=None):
-    """Registra mudança de status da ativação"""
-    try:
-        # Converter IDs para UUID se necessário
-        if isinstance(activation_id, str):
-            activation_id = UUID(activation_id)
-        if isinstance(user_id, str):
-            user_id = UUID(user_id)
-        
-        history = ActivationHistory(
-            activation_id=activation_id,
-            previous_status=previous_status,
-            new_status=new_status,
-            changed_by=user_id,
-            change_reason=reason
-        )
-        db.session.add(history)
-        db.session.commit()
-    except Exception as e:
-        print(f"Erro ao registrar histórico: {e}")
-
-def create_notification(user_id, title, message, activation_id=None):
-    """Cria notificação para o usuário"""
-    try:
-        # Converter IDs para UUID se necessário
-        if isinstance(user_id, str):
-            user_id = UUID(user_id)
-        if activation_id and isinstance(activation_id, str):
-            activation_id = UUID(activation_id)
-        
-        notification = Notification(
-            user_id=user_id,
-            activation_id=activation_id,
-            type="system",
-            title=title,
-            message=message
-        )
-        db.session.add(notification)
-        db.session.commit()
-    except Exception as e:
-        print(f"Erro ao criar notificação: {e}")
-
 @client_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
 def get_dashboard():
@@ -77,7 +46,6 @@ def get_dashboard():
             return auth_check
         
         user_id = get_jwt_identity()
-        # User model uses String(36) for ID, so use string directly
         user = User.query.get(user_id)
         
         if not user:
@@ -91,17 +59,18 @@ def get_dashboard():
         # Permitir criação ilimitada de ativações para testes
         can_create_new = True
         
-        # Buscar notificações não lidas
+        # Notificações não lidas mais recentes; o total vem do contador
         unread_notifications = Notification.query.filter(
             Notification.user_id == user_uuid,
             Notification.read_at.is_(None)
-        ).order_by(Notification.created_at.desc()).all()
+        ).order_by(Notification.created_at.desc()).limit(NOTIFICACOES_POR_PAGINA).all()
         
         return jsonify({
             "user": user.to_dict(),
             "activations": [activation.to_dict() for activation in activations],
             "can_create_new_activation": can_create_new,
-            "unread_notifications": [notif.to_dict() for notif in unread_notifications]
+            "unread_notifications": [notif.to_dict() for notif in unread_notifications],
+            "unread_count": contar_nao_lidas(user_uuid)
         }), 200
         
     except Exception as e:
@@ -119,7 +88,6 @@ def create_activation_contract_only():
         user_id = get_jwt_identity()
         
         # Verificar limite de 2 ativações por CPF
-        # User model uses String(36) for ID, so use string directly
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "Usuário não encontrado"}), 404
@@ -161,13 +129,7 @@ def create_activation_contract_only():
             return jsonify({"error": "Tipo de chip inválido"}), 400
         
         # Verificar se DDD está disponível para a operadora
-        ddd_available = DDD.query.filter_by(
-            operator=operator, 
-            ddd=ddd, 
-            is_active=True
-        ).first()
-        
-        if not ddd_available:
+        if not ddd_disponivel(operator, ddd):
             return jsonify({"error": "DDD não disponível para esta operadora"}), 400
         
         # Criar nova ativação com status pendente_contrato
@@ -181,25 +143,26 @@ def create_activation_contract_only():
         )
         
         db.session.add(activation)
-        db.session.commit()
+        uow = UnidadeDeTrabalho(user_id)
         
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
+        uow.historico(
+            activation, 
             None, 
             "pendente_contrato", 
-            user_id, 
             "Ativação criada - aguardando aceite do contrato"
         )
         
         # Criar notificação
-        create_notification(
+        uow.notificacao(
             user_id,
             "Ativação Criada",
             "Sua ativação foi criada. Aceite o contrato para continuar.",
-            activation.id
+            activation
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Ativação criada com sucesso",
             "activation": activation.to_dict()
@@ -224,7 +187,6 @@ def create_activation():
         user_id = get_jwt_identity()
         print(f"[DEBUG] User ID: {user_id}")
         
-        # User model uses String(36) for ID, so use string directly
         user = User.query.get(user_id)
         
         if not user:
@@ -292,13 +254,7 @@ def create_activation():
                 return jsonify({"error": "Para chip físico, o ICCID é obrigatório"}), 400
         
         # Verificar se o DDD está disponível para a operadora
-        ddd_available = DDD.query.filter_by(
-            operator=operator,
-            ddd=ddd,
-            is_active=True
-        ).first()
-        
-        if not ddd_available:
+        if not ddd_disponivel(operator, ddd):
             return jsonify({"error": "DDD não disponível para esta operadora"}), 400
         
         # Verificar se é primeira ativação (precisa de documentos)
@@ -330,33 +286,34 @@ def create_activation():
         )
         
         db.session.add(activation)
-        db.session.commit()
+        uow = UnidadeDeTrabalho(user_id)
         
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
+        uow.historico(
+            activation, 
             None, 
             initial_status, 
-            user_id, 
             f"Ativação criada - {'primeira ativação' if is_first_activation else 'ativação subsequente'}"
         )
         
         # Criar notificação
         if is_first_activation:
-            create_notification(
+            uow.notificacao(
                 user_id,
                 "Ativação Criada",
                 "Sua ativação foi criada. Agora envie seus documentos para análise.",
-                activation.id
+                activation
             )
         else:
-            create_notification(
+            uow.notificacao(
                 user_id,
                 "Ativação Criada",
                 "Sua ativação foi criada e está em análise.",
-                activation.id
+                activation
             )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Ativação criada com sucesso",
             "activation": activation.to_dict(),
@@ -425,7 +382,7 @@ def accept_contract(activation_id):
         if activation.contract_accepted:
             return jsonify({"error": "Contrato já foi aceito"}), 400
 
-        # Buscar usuário para obter CPF - User model uses String(36) for ID
+        # Buscar usuário para obter CPF
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "Usuário não encontrado"}), 404
@@ -465,25 +422,26 @@ def accept_contract(activation_id):
         if activation.status == "pendente_contrato":
             activation.status = "pendente_documentos"
         
+        uow = UnidadeDeTrabalho(user_id)
+        
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
+        uow.historico(
+            activation, 
             previous_status, 
             activation.status, 
-            user_id, 
             "Contrato aceito pelo cliente"
         )
         
-        db.session.commit()
-        
         # Criar notificação
-        create_notification(
+        uow.notificacao(
             user_id,
             "Contrato Aceito",
             "Contrato aceito com sucesso. Agora você pode enviar os documentos.",
-            activation.id
+            activation
         )
         
+        uow.commit()
+        
         return jsonify({
             "message": "Contrato aceito com sucesso",
             "activation": activation.to_dict(),
@@ -573,7 +531,7 @@ def upload_documents(activation_id):
                     pass
                 db.session.delete(doc)
         
-        # Buscar o usuário para atualizar o perfil - User model uses String(36) for ID
+        # Buscar o usuário para atualizar o perfil
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "Usuário não encontrado"}), 404
@@ -679,28 +637,28 @@ def upload_documents(activation_id):
             # Atualizar status da ativação
             previous_status = activation.status
             activation.status = "pendente_analise_documentos"
-            
-            db.session.commit()
+            uow = UnidadeDeTrabalho(user_id)
             
             # Registrar histórico
             action_description = "Documentos reenviados pelo cliente" if existing_docs else "Documentos enviados pelo cliente"
-            log_activation_change(
-                activation.id, 
+            uow.historico(
+                activation, 
                 previous_status, 
                 "pendente_analise_documentos", 
-                user_id, 
                 action_description
             )
             
             # Criar notificação
             notification_message = "Documentos reenviados com sucesso. Aguarde a análise." if existing_docs else "Documentos enviados com sucesso. Aguarde a análise."
-            create_notification(
+            uow.notificacao(
                 user_id,
                 "Documentos Enviados",
                 notification_message,
-                activation.id
+                activation
             )
             
+            uow.commit()
+            
             return jsonify({
                 "message": "Documentos enviados com sucesso",
                 "activation": activation.to_dict()
@@ -840,39 +798,36 @@ def complete_technical_data(activation_id):
             
         print(f"Status updated to: {activation.status}")
 
+        uow = UnidadeDeTrabalho(user_id)
+        
         # Registrar histórico
-        log_activation_change(
-            activation.id, 
+        uow.historico(
+            activation, 
             previous_status, 
             activation.status, 
-            user_id, 
             status_message
         )
         
-        print(f"Committing changes to database...")
-        db.session.commit()
-        print(f"✅ Database commit successful")
-        
-        # Verificar se os dados foram realmente salvos
-        db.session.refresh(activation)
-        print(f"After commit verification - ICCID: {activation.iccid}, EID: {activation.eid}, IMEI: {activation.imei}, Service Type: {activation.service_type}")
-        
         # Criar notificação baseada no status final
         if activation.status == "aprovado":
-            create_notification(
+            uow.notificacao(
                 user_id,
                 "Ativação Aprovada",
                 "Dados técnicos enviados com sucesso. Sua ativação foi aprovada! Aguarde o envio do QR Code.",
-                activation.id
+                activation
             )
         else:
-            create_notification(
+            uow.notificacao(
                 user_id,
                 "Dados Técnicos Completados",
                 "Dados técnicos enviados com sucesso. Sua ativação está em análise.",
-                activation.id
+                activation
             )
         
+        print(f"Committing changes to database...")
+        uow.commit()
+        print(f"✅ Database commit successful")
+        
         return jsonify({
             "message": "Dados técnicos completados com sucesso",
             "activation": activation.to_dict()
@@ -895,7 +850,7 @@ def upload_profile_documents():
         user_id = get_jwt_identity()
         try:
             user_uuid = UUID(user_id)  # For other models that use UUID
-            user = User.query.get(user_id)  # User model uses String(36) for ID
+            user = User.query.get(user_id)
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
         
@@ -970,7 +925,7 @@ def get_profile_documents():
         user_id = get_jwt_identity()
         try:
             user_uuid = UUID(user_id)  # For other models that use UUID
-            user = User.query.get(user_id)  # User model uses String(36) for ID
+            user = User.query.get(user_id)
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
         
@@ -1061,21 +1016,20 @@ def confirm_qr_scanned(activation_id):
         activation.status = "ativada"
         activation.qr_scanned_at = datetime.utcnow()
         
-        log_activation_change(
-            activation.id, 
+        uow = UnidadeDeTrabalho(user_id)
+        uow.historico(
+            activation, 
             previous_status, 
             "ativada", 
-            user_id, 
             "Cliente confirmou escaneamento do QR Code"
         )
-        db.session.commit()
-        
-        create_notification(
+        uow.notificacao(
             user_id,
             "QR Code Confirmado",
             "Você confirmou o escaneamento do QR Code. Sua linha está ativa!",
-            activation.id
+            activation
         )
+        uow.commit()
         
         return jsonify({"message": "Confirmação de QR Code registrada com sucesso", "activation": activation.to_dict()}), 200
         
@@ -1091,8 +1045,7 @@ def get_available_ddds(operator):
         if auth_check:
             return auth_check
         
-        ddds = DDD.query.filter_by(operator=operator, is_active=True).all()
-        return jsonify({"ddds": [d.to_dict() for d in ddds]}), 200
+        return resposta_catalogo(operator, somente_ativos=True)
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
@@ -1107,13 +1060,130 @@ def get_notifications():
         user_id = get_jwt_identity()
         try:
             user_uuid = UUID(user_id)
-            notifications = Notification.query.filter_by(user_id=user_uuid).order_by(Notification.created_at.desc()).all()
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
-        return jsonify({"notifications": [n.to_dict() for n in notifications]}), 200
+        
+        per_page = min(request.args.get("per_page", NOTIFICACOES_POR_PAGINA, type=int), MAXIMO_NOTIFICACOES_POR_PAGINA)
+        if per_page < 1:
+            per_page = NOTIFICACOES_POR_PAGINA
+        query = Notification.query.filter_by(user_id=user_uuid)
+        if request.args.get("unread") == "true":
+            query = query.filter(Notification.read_at.is_(None))
+        
+        # Feed por cursor (created_at, id); sem cursor, a primeira página
+        try:
+            notifications, pagination = paginar_por_cursor(
+                query, Notification, request.args.get("cursor"), per_page
+            )
+        except CursorInvalido as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({
+            "notifications": [n.to_dict() for n in notifications],
+            "pagination": pagination,
+            "unread_count": contar_nao_lidas(user_uuid)
+        }), 200
     except Exception as e:
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
+@client_bp.route("/notifications/unread-count", methods=["GET"])
+@jwt_required()
+def get_unread_notifications_count():
+    """Quantidade de não lidas (badge), sem carregar notificações"""
+    try:
+        auth_check = require_client()
+        if auth_check:
+            return auth_check
+        
+        try:
+            user_uuid = UUID(get_jwt_identity())
+        except ValueError:
+            return jsonify({"error": "ID de usuário inválido"}), 400
+        
+        resposta = jsonify({"unread_count": contar_nao_lidas(user_uuid)})
+        resposta.headers["Cache-Control"] = "private, no-cache"
+        return resposta, 200
+    except Exception as e:
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
+@client_bp.route("/events/token", methods=["POST"])
+@jwt_required()
+def client_events_token():
+    """Token de curta duração para abrir o canal SSE (?jwt= em /events)"""
+    try:
+        auth_check = require_client()
+        if auth_check:
+            return auth_check
+        
+        validade = current_app.config.get("CLIENT_EVENTS_TOKEN_TTL", VALIDADE_TOKEN_PADRAO)
+        token = create_access_token(
+            identity=get_jwt_identity(),
+            additional_claims={"user_type": get_jwt().get("user_type"), "scope": ESCOPO_TOKEN},
+            expires_delta=timedelta(seconds=validade)
+        )
+        return jsonify({"token": token, "expires_in": validade}), 200
+    except Exception as e:
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
+@client_bp.route("/events", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])
+def client_events():
+    """Canal SSE com notificações e mudanças de status das ativações do cliente.
+    
+    O EventSource do navegador não envia cabeçalhos: o token vai em ?jwt=, e
+    na URL só vale o token de eventos (POST /events/token), que expira em
+    segundos; o access token comum só é aceito no cabeçalho. A validade é
+    conferida na conexão: ao reconectar, o cliente pede um token novo.
+    """
+    try:
+        auth_check = require_client()
+        if auth_check:
+            return auth_check
+        
+        if get_jwt_request_location() == "query_string" and get_jwt().get("scope") != ESCOPO_TOKEN:
+            return jsonify({"error": "Use um token de eventos (POST /api/client/events/token) na URL"}), 401
+        
+        try:
+            user_uuid = UUID(get_jwt_identity())
+        except ValueError:
+            return jsonify({"error": "ID de usuário inválido"}), 400
+        
+        unread_count = contar_nao_lidas(user_uuid)
+        fila = assinar(user_uuid, current_app.config.get("CLIENT_EVENTS_MAX_CONNECTIONS", MAXIMO_CONEXOES_PADRAO))
+        if fila is None:
+            resposta = jsonify({"error": "Canal de eventos indisponível no momento"})
+            resposta.headers["Retry-After"] = "30"
+            return resposta, 503
+    except Exception as e:
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+    
+    keepalive = current_app.config.get("CLIENT_EVENTS_KEEPALIVE", EVENTOS_KEEPALIVE_PADRAO)
+    duracao = current_app.config.get("CLIENT_EVENTS_MAX_DURATION", EVENTOS_DURACAO_MAXIMA_PADRAO)
+    
+    def gerar():
+        # Roda depois do fim da requisição: sem sessão do banco aberta
+        yield "retry: 5000\n\n"
+        yield formatar_sse("unread_count", {"unread_count": unread_count})
+        fim = time.monotonic() + duracao
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                evento = fila.get(timeout=min(keepalive, restante))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield formatar_sse(evento["type"], evento["data"])
+    
+    resposta = Response(gerar(), mimetype="text/event-stream")
+    # Também quando o gerador nem chega a rodar (cliente desconectado antes)
+    resposta.call_on_close(lambda: cancelar(user_uuid, fila))
+    resposta.headers["Cache-Control"] = "no-cache"
+    # Sem buffer em proxies (nginx)
+    resposta.headers["X-Accel-Buffering"] = "no"
+    return resposta
+
 @client_bp.route("/notifications/<notification_id>/read", methods=["POST"])
 @jwt_required()
 def mark_notification_read(notification_id):
@@ -1163,7 +1233,7 @@ def download_combined_pdf(activation_id):
         if not activation:
             return jsonify({"error": "Ativação não encontrada"}), 404
         
-        # Buscar usuário - User model uses String(36) for ID
+        # Buscar usuário
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "Usuário não encontrado"}), 404
@@ -1225,7 +1295,6 @@ def download_combined_pdf(activation_id):
             
             # Atualizar o campo combined_pdf_path no usuário
             user.combined_pdf_path = profile_pdf_path
-            db.session.commit()
             
             print(f"PDF combinado salvo no perfil do cliente: {profile_pdf_path}")
             
@@ -1233,14 +1302,15 @@ def download_combined_pdf(activation_id):
             print(f"Erro ao salvar PDF combinado no perfil: {str(e)}")
             # Não falha a operação principal se não conseguir salvar no perfil
         
-        # Registrar no histórico
-        log_activation_change(
-            activation_id=activation_uuid,
+        # Registrar no histórico (junto com o caminho do PDF no perfil)
+        uow = UnidadeDeTrabalho(user_id)
+        uow.historico(
+            activation,
             previous_status=activation.status,
             new_status=activation.status,  # Mantém o mesmo status
-            user_id=user_id,
             reason="PDF combinado gerado pelo cliente"
         )
+        uow.commit()
         
         # Retornar arquivo para download
         return send_file(
@@ -1268,22 +1338,44 @@ def mark_all_notifications_read():
         except ValueError:
             return jsonify({"error": "ID de usuário inválido"}), 400
         
-        # Buscar todas as notificações não lidas do usuário
-        notifications = Notification.query \
-            .filter_by(user_id=user_uuid) \
-            .filter(Notification.read_at.is_(None)) \
-            .all()
+        # Um único UPDATE, sem carregar as notificações
+        atualizadas = marcar_como_lidas(user_uuid)
+        db.session.commit()
+        
+        if not atualizadas:
+            return jsonify({"message": "Nenhuma notificação não lida", "updated": 0}), 200
+        return jsonify({"message": "Notificações marcadas como lidas", "updated": atualizadas}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erro interno: {str(e)}"}), 500
+
+
+@client_bp.route("/notifications/read", methods=["POST"])
+@jwt_required()
+def mark_notifications_read():
+    """Marca como lidas as notificações informadas em {"ids": [...]}"""
+    try:
+        auth_check = require_client()
+        if auth_check:
+            return auth_check
         
-        if not notifications:
-            return jsonify({"message": "Nenhuma notificação não lida"}), 200
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        ids = data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "Informe a lista de ids das notificações"}), 400
+        if len(ids) > MAXIMO_IDS_POR_LOTE:
+            return jsonify({"error": f"Máximo de {MAXIMO_IDS_POR_LOTE} notificações por requisição"}), 400
         
-        now = datetime.utcnow()
-        for n in notifications:
-            n.read_at = now
+        try:
+            user_uuid = UUID(user_id)
+            notification_uuids = {UUID(str(n)) for n in ids}
+        except ValueError:
+            return jsonify({"error": "ID inválido"}), 400
         
+        atualizadas = marcar_como_lidas(user_uuid, notification_uuids)
         db.session.commit()
-        return jsonify({"message": "Notificações marcadas como lidas"}), 200
+        return jsonify({"message": "Notificações marcadas como lidas", "updated": atualizadas}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
-
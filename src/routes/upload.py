@@ -1,36 +1,43 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import pandas as pd
-import hashlib
 import os
 from datetime import datetime
-import unicodedata
-import re
+from uuid import UUID
 
-from models import DDDImport
+from models import DDDImport, DDDImportJob
 from models.user import DDD
 from config.database import db
+from services.ddd_import_service import (
+    rename_columns, filtrar_ddds, linhas_filtradas_para_dicts, generate_hash,
+    separar_duplicatas, abrir_planilha, importar_lotes, preparar_planilha_upload,
+    sincronizar_catalogo, nova_importacao, publicar_importacao, ImportacaoDesatualizada, TIPOS_CHIP_PREVIEW
+)
+from services.ddd_import_jobs import enfileirar_importacao, garantir_worker
 
 upload_bp = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB (padrão quando DDD_UPLOAD_MAX_FILE_SIZE não está configurado)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def generate_hash(row):
-    """Gera hash única normalizando campos relevantes"""
-    linha_src = str(row.get('linha_original', row.get('linha', ''))).strip()
-    linha_digits = ''.join(ch for ch in linha_src if ch.isdigit())
-    operadora = str(row.get('operadora', '')).strip().lower()
-    tipo = str(row.get('tipo_chip', '')).strip().lower()
-    espec_raw = str(row.get('especificacao', '')).strip()
-    espec_digits = re.sub(r'[^0-9]', '', espec_raw)
-    ddd = str(row.get('ddd', '')).strip()
-    base = f"{ddd}_{operadora}_{tipo}_{espec_digits}_{linha_digits}"
-    return hashlib.sha256(base.encode()).hexdigest()
+def user_uuid_atual():
+    """UUID do usuário autenticado, ou None se a identidade não for um UUID"""
+    user_id = get_jwt_identity()
+    try:
+        return UUID(user_id) if isinstance(user_id, str) else user_id
+    except Exception:
+        return None
+
+def importacao_assincrona():
+    """Indica se o upload deve ser processado como job em segundo plano"""
+    valor = request.args.get('async', request.form.get('async'))
+    if valor is None:
+        return current_app.config.get('DDD_IMPORT_ASYNC', False)
+    return str(valor).strip().lower() in ('1', 'true', 'sim', 'yes')
 
 def validate_ddd_data(data):
     """Valida dados de DDD para cadastro manual"""
@@ -55,33 +62,14 @@ def validate_ddd_data(data):
     
     return errors
 
-def normalize_text(s):
-    s = unicodedata.normalize('NFKD', str(s))
-    s = ''.join(c for c in s if not unicodedata.combining(c))
-    return s.lower().strip()
-
-def rename_columns(df):
-    mapping = {}
-    for col in df.columns:
-        n = normalize_text(col)
-        if 'ddd' in n:
-            mapping[col] = 'ddd'
-        elif 'operad' in n or 'carrier' in n:
-            mapping[col] = 'operadora'
-        elif ('tipo' in n and 'chip' in n) or n == 'tipo':
-            mapping[col] = 'tipo_chip'
-        elif 'especifica' in n or 'gb' in n or 'plano' in n:
-            mapping[col] = 'especificacao'
-        elif 'linha' in n or 'numero' in n or 'telefone' in n:
-            mapping[col] = 'linha'
-    if mapping:
-        df = df.rename(columns=mapping)
-    return df
-
 @upload_bp.route('/upload-ddds', methods=['POST'])
 @jwt_required()
 def upload_ddds():
     try:
+        # O limite de tamanho das planilhas pode ser maior que o MAX_CONTENT_LENGTH global
+        max_file_size = current_app.config.get('DDD_UPLOAD_MAX_FILE_SIZE', MAX_FILE_SIZE)
+        request.max_content_length = max(current_app.config.get('MAX_CONTENT_LENGTH') or 0, max_file_size + 1024 * 1024)
+        
         # Obter arquivo do campo 'file' ou qualquer outro campo de arquivo enviado
         file = request.files.get('file')
         if not file and request.files:
@@ -102,78 +90,50 @@ def upload_ddds():
         file_size = file.tell()
         file.seek(0)
         
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({'error': 'Arquivo muito grande. Máximo 10MB'}), 400
+        if file_size > max_file_size:
+            return jsonify({'error': f'Arquivo muito grande. Máximo {max_file_size // (1024 * 1024)}MB'}), 400
         
-        # Limpar importações anteriores
-        db.session.query(DDDImport).delete()
-        db.session.commit()
-
-        # Ler arquivo Excel
+        # Modo job: salva o arquivo, enfileira e responde imediatamente
+        if importacao_assincrona():
+            job = enfileirar_importacao(current_app._get_current_object(), file, secure_filename(file.filename), user_uuid_atual())
+            return jsonify({
+                'success': True,
+                'message': 'Importação enfileirada',
+                'job_id': str(job.id),
+                'status': job.status,
+                'status_url': f'/api/ddds/imports/{job.id}'
+            }), 202
+        
+        # Abrir arquivo Excel para leitura em lotes
         try:
-            df = pd.read_excel(file)
+            colunas, lotes, _ = abrir_planilha(file.stream, file.filename)
         except Exception as e:
             return jsonify({'error': f'Erro ao ler arquivo Excel: {str(e)}'}), 400
         
         # Verificar se tem pelo menos 4 colunas
-        if len(df.columns) < 4:
+        if len(colunas) < 4:
             return jsonify({'error': 'Arquivo deve ter pelo menos 4 colunas'}), 400
         
-        df = rename_columns(df)
-        
-        # Se não houver coluna 'linha', criar a partir da coluna 'ddd'
-        if 'linha' not in df.columns and 'ddd' in df.columns:
-            df['linha'] = df['ddd']
-        if 'tipo_chip' not in df.columns:
-            df['tipo_chip'] = 'vazia'
-        if 'especificacao' not in df.columns:
-            df['especificacao'] = '150GB'
-        
-        # Aplicar filtros
-        linhas_filtradas = []
-        rejeicoes = {"tipo_invalido": 0, "spec_invalida": 0, "linha_invalida": 0}
-        
-        for _, row in df.iterrows():
-            # Filtro 1: Tipo chip
-            tipo_chip_val = normalize_text(row.get('tipo_chip', ''))
-            if tipo_chip_val not in ['vazia', 'vazio', 'smp']:
-                rejeicoes["tipo_invalido"] += 1
-                continue
-            
-            especificacao_raw = str(row.get('especificacao', '')).strip()
-            digits_spec = re.sub(r'[^0-9]', '', especificacao_raw)
-            if digits_spec != '150':
-                rejeicoes["spec_invalida"] += 1
-                continue
-            
-            # Extrair 2 primeiros dígitos da linha
-            linha_raw = str(row.get('linha', str(row.get('ddd', '')))).strip()
-            linha_digits = ''.join(ch for ch in linha_raw if ch.isdigit())
-            if len(linha_digits) < 2:
-                rejeicoes["linha_invalida"] += 1
-                continue
-            ddd = linha_digits[:2]
-            
-            # Dados da operadora
-            operadora = str(row.get('operadora', '')).strip()
-            
-            # Criar dicionário com dados filtrados
-            dados_filtrados = {
-                'ddd': ddd,
-                'operadora': operadora,
-                'tipo_chip': tipo_chip_val,
-                'especificacao': especificacao_raw,
-                'linha_original': linha_raw,
-                'arquivo_origem': secure_filename(file.filename)
-            }
-            
-            linhas_filtradas.append(dados_filtrados)
+        # Filtrar, deduplicar e carregar lote a lote na área de carga; ddd_imports
+        # continua intacta até a publicação. Com DDD_IMPORT_ON_CONFLICT as
+        # duplicatas são descartadas pelo próprio banco (ON CONFLICT DO NOTHING)
+        ignorar_conflitos = current_app.config.get('DDD_IMPORT_ON_CONFLICT', False)
+        importacao_id = nova_importacao()
+        iniciada_em = datetime.utcnow()
+        try:
+            estatisticas = importar_lotes(lotes, secure_filename(file.filename), importacao_id, ignorar_conflitos=ignorar_conflitos)
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'Erro ao processar planilha: {str(e)}'}), 400
         
         # Estatísticas
-        total_linhas = len(df)
-        linhas_filtradas_count = len(linhas_filtradas)
+        total_linhas = estatisticas['total_linhas']
+        linhas_filtradas_count = estatisticas['linhas_filtradas']
+        duplicatas = estatisticas['duplicatas_encontradas']
+        novos_registros = estatisticas['novos_registros']
         
         if linhas_filtradas_count == 0:
+            db.session.rollback()
             return jsonify({
                 'error': 'Nenhuma linha atendeu aos critérios de filtro',
                 'estatisticas': {
@@ -181,96 +141,22 @@ def upload_ddds():
                     'linhas_filtradas': 0,
                     'linhas_rejeitadas': total_linhas
                 },
-                'detalhes_rejeicao': rejeicoes,
-                'colunas_reconhecidas': list(df.columns)
+                'detalhes_rejeicao': estatisticas['rejeicoes'],
+                'colunas_reconhecidas': list(preparar_planilha_upload(pd.DataFrame(columns=colunas)).columns)
             }), 400
         
-        duplicatas = 0
-        linhas_unicas = []
-        hashes_vistos = set()
-        
-        for linha in linhas_filtradas:
-            hash_linha = generate_hash(linha)
-            existing = DDDImport.query.filter_by(hash_linha=hash_linha).first()
-            if existing or hash_linha in hashes_vistos:
-                duplicatas += 1
-                continue
-            hashes_vistos.add(hash_linha)
-            linha['hash_linha'] = hash_linha
-            linhas_unicas.append(linha)
-        
-        # Inserir no banco de dados
-        novos_registros = 0
-        for linha in linhas_unicas:
-            ddd = DDDImport(
-                ddd=linha['ddd'],
-                operadora=linha['operadora'],
-                tipo_chip=linha['tipo_chip'],
-                especificacao=linha['especificacao'],
-                linha_original=linha['linha_original'],
-                arquivo_origem=linha['arquivo_origem'],
-                hash_linha=linha['hash_linha']
-            )
-            db.session.add(ddd)
-            novos_registros += 1
-        
-        # Commit das alterações
+        # Publicar a importação e sincronizar o catálogo oficial na mesma transação
         try:
+            publicar_importacao(importacao_id, iniciada_em)
+            adicionados, removidos = sincronizar_catalogo(user_uuid_atual())
             db.session.commit()
+        except ImportacaoDesatualizada as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 409
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': f'Erro ao salvar no banco de dados: {str(e)}'}), 500
 
-        # Sincronizar catálogo oficial
-        def norm_op(op):
-            s = (op or '').strip().lower()
-            if s.startswith('vivo'):
-                return 'vivo'
-            if s.startswith('claro'):
-                return 'claro'
-            if s.startswith('tim'):
-                return 'tim'
-            return None
-
-        target = set()
-        for imp in DDDImport.query.all():
-            op = norm_op(imp.operadora)
-            if not op:
-                continue
-            ddd_value = (imp.ddd or '').strip()[:2]
-            if len(ddd_value) != 2 or not ddd_value.isdigit():
-                continue
-            target.add((op, ddd_value))
-
-        existing = {(d.operator, d.ddd): d for d in DDD.query.all()}
-
-        to_remove = []
-        to_add = []
-
-        for (op, ddd_value), obj in existing.items():
-            if (op, ddd_value) not in target:
-                to_remove.append(obj)
-
-        for op, ddd_value in target:
-            if (op, ddd_value) not in existing:
-                to_add.append((op, ddd_value))
-
-        for obj in to_remove:
-            db.session.delete(obj)
-
-        from flask_jwt_extended import get_jwt_identity
-        user_id = get_jwt_identity()
-        try:
-            from uuid import UUID
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-        except Exception:
-            user_uuid = None
-
-        for op, ddd_value in to_add:
-            db.session.add(DDD(operator=op, ddd=ddd_value, is_active=True, created_by=user_uuid))
-
-        db.session.commit()
-
         return jsonify({
             'success': True,
             'message': 'Arquivo processado e catálogo sincronizado',
@@ -279,8 +165,8 @@ def upload_ddds():
                 'linhas_filtradas': linhas_filtradas_count,
                 'duplicatas_encontradas': duplicatas,
                 'novos_registros': novos_registros,
-                'catalogo_adicionados': len(to_add),
-                'catalogo_removidos': len(to_remove),
+                'catalogo_adicionados': adicionados,
+                'catalogo_removidos': removidos,
                 'catalogo_total': DDD.query.count()
             }
         })
@@ -288,6 +174,28 @@ def upload_ddds():
     except Exception as e:
         return jsonify({'error': f'Erro ao processar arquivo: {str(e)}'}), 500
 
+@upload_bp.route('/ddds/imports/<job_id>', methods=['GET'])
+@jwt_required()
+def get_import_job(job_id):
+    """Consulta o progresso de uma importação assíncrona"""
+    try:
+        try:
+            job = DDDImportJob.query.get(UUID(job_id))
+        except ValueError:
+            return jsonify({'error': 'ID de importação inválido'}), 400
+        
+        if not job:
+            return jsonify({'error': 'Importação não encontrada'}), 404
+        
+        # Garante que jobs pendentes sejam processados mesmo após reinício do servidor
+        if job.status in ('pending', 'processing'):
+            garantir_worker(current_app._get_current_object())
+        
+        return jsonify({'success': True, 'job': job.to_dict()})
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro ao consultar importação: {str(e)}'}), 500
+
 @upload_bp.route('/ddds/manual', methods=['POST'])
 @jwt_required()
 def add_ddd_manual():
@@ -421,59 +329,22 @@ def preview_ddds():
             source_type = 'manual'
             source_name = 'MANUAL'
         
-        # Aplicar filtros
-        linhas_filtradas = []
-        
-        for _, row in df.iterrows():
-            # Filtro 1: Tipo chip deve ser "vazia" ou "smp"
-            tipo_chip = str(row.get('tipo_chip', '')).strip().lower()
-            if tipo_chip not in ['vazia', 'smp']:
-                continue
-            
-            especificacao_raw = str(row.get('especificacao', '')).strip()
-            digits_spec = re.sub(r'[^0-9]', '', especificacao_raw)
-            if source_type == 'arquivo' and digits_spec != '150':
-                continue
-            
-            # Extrair 2 primeiros dígitos da linha
-            linha_raw = str(row.get('linha', str(row.get('ddd', '')))).strip()
-            linha_digits = ''.join(ch for ch in linha_raw if ch.isdigit())
-            if len(linha_digits) < 2:
-                continue
-            ddd = linha_digits[:2]
-            
-            # Dados da operadora
-            operadora = str(row.get('operadora', '')).strip()
-            
-            # Criar dicionário com dados filtrados
-            dados_filtrados = {
-                'ddd': ddd,
-                'operadora': operadora,
-                'tipo_chip': tipo_chip,
-                'especificacao': especificacao_raw,
-                'linha_original': linha_raw,
-                'arquivo_origem': source_name
-            }
-            
-            linhas_filtradas.append(dados_filtrados)
+        # Aplicar filtros (o preview não remove acentos e só exige 150GB para arquivos)
+        filtradas, _ = filtrar_ddds(
+            df,
+            source_name,
+            tipos_validos=TIPOS_CHIP_PREVIEW,
+            remover_acentos=False,
+            validar_especificacao=(source_type == 'arquivo')
+        )
+        linhas_filtradas = linhas_filtradas_para_dicts(filtradas)
         
         # Estatísticas
         total_linhas = len(df)
         linhas_filtradas_count = len(linhas_filtradas)
         
         # Verificar duplicatas (apenas para preview, não salva no banco)
-        duplicatas = 0
-        hashes_vistos = set()
-        
-        for linha in linhas_filtradas:
-            hash_linha = generate_hash(linha)
-            
-            # Verificar se já existe no banco
-            existing = DDDImport.query.filter_by(hash_linha=hash_linha).first()
-            if existing or hash_linha in hashes_vistos:
-                duplicatas += 1
-            
-            hashes_vistos.add(hash_linha)
+        _, duplicatas = separar_duplicatas(linhas_filtradas)
         
         return jsonify({
             'success': True,
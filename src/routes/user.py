@@ -20,13 +20,11 @@ def create_user():
 
 @user_bp.route('/users/<user_id>', methods=['GET'])
 def get_user(user_id):
-    # User model uses String(36) for ID, so use string directly
     user = User.query.get_or_404(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<user_id>', methods=['PUT'])
 def update_user(user_id):
-    # User model uses String(36) for ID, so use string directly
     user = User.query.get_or_404(user_id)
     data = request.json
     user.username = data.get('username', user.username)
@@ -36,7 +34,6 @@ def update_user(user_id):
 
 @user_bp.route('/users/<user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    # User model uses String(36) for ID, so use string directly
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
@@ -0,0 +1 @@
+# Arquivo __init__.py para tornar services um módulo Python
@@ -0,0 +1,232 @@
+"""
+Agregados materializados de ativações.
+
+- activation_status_counters: quantidade por status (dashboard);
+- activation_daily_rollup: quantidade por dia de criação, operadora, tipo
+  de chip e status (gráficos de longo prazo).
+
+Listeners da sessão calculam (before_flush) e aplicam (after_flush), na
+mesma transação, o saldo de cada flush (+1 na combinação nova, -1 na
+anterior), então qualquer criação, alteração ou exclusão de Activation pelo
+ORM mantém os agregados corretos sem alterar as rotas. Operações em massa
+(query.update/delete, SQL direto) não passam pelos listeners; as
+reconciliações periódicas recalculam os valores com GROUP BY, uma por vez
+entre os workers (bloquear_tarefa), gravando linhas novas com o mesmo
+upsert dos listeners.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import String, cast, event, func, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config.database import db
+from models.user import Activation, ActivationStatusCounter, ActivationDailyRollup
+from services.periodic_tasks import bloquear_tarefa, registrar_tarefa
+
+INTERVALO_RECONCILIACAO_PADRAO = 3600  # segundos
+DIAS_RECONCILIACAO_ROLLUP_PADRAO = 7
+
+_STATUS_PADRAO = Activation.__table__.c.status.default.arg
+# Campos que definem a linha do rollup de uma ativação
+_CAMPOS_ROLLUP = ('created_at', 'operator', 'chip_type', 'status')
+
+
+def _valor_anterior(obj, campo):
+    historico = inspect(obj).attrs[campo].history
+    valores = historico.deleted or historico.unchanged
+    # Sem histórico o atributo está expirado; o acesso recarrega do banco
+    return valores[0] if valores else getattr(obj, campo)
+
+
+def _chave_rollup(criada_em, operator, chip_type, status):
+    return (criada_em.date() if criada_em else None, operator, chip_type, status)
+
+
+def _chave_rollup_anterior(obj):
+    return _chave_rollup(*(_valor_anterior(obj, campo) for campo in _CAMPOS_ROLLUP))
+
+
+def _chave_rollup_atual(obj):
+    return _chave_rollup(obj.created_at, obj.operator, obj.chip_type, obj.status or _STATUS_PADRAO)
+
+
+def _calcular_saldos(session):
+    por_status = Counter()
+    por_dia = Counter()
+    for obj in session.new:
+        if isinstance(obj, Activation):
+            # Preenche o default aqui para saber o dia do rollup antes do INSERT
+            if obj.created_at is None:
+                obj.created_at = datetime.utcnow()
+            por_status[obj.status or _STATUS_PADRAO] += 1
+            por_dia[_chave_rollup_atual(obj)] += 1
+    for obj in session.dirty:
+        if not isinstance(obj, Activation):
+            continue
+        estado = inspect(obj)
+        if not any(estado.attrs[campo].history.added for campo in _CAMPOS_ROLLUP):
+            continue
+        anterior = _chave_rollup_anterior(obj)
+        atual = _chave_rollup_atual(obj)
+        if anterior != atual:
+            por_dia[anterior] -= 1
+            por_dia[atual] += 1
+        if anterior[3] != atual[3]:
+            por_status[anterior[3]] -= 1
+            por_status[atual[3]] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Activation):
+            anterior = _chave_rollup_anterior(obj)
+            por_status[anterior[3]] -= 1
+            por_dia[anterior] -= 1
+    return (
+        {status: saldo for status, saldo in por_status.items() if status and saldo},
+        {chave: saldo for chave, saldo in por_dia.items() if chave[0] and saldo},
+    )
+
+
+def _upsert_saldo(connection, tabela, chave, valores, saldo, somar=True):
+    """Soma saldo ao total da linha (ou o substitui, com somar=False), criando-a se não existir"""
+    insert = pg_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(tabela).values(**valores, total=saldo, updated_at=datetime.utcnow())
+    total = tabela.c.total + stmt.excluded.total if somar else stmt.excluded.total
+    stmt = stmt.on_conflict_do_update(
+        index_elements=chave,
+        set_={'total': total, 'updated_at': stmt.excluded.updated_at}
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _registrar_saldos(session, flush_context, instances):
+    # Calculado antes do flush, enquanto as linhas excluídas ainda podem ser lidas
+    session.info['saldos_ativacoes'] = _calcular_saldos(session)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _aplicar_saldos(session, flush_context):
+    saldos = session.info.pop('saldos_ativacoes', None)
+    if not saldos or not any(saldos):
+        return
+    por_status, por_dia = saldos
+    connection = session.connection()
+    for status, saldo in por_status.items():
+        _upsert_saldo(connection, ActivationStatusCounter.__table__, ['status'], {'status': status}, saldo)
+    for (dia, operator, chip_type, status), saldo in por_dia.items():
+        _upsert_saldo(
+            connection, ActivationDailyRollup.__table__, ['dia', 'operator', 'chip_type', 'status'],
+            {'dia': dia, 'operator': operator, 'chip_type': chip_type, 'status': status}, saldo
+        )
+
+
+def reconciliar_contadores():
+    """Recalcula os contadores por status a partir de activations. Faz commit.
+
+    As linhas de contador são bloqueadas antes da contagem: saldos de
+    transações concorrentes esperam a reconciliação e são aplicados depois.
+    Se outro worker já está reconciliando, não faz nada.
+    """
+    if not bloquear_tarefa('reconciliar_contadores_ativacao'):
+        db.session.rollback()
+        return
+    contadores = ActivationStatusCounter.query.with_for_update().all()
+    reais = dict(db.session.query(Activation.status, func.count()).group_by(Activation.status).all())
+    agora = datetime.utcnow()
+    for contador in contadores:
+        contador.total = reais.pop(contador.status, 0)
+        contador.updated_at = agora
+    connection = db.session.connection()
+    # Status sem linha ainda: um listener concorrente pode criá-la antes deste INSERT
+    for status, total in reais.items():
+        _upsert_saldo(connection, ActivationStatusCounter.__table__, ['status'], {'status': status}, total, somar=False)
+    db.session.commit()
+
+
+def reconciliar_rollup(inicio=None):
+    """Recalcula o rollup diário a partir da data inicio (None = tudo). Faz commit.
+
+    Se outro worker já está reconciliando, não faz nada.
+    """
+    if not bloquear_tarefa('reconciliar_rollup_ativacao'):
+        db.session.rollback()
+        return
+    consulta_rollup = ActivationDailyRollup.query
+    dia_criacao = func.date(Activation.created_at)
+    consulta_real = db.session.query(
+        dia_criacao, cast(Activation.operator, String), cast(Activation.chip_type, String),
+        cast(Activation.status, String), func.count()
+    ).filter(Activation.created_at.isnot(None))
+    if inicio is not None:
+        consulta_rollup = consulta_rollup.filter(ActivationDailyRollup.dia >= inicio)
+        consulta_real = consulta_real.filter(Activation.created_at >= datetime.combine(inicio, datetime.min.time()))
+
+    linhas = consulta_rollup.with_for_update().all()
+    reais = {}
+    for dia, operator, chip_type, status, total in consulta_real.group_by(
+        dia_criacao, Activation.operator, Activation.chip_type, Activation.status
+    ).all():
+        # date() do SQLite devolve texto
+        dia = datetime.strptime(dia, '%Y-%m-%d').date() if isinstance(dia, str) else dia
+        reais[(dia, operator, chip_type, status)] = total
+
+    agora = datetime.utcnow()
+    for linha in linhas:
+        total = reais.pop((linha.dia, linha.operator, linha.chip_type, linha.status), 0)
+        if total:
+            linha.total = total
+            linha.updated_at = agora
+        else:
+            db.session.delete(linha)
+    db.session.flush()
+    connection = db.session.connection()
+    for (dia, operator, chip_type, status), total in reais.items():
+        _upsert_saldo(
+            connection, ActivationDailyRollup.__table__, ['dia', 'operator', 'chip_type', 'status'],
+            {'dia': dia, 'operator': operator, 'chip_type': chip_type, 'status': status}, total, somar=False
+        )
+    db.session.commit()
+
+
+def reconciliar_rollup_recente():
+    """Tarefa periódica: reconcilia só os últimos dias do rollup"""
+    dias = current_app.config.get('ACTIVATION_ROLLUP_RECONCILE_DAYS', DIAS_RECONCILIACAO_ROLLUP_PADRAO)
+    reconciliar_rollup(datetime.utcnow().date() - timedelta(days=dias))
+
+
+def contar_ativacoes_por_status():
+    """{status: quantidade} lido dos contadores materializados"""
+    return {
+        contador.status: contador.total
+        for contador in ActivationStatusCounter.query.all()
+        if contador.total
+    }
+
+
+def inicializar_agregados(app):
+    """Popula contadores e rollup na primeira execução (tabelas vazias)"""
+    with app.app_context():
+        try:
+            if ActivationStatusCounter.query.first() is None:
+                reconciliar_contadores()
+            if ActivationDailyRollup.query.first() is None:
+                reconciliar_rollup()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Erro ao inicializar agregados de ativações: {e}")
+
+
+registrar_tarefa(
+    'reconciliar_contadores_ativacao',
+    reconciliar_contadores,
+    'ACTIVATION_COUNTERS_RECONCILE_INTERVAL',
+    INTERVALO_RECONCILIACAO_PADRAO
+)
+registrar_tarefa(
+    'reconciliar_rollup_ativacao',
+    reconciliar_rollup_recente,
+    'ACTIVATION_ROLLUP_RECONCILE_INTERVAL',
+    INTERVALO_RECONCILIACAO_PADRAO
+)
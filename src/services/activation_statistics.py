@@ -0,0 +1,172 @@
+"""
+Séries temporais de ativações para os gráficos do painel administrativo.
+
+Agrupa Activation.created_at por dia, semana (segunda a domingo), mês,
+semestre ou ano numa única consulta GROUP BY, com a quebra por situação
+(aprovadas, pendentes, reprovadas), e completa com zeros os intervalos sem
+ativações. A chave de cada intervalo é um texto gerado no banco
+(strftime no SQLite, to_char/date_trunc no Postgres) e reproduzido em
+Python para o preenchimento.
+
+Semestres e anos são lidos do rollup diário (activation_daily_rollup), que
+tem no máximo uma linha por dia/operadora/tipo de chip/status, em vez de
+varrer anos de ativações.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Integer, String, case, cast, extract, func, literal
+
+from config.database import db
+from models.user import Activation, ActivationDailyRollup
+
+# Granularidades respondidas a partir do rollup diário
+GRANULARIDADES_ROLLUP = ('semestre', 'ano')
+
+# period da API -> granularidade
+GRANULARIDADES = {
+    'daily': 'dia',
+    'weekly': 'semana',
+    'monthly': 'mes',
+    'semiannual': 'semestre',
+    'annual': 'ano',
+}
+
+STATUS_APROVADOS = ('aprovado', 'pendente_confirmacao_qr', 'ativada')
+STATUS_REPROVADOS = ('reprovado', 'documentos_rejeitados')
+STATUS_PENDENTES = (
+    'pendente_contrato', 'pendente_documentos', 'pendente_dados_tecnicos',
+    'pendente_analise_documentos', 'em_analise'
+)
+
+MESES = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+
+def _chave_sql(coluna, granularidade, dialeto):
+    """Expressão SQL com a chave textual do intervalo de cada data"""
+    if dialeto == 'postgresql':
+        if granularidade == 'dia':
+            return func.to_char(coluna, 'YYYY-MM-DD')
+        if granularidade == 'semana':
+            return func.to_char(func.date_trunc('week', coluna), 'YYYY-MM-DD')
+        if granularidade == 'mes':
+            return func.to_char(coluna, 'YYYY-MM')
+        if granularidade == 'semestre':
+            semestre = (cast(extract('month', coluna), Integer) + 5) // 6
+            return func.to_char(coluna, 'YYYY', type_=String) + literal('-S') + cast(semestre, String)
+        return func.to_char(coluna, 'YYYY')
+
+    if granularidade == 'dia':
+        return func.strftime('%Y-%m-%d', coluna)
+    if granularidade == 'semana':
+        # Segunda-feira da semana: avança até domingo e volta 6 dias
+        return func.date(coluna, 'weekday 0', '-6 days')
+    if granularidade == 'mes':
+        return func.strftime('%Y-%m', coluna)
+    if granularidade == 'semestre':
+        semestre = (cast(func.strftime('%m', coluna), Integer) + 5) // 6
+        return func.strftime('%Y', coluna, type_=String) + literal('-S') + cast(semestre, String)
+    return func.strftime('%Y', coluna)
+
+
+def _chave(dia, granularidade):
+    """Mesma chave de _chave_sql, calculada em Python para uma data"""
+    if granularidade == 'dia':
+        return dia.strftime('%Y-%m-%d')
+    if granularidade == 'semana':
+        return (dia - timedelta(days=dia.weekday())).strftime('%Y-%m-%d')
+    if granularidade == 'mes':
+        return dia.strftime('%Y-%m')
+    if granularidade == 'semestre':
+        return f"{dia.year}-S{(dia.month + 5) // 6}"
+    return str(dia.year)
+
+
+def _rotulo(chave, granularidade):
+    if granularidade == 'dia':
+        return f"{chave[8:10]}/{chave[5:7]}"
+    if granularidade == 'semana':
+        return f"Sem {chave[8:10]}/{chave[5:7]}"
+    if granularidade == 'mes':
+        return f"{MESES[int(chave[5:7]) - 1]}/{chave[:4]}"
+    if granularidade == 'semestre':
+        return f"{chave[-1]}º Sem/{chave[:4]}"
+    return chave
+
+
+def _proximo(dia, granularidade):
+    """Primeiro dia do intervalo seguinte ao que contém dia"""
+    if granularidade == 'dia':
+        return dia + timedelta(days=1)
+    if granularidade == 'semana':
+        return dia - timedelta(days=dia.weekday()) + timedelta(days=7)
+    if granularidade == 'mes':
+        return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+    if granularidade == 'semestre':
+        return date(dia.year, 7, 1) if dia.month <= 6 else date(dia.year + 1, 1, 1)
+    return date(dia.year + 1, 1, 1)
+
+
+def chaves_do_intervalo(inicio, fim, granularidade):
+    """Chaves de todos os intervalos entre as datas inicio e fim (inclusive)"""
+    chaves = []
+    dia = inicio
+    while dia <= fim:
+        chaves.append(_chave(dia, granularidade))
+        dia = _proximo(dia, granularidade)
+    return chaves
+
+
+def _contagens_por_situacao(status, quantidade=1):
+    return (
+        func.sum(quantidade).label('total'),
+        func.sum(case((status.in_(STATUS_APROVADOS), quantidade), else_=0)).label('approved'),
+        func.sum(case((status.in_(STATUS_PENDENTES), quantidade), else_=0)).label('pending'),
+        func.sum(case((status.in_(STATUS_REPROVADOS), quantidade), else_=0)).label('rejected'),
+    )
+
+
+def serie_ativacoes(period, inicio, fim):
+    """Série de ativações criadas entre as datas inicio e fim (inclusive).
+
+    Retorna uma lista de {"period", "key", "total", "approved", "pending",
+    "rejected"}, um item por intervalo, inclusive os vazios.
+    """
+    granularidade = GRANULARIDADES.get(period, 'dia')
+    if granularidade in GRANULARIDADES_ROLLUP:
+        linhas = _agregar_rollup(granularidade, inicio, fim)
+    else:
+        linhas = _agregar_ativacoes(granularidade, inicio, fim)
+    return _preencher(linhas, inicio, fim, granularidade)
+
+
+def _agregar_ativacoes(granularidade, inicio, fim):
+    chave = _chave_sql(Activation.created_at, granularidade, db.engine.dialect.name).label('chave')
+    return db.session.query(chave, *_contagens_por_situacao(Activation.status)).filter(
+        Activation.created_at >= datetime.combine(inicio, datetime.min.time()),
+        Activation.created_at < datetime.combine(fim + timedelta(days=1), datetime.min.time())
+    ).group_by(chave).all()
+
+
+def _agregar_rollup(granularidade, inicio, fim):
+    rollup = ActivationDailyRollup
+    chave = _chave_sql(rollup.dia, granularidade, db.engine.dialect.name).label('chave')
+    return db.session.query(chave, *_contagens_por_situacao(rollup.status, rollup.total)).filter(
+        rollup.dia >= inicio,
+        rollup.dia <= fim
+    ).group_by(chave).all()
+
+
+def _preencher(linhas, inicio, fim, granularidade):
+    por_chave = {linha.chave: linha for linha in linhas}
+    serie = []
+    for chave in chaves_do_intervalo(inicio, fim, granularidade):
+        linha = por_chave.get(chave)
+        serie.append({
+            "period": _rotulo(chave, granularidade),
+            "key": chave,
+            "total": int(linha.total) if linha else 0,
+            "approved": int(linha.approved or 0) if linha else 0,
+            "pending": int(linha.pending or 0) if linha else 0,
+            "rejected": int(linha.rejected or 0) if linha else 0,
+        })
+    return serie
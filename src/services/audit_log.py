@@ -0,0 +1,129 @@
+"""
+Gravação dos logs de auditoria (admin_logs) fora da requisição.
+
+log_admin_action só enfileira a entrada em memória; uma thread daemon por
+processo grava a fila em lotes (um INSERT com várias linhas) quando junta
+AUDIT_LOG_BATCH_SIZE entradas ou a cada AUDIT_LOG_FLUSH_INTERVAL segundos,
+com conexão e transação próprias, sem commit extra na sessão da requisição.
+Ao encerrar o processo a fila é drenada (atexit).
+
+Com AUDIT_LOG_ASYNC desligado (testes, scripts) cada entrada é gravada na
+hora, também fora da sessão da requisição.
+"""
+import atexit
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app
+
+from config.database import db
+from models.user import AdminLog
+
+TAMANHO_LOTE_PADRAO = 100
+INTERVALO_GRAVACAO_PADRAO = 1.0  # segundos
+
+_fila = queue.Queue()
+_encerrar = object()
+_app = None
+_worker = None
+_lock = threading.Lock()
+
+
+def registrar_auditoria(user_id, action, resource_type=None, resource_id=None, details=None,
+                        ip_address=None, user_agent=None):
+    """Registra uma entrada de auditoria (enfileirada ou imediata, conforme a configuração)"""
+    if isinstance(user_id, str):
+        user_id = uuid.UUID(user_id)
+    entrada = {
+        'id': uuid.uuid4(),
+        'user_id': user_id,
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': str(resource_id) if resource_id is not None else None,
+        'details': details,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'created_at': datetime.utcnow(),
+    }
+    app = current_app._get_current_object()
+    if not app.config.get('AUDIT_LOG_ASYNC', True):
+        gravar([entrada])
+        return
+    _garantir_worker(app)
+    _fila.put(entrada)
+
+
+def gravar(entradas):
+    """Grava as entradas em uma transação própria (precisa de contexto da aplicação)"""
+    if not entradas:
+        return
+    with db.engine.begin() as conexao:
+        conexao.execute(AdminLog.__table__.insert(), entradas)
+
+
+def _garantir_worker(app):
+    global _app, _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _lock:
+        _app = app
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_loop_worker, name='audit-log-writer', daemon=True)
+            _worker.start()
+
+
+def _loop_worker():
+    app = _app
+    tamanho = app.config.get('AUDIT_LOG_BATCH_SIZE', TAMANHO_LOTE_PADRAO)
+    intervalo = app.config.get('AUDIT_LOG_FLUSH_INTERVAL', INTERVALO_GRAVACAO_PADRAO)
+    encerrar = False
+    while not encerrar:
+        lote = [_fila.get()]
+        if lote[0] is _encerrar:
+            break
+        # Junta mais entradas até completar o lote ou vencer o intervalo
+        limite = time.monotonic() + intervalo
+        while len(lote) < tamanho:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                entrada = _fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if entrada is _encerrar:
+                encerrar = True
+                break
+            lote.append(entrada)
+        _gravar_lote(app, lote)
+
+
+def _gravar_lote(app, lote):
+    with app.app_context():
+        try:
+            gravar(lote)
+        except Exception:
+            # Uma entrada inválida (ex.: usuário excluído) não derruba o lote inteiro
+            for entrada in lote:
+                try:
+                    gravar([entrada])
+                except Exception as e:
+                    print(f"Erro ao gravar log de auditoria ({entrada['action']}): {e}")
+
+
+def drenar(timeout=10):
+    """Grava tudo que está na fila e encerra o worker (chamado no encerramento)"""
+    global _worker
+    with _lock:
+        worker = _worker
+        if worker is None or not worker.is_alive():
+            return
+        _fila.put(_encerrar)
+        worker.join(timeout)
+        _worker = None
+
+
+atexit.register(drenar)
@@ -0,0 +1,315 @@
+"""
+Eventos em tempo real para o cliente (Server-Sent Events em /api/client/events).
+
+Cada conexão SSE assina uma fila em memória do seu usuário; os eventos são
+notificações novas ("notification") e mudanças de status de ativação
+("activation_status"), produzidos pela UnidadeDeTrabalho no commit das ações.
+Avisos em massa (notificar_em_massa) publicam um evento por faixa de
+usuários, sem a lista de destinatários: cada processo busca as notificações
+da faixa dos seus usuários conectados e as entrega como "notification".
+
+A entrega entre processos depende de CLIENT_EVENTS_BACKEND:
+
+- 'postgres' (padrão no PostgreSQL): os eventos saem por pg_notify na mesma
+  transação da ação (só são entregues se ela for confirmada) e uma thread
+  por processo escuta o canal (LISTEN) e repassa às filas locais;
+- 'memory' (padrão nos demais bancos): entrega direta após o commit, apenas
+  no próprio processo (servidor de desenvolvimento, um worker);
+- 'polling': uma thread por processo consulta notifications e
+  activation_history dos usuários conectados a cada
+  CLIENT_EVENTS_POLL_INTERVAL segundos (SQLite com vários workers).
+
+O EventSource do navegador não envia cabeçalhos, então o token vai na URL
+(?jwt=), onde acaba nos logs de acesso. Por isso a URL só aceita um token
+de eventos: curto (CLIENT_EVENTS_TOKEN_TTL segundos), obtido em
+POST /api/client/events/token e recusado nas demais rotas.
+
+Cada conexão ocupa uma thread do worker enquanto dura. Para não esgotar as
+threads da API, cada processo aceita até CLIENT_EVENTS_MAX_CONNECTIONS
+conexões e recusa as demais com 503 (o cliente volta a consultar
+/notifications/unread-count); para muitos clientes simultâneos o canal
+roda num pool próprio (serviço backend_events do docker-compose).
+"""
+import json
+import queue
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import text
+
+from config.database import db
+from models.user import Activation, ActivationHistory, Notification
+
+CANAL = 'client_events'
+BACKENDS = ('postgres', 'memory', 'polling')
+INTERVALO_POLLING_PADRAO = 2  # segundos
+TAMANHO_FILA = 100
+LIMITE_PAYLOAD_NOTIFY = 7900  # bytes (o PostgreSQL aceita até 8000)
+ESCOPO_TOKEN = 'events'  # claim scope dos tokens de eventos
+VALIDADE_TOKEN_PADRAO = 60  # segundos
+MAXIMO_CONEXOES_PADRAO = 16  # conexões SSE por processo
+ROTA_EVENTOS = 'client.client_events'
+# Janela revisitada pelo polling, para linhas confirmadas fora de ordem
+MARGEM_POLLING = timedelta(seconds=5)
+
+_assinantes = {}
+_conexoes = 0
+_lock = threading.Lock()
+_app = None
+_thread = None
+
+
+def backend(app=None):
+    app = app or current_app
+    configurado = app.config.get('CLIENT_EVENTS_BACKEND')
+    if configurado in BACKENDS:
+        return configurado
+    with app.app_context():
+        return 'postgres' if db.engine.dialect.name == 'postgresql' else 'memory'
+
+
+def token_permitido(jwt_data, endpoint):
+    """Tokens de eventos só valem para o canal SSE"""
+    return jwt_data.get('scope') != ESCOPO_TOKEN or endpoint == ROTA_EVENTOS
+
+
+def _chave(user_id):
+    # user_id chega como str com ou sem hífens, ou uuid.UUID
+    return str(user_id).replace('-', '').lower()
+
+
+def evento_notificacao(notification):
+    return {'user_id': str(notification.user_id), 'type': 'notification', 'data': notification.to_dict()}
+
+
+def evento_status(activation, previous_status, new_status):
+    return {
+        'user_id': str(activation.user_id),
+        'type': 'activation_status',
+        'data': {
+            'activation_id': str(activation.id),
+            'previous_status': previous_status,
+            'status': new_status,
+        },
+    }
+
+
+def evento_aviso(title, created_at, acima_de, ate):
+    """Aviso em massa gravado para os users.id em (acima_de, ate]; None = sem limite"""
+    return {
+        'type': 'broadcast',
+        'data': {
+            'title': title,
+            'created_at': created_at.isoformat(),
+            'after': str(acima_de) if acima_de is not None else None,
+            'until': str(ate) if ate is not None else None,
+        },
+    }
+
+
+def formatar_sse(tipo, dados):
+    """Mensagem no formato text/event-stream"""
+    return f"event: {tipo}\ndata: {json.dumps(dados, default=str)}\n\n"
+
+
+# Assinaturas (conexões SSE deste processo)
+
+def assinar(user_id, limite=None):
+    """Fila que recebe os eventos do usuário; libere com cancelar().
+
+    Retorna None se o processo já tem limite conexões abertas.
+    """
+    global _conexoes
+    fila = queue.Queue(maxsize=TAMANHO_FILA)
+    with _lock:
+        if limite is not None and _conexoes >= limite:
+            return None
+        _assinantes.setdefault(_chave(user_id), set()).add(fila)
+        _conexoes += 1
+    _garantir_thread(current_app._get_current_object())
+    return fila
+
+
+def cancelar(user_id, fila):
+    global _conexoes
+    with _lock:
+        filas = _assinantes.get(_chave(user_id))
+        if filas and fila in filas:
+            filas.discard(fila)
+            _conexoes -= 1
+            if not filas:
+                del _assinantes[_chave(user_id)]
+
+
+def _entregar(evento):
+    with _lock:
+        filas = list(_assinantes.get(_chave(evento['user_id']), ()))
+    for fila in filas:
+        try:
+            fila.put_nowait(evento)
+        except queue.Full:
+            # Conexão que não consome (cliente lento): descarta em vez de acumular
+            pass
+
+
+def _usuarios_conectados():
+    with _lock:
+        return list(_assinantes)
+
+
+def _entregar_aviso(evento):
+    # Requer app context: as notificações são lidas do banco
+    dados = evento['data']
+    acima_de = _chave(dados['after']) if dados.get('after') else None
+    ate = _chave(dados['until']) if dados.get('until') else None
+    # A chave hexadecimal ordena como o UUID
+    usuarios = [
+        usuario for usuario in _usuarios_conectados()
+        if (acima_de is None or usuario > acima_de) and (ate is None or usuario <= ate)
+    ]
+    if not usuarios:
+        return
+    notificacoes = Notification.query.filter(
+        Notification.user_id.in_(usuarios),
+        Notification.title == dados['title'],
+        Notification.created_at == datetime.fromisoformat(dados['created_at'])
+    ).all()
+    for notification in notificacoes:
+        _entregar(evento_notificacao(notification))
+
+
+def _despachar(evento):
+    if evento.get('type') == 'broadcast':
+        _entregar_aviso(evento)
+    else:
+        _entregar(evento)
+
+
+# Publicação (chamadas pela UnidadeDeTrabalho)
+
+def preparar_eventos(eventos):
+    """Antes do commit: no PostgreSQL, enfileira os eventos na transação"""
+    if not eventos or backend() != 'postgres':
+        return
+    for evento in eventos:
+        payload = json.dumps(evento)
+        if len(payload.encode()) > LIMITE_PAYLOAD_NOTIFY:
+            # Só o id: o cliente busca a notificação completa na API
+            payload = json.dumps({**evento, 'data': {'id': evento['data'].get('id')}})
+        db.session.execute(text('SELECT pg_notify(:canal, :payload)'), {'canal': CANAL, 'payload': payload})
+
+
+def publicar_eventos(eventos):
+    """Após o commit: entrega direta no modo 'memory'"""
+    if not eventos or backend() != 'memory':
+        return
+    for evento in eventos:
+        _despachar(evento)
+
+
+# Threads de entrega entre processos
+
+def _garantir_thread(app):
+    global _app, _thread
+    modo = backend(app)
+    if modo == 'memory':
+        return
+    with _lock:
+        _app = app
+        if _thread is None or not _thread.is_alive():
+            alvo = _loop_listen if modo == 'postgres' else _loop_polling
+            _thread = threading.Thread(target=alvo, name='client-events', daemon=True)
+            _thread.start()
+
+
+def _loop_listen():
+    app = _app
+    while True:
+        try:
+            with app.app_context():
+                conexao = db.engine.raw_connection()
+            try:
+                driver = conexao.driver_connection
+                driver.autocommit = True
+                driver.cursor().execute(f'LISTEN {CANAL}')
+                while True:
+                    if select.select([driver], [], [], 5) == ([], [], []):
+                        continue
+                    driver.poll()
+                    while driver.notifies:
+                        aviso = driver.notifies.pop(0)
+                        try:
+                            with app.app_context():
+                                try:
+                                    _despachar(json.loads(aviso.payload))
+                                finally:
+                                    db.session.remove()
+                        except (ValueError, KeyError):
+                            pass
+                        except Exception as e:
+                            print(f"Erro ao entregar evento de clientes: {e}")
+            finally:
+                conexao.invalidate()
+        except Exception as e:
+            print(f"Erro no canal de eventos ({CANAL}), reconectando: {e}")
+            time.sleep(5)
+
+
+def consultar_novos(usuarios, desde):
+    """Eventos de notificações e históricos dos usuários a partir de desde"""
+    if not usuarios:
+        return []
+    eventos = []
+    notificacoes = Notification.query.filter(
+        Notification.user_id.in_(usuarios),
+        Notification.created_at > desde
+    ).order_by(Notification.created_at).all()
+    for notification in notificacoes:
+        eventos.append((notification.created_at, notification.id, evento_notificacao(notification)))
+
+    ativacoes = db.session.query(Activation.id).filter(Activation.user_id.in_(usuarios))
+    historicos = db.session.query(ActivationHistory, Activation).join(
+        Activation, ActivationHistory.activation_id == Activation.id
+    ).filter(
+        ActivationHistory.activation_id.in_(ativacoes),
+        ActivationHistory.changed_at > desde,
+        ActivationHistory.previous_status != ActivationHistory.new_status
+    ).order_by(ActivationHistory.changed_at).all()
+    for historico, activation in historicos:
+        eventos.append((
+            historico.changed_at, historico.id,
+            evento_status(activation, historico.previous_status, historico.new_status)
+        ))
+    return sorted(eventos, key=lambda item: item[0])
+
+
+def _loop_polling():
+    app = _app
+    intervalo = app.config.get('CLIENT_EVENTS_POLL_INTERVAL', INTERVALO_POLLING_PADRAO)
+    marca = datetime.utcnow()
+    vistos = {}
+    while True:
+        time.sleep(intervalo)
+        usuarios = _usuarios_conectados()
+        if not usuarios:
+            marca = datetime.utcnow()
+            continue
+        with app.app_context():
+            try:
+                novos = consultar_novos(usuarios, marca - MARGEM_POLLING)
+            except Exception as e:
+                print(f"Erro ao consultar eventos de clientes: {e}")
+                continue
+            finally:
+                db.session.remove()
+        for momento, id, evento in novos:
+            if id in vistos:
+                continue
+            vistos[id] = momento
+            marca = max(marca, momento)
+            _entregar(evento)
+        limite = marca - MARGEM_POLLING
+        vistos = {id: momento for id, momento in vistos.items() if momento > limite}
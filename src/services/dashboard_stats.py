@@ -0,0 +1,42 @@
+"""
+Contadores do dashboard administrativo.
+
+Usado por /api/admin/dashboard e /api/admin/dashboard-stats. Ativações por
+status vêm dos contadores materializados (services/activation_counters.py);
+usuários, de um único GROUP BY.
+"""
+from sqlalchemy import func
+
+from config.database import db
+from models.user import User
+from services.activation_counters import contar_ativacoes_por_status
+
+
+def contar_usuarios():
+    """{(user_type, is_active): quantidade} em um único GROUP BY"""
+    linhas = db.session.query(User.user_type, User.is_active, func.count()) \
+        .group_by(User.user_type, User.is_active).all()
+    return {(user_type, bool(is_active) if is_active is not None else None): quantidade
+            for user_type, is_active, quantidade in linhas}
+
+
+def obter_estatisticas_dashboard():
+    """Indicadores do dashboard: uma leitura dos contadores e um GROUP BY em users"""
+    por_status = contar_ativacoes_por_status()
+    usuarios = contar_usuarios()
+
+    def total_usuarios(tipos, somente_ativos=False):
+        return sum(
+            quantidade for (user_type, is_active), quantidade in usuarios.items()
+            if user_type in tipos and (is_active is True or not somente_ativos)
+        )
+
+    return {
+        "total_users": total_usuarios(("cliente",)),
+        "total_activations": sum(por_status.values()),
+        "pending_activations": por_status.get("em_analise", 0),
+        "approved_activations": por_status.get("aprovado", 0),
+        "active_activations": por_status.get("ativada", 0),
+        "active_users": total_usuarios(("cliente",), somente_ativos=True),
+        "total_admins": total_usuarios(("admin", "super_admin")),
+    }
@@ -0,0 +1,135 @@
+"""
+Catálogo de DDDs em memória.
+
+A tabela ddds é pequena e muda raramente, então cada processo guarda uma
+cópia (frozenset de DDDs ativos por operadora) e só a recarrega quando a
+versão do catálogo muda. A versão é um contador em system_settings,
+incrementado na mesma transação de toda alteração em ddds; assim os outros
+workers percebem a mudança ao conferir o contador, o que é feito no máximo
+a cada DDD_CATALOG_CHECK_INTERVAL segundos.
+
+A mesma versão serve de ETag para as listagens de DDDs: um If-None-Match
+com a versão atual é respondido com 304 sem consulta nem serialização.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import Integer, String, cast, update
+
+from config.database import db
+from models.user import DDD, SystemSetting
+
+CHAVE_VERSAO = 'ddd_catalog_version'
+OPERADORAS = ('vivo', 'claro', 'tim')
+INTERVALO_VERIFICACAO_PADRAO = 2  # segundos
+
+_lock = threading.Lock()
+_catalogo = None
+_verificado_em = 0.0
+
+
+def _ler_versao():
+    valor = db.session.query(SystemSetting.value).filter(SystemSetting.key == CHAVE_VERSAO).scalar()
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _carregar(versao):
+    ddds = DDD.query.order_by(DDD.operator, DDD.ddd).all()
+    por_operadora = {}
+    for ddd in ddds:
+        if ddd.is_active:
+            por_operadora.setdefault(ddd.operator, set()).add(ddd.ddd)
+    return {
+        'versao': versao,
+        'por_operadora': {operadora: frozenset(valores) for operadora, valores in por_operadora.items()},
+        'registros': tuple(ddd.to_dict() for ddd in ddds),
+        # Corpos JSON já serializados por (operadora, somente_ativos)
+        'respostas': {},
+    }
+
+
+def obter_catalogo():
+    """Retorna o catálogo atual, recarregando-o se a versão mudou"""
+    global _catalogo, _verificado_em
+    intervalo = current_app.config.get('DDD_CATALOG_CHECK_INTERVAL', INTERVALO_VERIFICACAO_PADRAO)
+    catalogo = _catalogo
+    if catalogo is not None and time.monotonic() - _verificado_em < intervalo:
+        return catalogo
+
+    with _lock:
+        # A versão é lida antes dos DDDs: se mudar no meio, a próxima
+        # verificação encontra versão maior e recarrega
+        versao = _ler_versao()
+        if _catalogo is None or _catalogo['versao'] != versao:
+            _catalogo = _carregar(versao)
+        _verificado_em = time.monotonic()
+        return _catalogo
+
+
+def ddds_disponiveis(operadora):
+    """DDDs ativos da operadora (frozenset)"""
+    return obter_catalogo()['por_operadora'].get(operadora, frozenset())
+
+
+def ddd_disponivel(operadora, ddd):
+    return ddd in ddds_disponiveis(operadora)
+
+
+def resposta_catalogo(operadora=None, somente_ativos=False):
+    """Resposta {"ddds": [...]} com ETag da versão do catálogo.
+
+    operadora None lista todas. Responde 304 se o cliente já tem a versão.
+    """
+    catalogo = obter_catalogo()
+    etag = f"ddds-v{catalogo['versao']}"
+
+    if request.if_none_match.contains(etag):
+        resposta = current_app.response_class(status=304)
+    else:
+        chave = (operadora, somente_ativos)
+        corpo = catalogo['respostas'].get(chave)
+        if corpo is None:
+            ddds = [
+                registro for registro in catalogo['registros']
+                if (operadora is None or registro['operator'] == operadora)
+                and (registro['is_active'] or not somente_ativos)
+            ]
+            corpo = current_app.json.dumps({'ddds': ddds})
+            # Só operadoras conhecidas, para não crescer com valores arbitrários da URL
+            if operadora is None or operadora in OPERADORAS:
+                catalogo['respostas'][chave] = corpo
+        resposta = current_app.response_class(corpo, mimetype='application/json')
+
+    resposta.set_etag(etag)
+    # Dados por usuário autenticado: sem cache compartilhado, sempre revalidar
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+
+def invalidar_catalogo():
+    """Incrementa a versão do catálogo na transação corrente. Não faz commit.
+
+    Deve ser chamada antes do commit de qualquer alteração em ddds, para que
+    a nova versão só fique visível junto com os dados.
+    """
+    global _catalogo
+    resultado = db.session.execute(
+        update(SystemSetting)
+        .where(SystemSetting.key == CHAVE_VERSAO)
+        .values(value=cast(cast(SystemSetting.value, Integer) + 1, String), updated_at=datetime.utcnow())
+    )
+    if resultado.rowcount == 0:
+        db.session.add(SystemSetting(
+            id=uuid.uuid4(),
+            key=CHAVE_VERSAO,
+            value='1',
+            description='Versão do catálogo de DDDs (invalidação do cache entre processos)'
+        ))
+    with _lock:
+        _catalogo = None
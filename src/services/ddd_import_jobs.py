@@ -0,0 +1,197 @@
+"""
+Processamento assíncrono de importações de DDDs.
+
+O upload grava o arquivo em disco e cria um DDDImportJob 'pending'. Um único
+worker em thread daemon por processo reserva os jobs pela própria tabela
+(UPDATE condicional), processa a planilha em lotes com as mesmas funções do
+upload síncrono e publica o progresso a cada lote.
+"""
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from config.database import db
+from models.ddd_import import DDDImportJob
+from services.ddd_import_service import (
+    abrir_planilha, importar_lotes, publicar_importacao, descartar_importacao, sincronizar_catalogo
+)
+
+INTERVALO_POLLING_PADRAO = 5  # segundos
+TIMEOUT_JOB_PADRAO = 600  # segundos sem heartbeat antes de retomar um job
+
+_app = None
+_worker = None
+_acordar = threading.Event()
+_lock = threading.Lock()
+
+
+def _diretorio_jobs():
+    diretorio = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', 'ddd_imports')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def enfileirar_importacao(app, file, arquivo_origem, user_uuid=None):
+    """Salva o arquivo enviado e cria o job pendente. Faz commit."""
+    job_id = uuid.uuid4()
+    extensao = os.path.splitext(arquivo_origem)[1].lower()
+    file_path = os.path.join(_diretorio_jobs(), f'{job_id}{extensao}')
+    file.save(file_path)
+
+    job = DDDImportJob(
+        id=job_id,
+        status='pending',
+        arquivo_origem=arquivo_origem,
+        file_path=file_path,
+        created_by=user_uuid,
+        progress=0,
+        linhas_processadas=0
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    garantir_worker(app)
+    _acordar.set()
+    return job
+
+
+def iniciar_worker_importacoes(app):
+    """Na subida do servidor: retoma jobs pendentes ou interrompidos por um restart.
+
+    Segue PERIODIC_TASKS_ENABLED, como as demais tarefas em segundo plano.
+    """
+    if not app.config.get('PERIODIC_TASKS_ENABLED', False):
+        return
+    garantir_worker(app)
+
+
+def garantir_worker(app):
+    """Inicia o worker do processo, se ainda não estiver rodando"""
+    global _app, _worker
+    with _lock:
+        _app = app
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_loop_worker, name='ddd-import-worker', daemon=True)
+            _worker.start()
+        _acordar.set()
+
+
+def _loop_worker():
+    while True:
+        _acordar.clear()
+        app = _app
+        try:
+            with app.app_context():
+                while True:
+                    job_id = _reservar_proximo_job(app)
+                    if job_id is None:
+                        break
+                    processar_job(job_id)
+        except Exception as e:
+            print(f"Erro no worker de importação de DDDs: {e}")
+        _acordar.wait(app.config.get('DDD_IMPORT_POLL_INTERVAL', INTERVALO_POLLING_PADRAO))
+
+
+def _reservar_proximo_job(app):
+    """Reserva o próximo job pendente (ou abandonado) e devolve seu id.
+
+    A reserva é um UPDATE condicionado ao status lido, então apenas um
+    worker consegue assumir cada job mesmo com vários processos.
+    """
+    timeout = app.config.get('DDD_IMPORT_JOB_TIMEOUT', TIMEOUT_JOB_PADRAO)
+    limite = datetime.utcnow() - timedelta(seconds=timeout)
+
+    candidatos = DDDImportJob.query.filter(
+        db.or_(
+            DDDImportJob.status == 'pending',
+            db.and_(DDDImportJob.status == 'processing', DDDImportJob.updated_at < limite)
+        )
+    ).order_by(DDDImportJob.created_at).limit(10).all()
+
+    for job in candidatos:
+        agora = datetime.utcnow()
+        resultado = db.session.query(DDDImportJob).filter(
+            DDDImportJob.id == job.id,
+            DDDImportJob.status == job.status,
+            DDDImportJob.updated_at == job.updated_at
+        ).update({
+            'status': 'processing',
+            'started_at': agora,
+            'updated_at': agora,
+            'progress': 0,
+            'linhas_processadas': 0,
+            'error_message': None
+        }, synchronize_session=False)
+        db.session.commit()
+        if resultado == 1:
+            return job.id
+
+    db.session.rollback()
+    return None
+
+
+def processar_job(job_id):
+    """Executa a importação de um job já reservado.
+
+    As linhas são carregadas em ddd_imports_staging com o id do job e só
+    substituem ddd_imports no commit final, junto com a sincronização do
+    catálogo.
+    """
+    job = DDDImportJob.query.get(job_id)
+    importacao_id = str(job_id)
+
+    try:
+        with open(job.file_path, 'rb') as arquivo:
+            colunas, lotes, total_estimado = abrir_planilha(arquivo, job.file_path)
+            if len(colunas) < 4:
+                raise ValueError('Arquivo deve ter pelo menos 4 colunas')
+
+            job.total_linhas_estimadas = total_estimado
+            # Sobras de uma execução anterior interrompida deste mesmo job
+            descartar_importacao(importacao_id)
+
+            def publicar_progresso(estatisticas):
+                # Commit por lote: libera o progresso para as consultas de status
+                job.linhas_processadas = estatisticas['total_linhas']
+                if total_estimado:
+                    job.progress = min(99, int(estatisticas['total_linhas'] * 100 / total_estimado))
+                job.estatisticas = dict(estatisticas, rejeicoes=dict(estatisticas['rejeicoes']))
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+
+            estatisticas = importar_lotes(lotes, job.arquivo_origem, importacao_id, ao_concluir_lote=publicar_progresso)
+
+        if estatisticas['linhas_filtradas'] == 0:
+            raise ValueError('Nenhuma linha atendeu aos critérios de filtro')
+
+        publicar_importacao(importacao_id, job.created_at)
+        adicionados, removidos = sincronizar_catalogo(job.created_by)
+
+        job.estatisticas = dict(
+            estatisticas,
+            rejeicoes=dict(estatisticas['rejeicoes']),
+            catalogo_adicionados=adicionados,
+            catalogo_removidos=removidos
+        )
+        job.status = 'completed'
+        job.progress = 100
+        job.completed_at = datetime.utcnow()
+        job.updated_at = job.completed_at
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        descartar_importacao(importacao_id)
+        job = DDDImportJob.query.get(job_id)
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.completed_at = datetime.utcnow()
+        job.updated_at = job.completed_at
+        db.session.commit()
+
+    finally:
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
@@ -0,0 +1,594 @@
+"""
+Pipeline de importação de DDDs a partir de planilhas das operadoras.
+
+As etapas operam sobre o DataFrame inteiro (operações colunares do pandas)
+em vez de percorrer linha a linha com iterrows().
+"""
+import csv
+import hashlib
+import io
+import re
+import sys
+import unicodedata
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from flask import current_app
+from sqlalchemy import String, case, cast, delete, exists, func, insert, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config.database import db
+from models.ddd_import import DDDImport, DDDImportStaging
+from models.user import DDD, SystemSetting
+from services.ddd_catalog import invalidar_catalogo
+
+# Tipos de chip aceitos no upload (após remoção de acentos)
+TIPOS_CHIP_UPLOAD = ('vazia', 'vazio', 'smp')
+# Tipos de chip aceitos no preview
+TIPOS_CHIP_PREVIEW = ('vazia', 'smp')
+# Especificação exigida (apenas dígitos)
+ESPECIFICACAO_DIGITOS = '150'
+
+COLUNAS_FILTRADAS = ['ddd', 'operadora', 'tipo_chip', 'especificacao', 'linha_original', 'arquivo_origem']
+
+# Quantidade de hashes por consulta IN (SQLite limita o número de parâmetros)
+LOTE_HASHES_SQLITE = 900
+LOTE_HASHES_PADRAO = 5000
+
+# Linhas por lote na gravação em massa (sobrescrito por DDD_IMPORT_BATCH_SIZE)
+LOTE_INSERCAO_PADRAO = 1000
+
+# Linhas da planilha lidas por vez no upload (sobrescrito por DDD_IMPORT_CHUNK_SIZE)
+LOTE_LEITURA_PADRAO = 5000
+
+COLUNAS_INSERCAO = [
+    'ddd', 'operadora', 'tipo_chip', 'especificacao', 'linha_original',
+    'arquivo_origem', 'hash_linha', 'data_importacao'
+]
+
+# Colunas gravadas na área de carga (ddd_imports_staging)
+COLUNAS_CARGA = ['importacao_id'] + COLUNAS_INSERCAO
+CHAVE_CARGA = ['importacao_id', 'hash_linha']
+
+# Linha de system_settings que serializa as publicações em ddd_imports
+CHAVE_PUBLICACAO = 'ddd_import_publicada'
+
+
+def normalize_text(s):
+    s = unicodedata.normalize('NFKD', str(s))
+    s = ''.join(c for c in s if not unicodedata.combining(c))
+    return s.lower().strip()
+
+
+def rename_columns(df):
+    mapping = {}
+    for col in df.columns:
+        n = normalize_text(col)
+        if 'ddd' in n:
+            mapping[col] = 'ddd'
+        elif 'operad' in n or 'carrier' in n:
+            mapping[col] = 'operadora'
+        elif ('tipo' in n and 'chip' in n) or n == 'tipo':
+            mapping[col] = 'tipo_chip'
+        elif 'especifica' in n or 'gb' in n or 'plano' in n:
+            mapping[col] = 'especificacao'
+        elif 'linha' in n or 'numero' in n or 'telefone' in n:
+            mapping[col] = 'linha'
+    if mapping:
+        df = df.rename(columns=mapping)
+    return df
+
+
+def preparar_planilha_upload(df):
+    """Renomeia colunas e completa as ausentes com os padrões do upload"""
+    df = rename_columns(df)
+    # Se não houver coluna 'linha', criar a partir da coluna 'ddd'
+    if 'linha' not in df.columns and 'ddd' in df.columns:
+        df['linha'] = df['ddd']
+    if 'tipo_chip' not in df.columns:
+        df['tipo_chip'] = 'vazia'
+    if 'especificacao' not in df.columns:
+        df['especificacao'] = '150GB'
+    return df
+
+
+@lru_cache(maxsize=1)
+def _padrao_nao_digitos():
+    """Regex equivalente a "caractere para o qual str.isdigit() é falso".
+
+    O \\d do re não cobre dígitos sobrescritos e similares, que str.isdigit()
+    aceita, então a classe é montada uma única vez a partir do próprio Unicode.
+    """
+    digitos = ''.join(chr(c) for c in range(sys.maxunicode + 1) if chr(c).isdigit())
+    return '[^' + re.escape(digitos) + ']'
+
+
+def _coluna_texto(df, coluna, padrao=''):
+    """Equivalente colunar de str(row.get(coluna, padrao))"""
+    if coluna in df.columns:
+        return df[coluna].map(str)
+    return pd.Series(padrao, index=df.index, dtype=object)
+
+
+def _normalizar_unicos(serie, func):
+    """Aplica func uma vez por valor distinto (tipos de chip se repetem muito)"""
+    tabela = {valor: func(valor) for valor in serie.unique()}
+    return serie.map(tabela)
+
+
+def filtrar_ddds(df, arquivo_origem, tipos_validos=TIPOS_CHIP_UPLOAD, remover_acentos=True, validar_especificacao=True):
+    """Aplica os filtros de tipo de chip, especificação e linha em todo o DataFrame.
+
+    Retorna (DataFrame filtrado com COLUNAS_FILTRADAS, contadores de rejeição).
+    Os contadores seguem a mesma ordem de avaliação do filtro linha a linha:
+    uma linha rejeitada pelo tipo não é contada como especificação inválida.
+    """
+    if remover_acentos:
+        tipo_chip = _normalizar_unicos(_coluna_texto(df, 'tipo_chip'), normalize_text)
+    else:
+        tipo_chip = _normalizar_unicos(_coluna_texto(df, 'tipo_chip'), lambda v: v.strip().lower())
+    tipo_ok = tipo_chip.isin(tipos_validos).to_numpy(dtype=bool)
+
+    especificacao = _coluna_texto(df, 'especificacao').str.strip()
+    if validar_especificacao:
+        digitos_spec = especificacao.str.replace(r'[^0-9]', '', regex=True)
+        spec_ok = (digitos_spec == ESPECIFICACAO_DIGITOS).to_numpy(dtype=bool)
+    else:
+        spec_ok = np.ones(len(df), dtype=bool)
+
+    if 'linha' in df.columns:
+        linha = _coluna_texto(df, 'linha').str.strip()
+    else:
+        linha = _coluna_texto(df, 'ddd').str.strip()
+    digitos_linha = linha.str.replace(_padrao_nao_digitos(), '', regex=True)
+    linha_ok = (digitos_linha.str.len() >= 2).to_numpy(dtype=bool)
+
+    rejeicoes = {
+        "tipo_invalido": int((~tipo_ok).sum()),
+        "spec_invalida": int((tipo_ok & ~spec_ok).sum()),
+        "linha_invalida": int((tipo_ok & spec_ok & ~linha_ok).sum()),
+    }
+
+    aceitas = tipo_ok & spec_ok & linha_ok
+    filtradas = pd.DataFrame({
+        'ddd': digitos_linha[aceitas].str[:2],
+        'operadora': _coluna_texto(df, 'operadora')[aceitas].str.strip(),
+        'tipo_chip': tipo_chip[aceitas],
+        'especificacao': especificacao[aceitas],
+        'linha_original': linha[aceitas],
+        'arquivo_origem': arquivo_origem,
+    }, columns=COLUNAS_FILTRADAS)
+
+    return filtradas, rejeicoes
+
+
+def linhas_filtradas_para_dicts(filtradas):
+    """Converte o DataFrame filtrado na lista de dicionários usada pelas rotas"""
+    return [
+        {coluna: str(valor) for coluna, valor in registro.items()}
+        for registro in filtradas.to_dict('records')
+    ]
+
+
+def generate_hash(row):
+    """Gera hash única normalizando campos relevantes"""
+    linha_src = str(row.get('linha_original', row.get('linha', ''))).strip()
+    linha_digits = ''.join(ch for ch in linha_src if ch.isdigit())
+    operadora = str(row.get('operadora', '')).strip().lower()
+    tipo = str(row.get('tipo_chip', '')).strip().lower()
+    espec_raw = str(row.get('especificacao', '')).strip()
+    espec_digits = re.sub(r'[^0-9]', '', espec_raw)
+    ddd = str(row.get('ddd', '')).strip()
+    base = f"{ddd}_{operadora}_{tipo}_{espec_digits}_{linha_digits}"
+    return hashlib.sha256(base.encode()).hexdigest()
+
+
+def _tamanho_lote_hashes():
+    if db.engine.dialect.name == 'sqlite':
+        return LOTE_HASHES_SQLITE
+    return LOTE_HASHES_PADRAO
+
+
+def buscar_hashes_existentes(hashes, tamanho_lote=None, importacao_id=None):
+    """Retorna o subconjunto de hashes que já existe em ddd_imports.
+
+    Com importacao_id, a busca é feita nas linhas já carregadas por essa
+    importação em ddd_imports_staging. Em vez de um SELECT por linha,
+    consulta os hashes em lotes com IN (...).
+    """
+    hashes = list(set(hashes))
+    tamanho_lote = tamanho_lote or _tamanho_lote_hashes()
+    if importacao_id:
+        consulta = db.session.query(DDDImportStaging.hash_linha).filter(DDDImportStaging.importacao_id == importacao_id)
+        coluna = DDDImportStaging.hash_linha
+    else:
+        consulta = db.session.query(DDDImport.hash_linha)
+        coluna = DDDImport.hash_linha
+    existentes = set()
+    for inicio in range(0, len(hashes), tamanho_lote):
+        lote = hashes[inicio:inicio + tamanho_lote]
+        rows = consulta.filter(coluna.in_(lote)).all()
+        existentes.update(row[0] for row in rows)
+    return existentes
+
+
+def calcular_hashes(linhas):
+    """Retorna cópias das linhas com a chave 'hash_linha' preenchida"""
+    return [{**linha, 'hash_linha': generate_hash(linha)} for linha in linhas]
+
+
+def separar_duplicatas(linhas, importacao_id=None):
+    """Separa as linhas inéditas das duplicadas (no banco ou no próprio arquivo).
+
+    Retorna (linhas únicas com 'hash_linha', quantidade de duplicatas).
+    As linhas recebidas não são alteradas.
+    """
+    hashes = [generate_hash(linha) for linha in linhas]
+    existentes = buscar_hashes_existentes(hashes, importacao_id=importacao_id)
+
+    unicas = []
+    vistos = set()
+    duplicatas = 0
+    for linha, hash_linha in zip(linhas, hashes):
+        if hash_linha in existentes or hash_linha in vistos:
+            duplicatas += 1
+            continue
+        vistos.add(hash_linha)
+        unicas.append({**linha, 'hash_linha': hash_linha})
+    return unicas, duplicatas
+
+
+def _tamanho_lote_insercao():
+    return current_app.config.get('DDD_IMPORT_BATCH_SIZE', LOTE_INSERCAO_PADRAO)
+
+
+def _insert_ignorando_conflitos(tabela):
+    """INSERT ... ON CONFLICT (importacao_id, hash_linha) DO NOTHING para o dialeto atual"""
+    if db.engine.dialect.name == 'postgresql':
+        return pg_insert(tabela).on_conflict_do_nothing(index_elements=CHAVE_CARGA)
+    return sqlite_insert(tabela).on_conflict_do_nothing(index_elements=CHAVE_CARGA)
+
+
+def _inserir_em_lotes(tabela, registros, tamanho_lote, ignorar_conflitos):
+    stmt = _insert_ignorando_conflitos(tabela) if ignorar_conflitos else tabela.insert()
+    inseridos = 0
+    for inicio in range(0, len(registros), tamanho_lote):
+        result = db.session.execute(stmt, registros[inicio:inicio + tamanho_lote])
+        inseridos += result.rowcount
+    return inseridos
+
+
+def _copiar_postgres(tabela, registros, tamanho_lote, ignorar_conflitos):
+    """Carga via COPY FROM STDIN.
+
+    Com ignorar_conflitos, o COPY vai para uma tabela temporária e o
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING resolve as duplicatas no banco.
+    """
+    colunas = ', '.join(COLUNAS_CARGA)
+    destino = tabela.name
+    if ignorar_conflitos:
+        destino = f"{tabela.name}_copia"
+        db.session.execute(text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {destino} "
+            f"(LIKE {tabela.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+        ))
+        db.session.execute(text(f"TRUNCATE {destino}"))
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        copiados = 0
+        for inicio in range(0, len(registros), tamanho_lote):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for registro in registros[inicio:inicio + tamanho_lote]:
+                writer.writerow([registro[coluna] for coluna in COLUNAS_CARGA])
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {destino} ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+            copiados += cursor.rowcount
+    finally:
+        cursor.close()
+
+    if not ignorar_conflitos:
+        return copiados
+
+    result = db.session.execute(text(
+        f"INSERT INTO {tabela.name} ({colunas}) SELECT {colunas} FROM {destino} "
+        f"ON CONFLICT ({', '.join(CHAVE_CARGA)}) DO NOTHING"
+    ))
+    return result.rowcount
+
+
+def inserir_ddd_imports(linhas, importacao_id, tamanho_lote=None, ignorar_conflitos=False):
+    """Grava as linhas (já com 'hash_linha') na área de carga da importação.
+
+    Não passa pela unit of work do ORM: no PostgreSQL usa COPY FROM STDIN;
+    nos demais bancos, INSERTs executemany em lotes de tamanho_lote. Com
+    ignorar_conflitos, hashes repetidos na mesma importação são descartados
+    pelo banco (ON CONFLICT DO NOTHING). Não faz commit.
+    Retorna a quantidade de linhas efetivamente inseridas.
+    """
+    if not linhas:
+        return 0
+
+    tabela = DDDImportStaging.__table__
+    tamanho_lote = tamanho_lote or _tamanho_lote_insercao()
+    agora = datetime.utcnow()
+    registros = [
+        {
+            **{coluna: linha[coluna] for coluna in COLUNAS_INSERCAO if coluna != 'data_importacao'},
+            'importacao_id': importacao_id,
+            'data_importacao': agora
+        }
+        for linha in linhas
+    ]
+
+    if db.engine.dialect.name == 'postgresql':
+        return _copiar_postgres(tabela, registros, tamanho_lote, ignorar_conflitos)
+    return _inserir_em_lotes(tabela, registros, tamanho_lote, ignorar_conflitos)
+
+
+def _nomes_colunas(cabecalho):
+    """Reproduz os nomes de colunas que o pd.read_excel daria ao cabeçalho"""
+    cabecalho = list(cabecalho)
+    while cabecalho and cabecalho[-1] is None:
+        cabecalho.pop()
+    nomes = []
+    vistos = {}
+    for indice, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {indice}" if valor is None else valor
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _lotes_xlsx(workbook, linhas, colunas, tamanho_lote):
+    try:
+        lote = []
+        for valores in linhas:
+            if all(valor is None for valor in valores):
+                continue
+            valores = list(valores[:len(colunas)])
+            valores += [None] * (len(colunas) - len(valores))
+            lote.append([np.nan if valor is None else valor for valor in valores])
+            if len(lote) >= tamanho_lote:
+                yield pd.DataFrame(lote, columns=colunas, dtype=object)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=colunas, dtype=object)
+    finally:
+        workbook.close()
+
+
+def _lotes_dataframe(df, tamanho_lote):
+    for inicio in range(0, len(df), tamanho_lote):
+        yield df.iloc[inicio:inicio + tamanho_lote]
+
+
+def abrir_planilha(arquivo, nome_arquivo, tamanho_lote=None):
+    """Abre a planilha para leitura em lotes.
+
+    Retorna (nomes das colunas, gerador de DataFrames com até tamanho_lote
+    linhas, total de linhas estimado ou None). Arquivos .xlsx são lidos em modo read_only do openpyxl, então a
+    memória ocupada depende do tamanho do lote e não do tamanho do arquivo.
+    Arquivos .xls (não suportados pelo openpyxl) são lidos inteiros.
+    """
+    tamanho_lote = tamanho_lote or current_app.config.get('DDD_IMPORT_CHUNK_SIZE', LOTE_LEITURA_PADRAO)
+
+    if not nome_arquivo.lower().endswith('.xlsx'):
+        df = pd.read_excel(arquivo)
+        return list(df.columns), _lotes_dataframe(df, tamanho_lote), len(df)
+
+    workbook = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = workbook.worksheets[0]
+        # max_row vem da dimensão declarada no arquivo e pode não existir
+        total_estimado = planilha.max_row - 1 if planilha.max_row else None
+        linhas = planilha.iter_rows(values_only=True)
+        colunas = _nomes_colunas(next(linhas, ()))
+    except Exception:
+        workbook.close()
+        raise
+    return colunas, _lotes_xlsx(workbook, linhas, colunas, tamanho_lote), total_estimado
+
+
+def importar_lotes(lotes, arquivo_origem, importacao_id, ignorar_conflitos=False, ao_concluir_lote=None):
+    """Executa filtro -> hash -> gravação para cada lote da planilha.
+
+    As linhas vão para ddd_imports_staging sob importacao_id; ddd_imports só
+    muda em publicar_importacao. Cada lote é descartado depois de gravado,
+    então apenas um lote fica em memória por vez, e duplicatas entre lotes
+    são detectadas na área de carga. Não faz commit; ao_concluir_lote, se
+    informado, recebe as estatísticas acumuladas.
+    """
+    estatisticas = {
+        'total_linhas': 0,
+        'linhas_filtradas': 0,
+        'duplicatas_encontradas': 0,
+        'novos_registros': 0,
+        'rejeicoes': {"tipo_invalido": 0, "spec_invalida": 0, "linha_invalida": 0},
+    }
+
+    for lote in lotes:
+        df = preparar_planilha_upload(lote)
+        filtradas, rejeicoes = filtrar_ddds(df, arquivo_origem)
+        linhas_filtradas = linhas_filtradas_para_dicts(filtradas)
+
+        if ignorar_conflitos:
+            linhas_unicas = calcular_hashes(linhas_filtradas)
+        else:
+            linhas_unicas, duplicatas = separar_duplicatas(linhas_filtradas, importacao_id=importacao_id)
+
+        novos = inserir_ddd_imports(linhas_unicas, importacao_id, ignorar_conflitos=ignorar_conflitos)
+        if ignorar_conflitos:
+            duplicatas = len(linhas_filtradas) - novos
+
+        estatisticas['total_linhas'] += len(df)
+        estatisticas['linhas_filtradas'] += len(linhas_filtradas)
+        estatisticas['duplicatas_encontradas'] += duplicatas
+        estatisticas['novos_registros'] += novos
+        for motivo, quantidade in rejeicoes.items():
+            estatisticas['rejeicoes'][motivo] += quantidade
+
+        if ao_concluir_lote:
+            ao_concluir_lote(estatisticas)
+
+    return estatisticas
+
+
+def nova_importacao():
+    """Identificador de uma carga em ddd_imports_staging"""
+    return str(uuid.uuid4())
+
+
+def descartar_importacao(importacao_id):
+    """Remove as linhas carregadas por uma importação. Não faz commit."""
+    db.session.query(DDDImportStaging).filter(
+        DDDImportStaging.importacao_id == importacao_id
+    ).delete(synchronize_session=False)
+
+
+class ImportacaoDesatualizada(ValueError):
+    pass
+
+
+def _travar_publicacao():
+    """Trava a linha sentinela das publicações e retorna o início da importação publicada.
+
+    O INSERT ... DO NOTHING garante a linha (e, no SQLite, já toma o lock de
+    escrita); o SELECT ... FOR UPDATE serializa as publicações no PostgreSQL
+    até o fim da transação.
+    """
+    tabela = SystemSetting.__table__
+    stmt = pg_insert(tabela) if db.engine.dialect.name == 'postgresql' else sqlite_insert(tabela)
+    db.session.execute(stmt.values(
+        id=uuid.uuid4(),
+        key=CHAVE_PUBLICACAO,
+        value=None,
+        description='Início da importação de DDDs publicada (ordem das publicações)',
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    ).on_conflict_do_nothing(index_elements=['key']))
+    valor = db.session.execute(
+        select(tabela.c.value).where(tabela.c.key == CHAVE_PUBLICACAO).with_for_update()
+    ).scalar()
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def publicar_importacao(importacao_id, iniciada_em):
+    """Substitui o conteúdo de ddd_imports pelas linhas carregadas.
+
+    Troca e limpeza da área de carga acontecem na transação corrente, então
+    quem lê ddd_imports vê o conteúdo anterior até o commit. Não faz commit.
+    Publicações concorrentes são serializadas, e uma importação iniciada antes
+    da já publicada é recusada com ImportacaoDesatualizada.
+    Retorna a quantidade de linhas publicadas.
+    """
+    publicada_em = _travar_publicacao()
+    if publicada_em is not None and iniciada_em < publicada_em:
+        raise ImportacaoDesatualizada('Uma importação mais recente já foi publicada')
+    db.session.execute(
+        update(SystemSetting.__table__)
+        .where(SystemSetting.__table__.c.key == CHAVE_PUBLICACAO)
+        .values(value=iniciada_em.isoformat(), updated_at=datetime.utcnow())
+    )
+
+    staging = DDDImportStaging.__table__
+    db.session.execute(delete(DDDImport.__table__))
+    publicadas = db.session.execute(
+        insert(DDDImport.__table__).from_select(
+            COLUNAS_INSERCAO,
+            select(*[staging.c[coluna] for coluna in COLUNAS_INSERCAO])
+            .where(staging.c.importacao_id == importacao_id)
+            .order_by(staging.c.id)
+        )
+    ).rowcount
+    descartar_importacao(importacao_id)
+    return publicadas
+
+
+def _operadora_normalizada():
+    """Equivalente SQL de: vivo/claro/tim pelo prefixo da operadora, senão NULL"""
+    operadora = func.lower(func.trim(DDDImport.operadora))
+    return case(
+        (operadora.like('vivo%'), 'vivo'),
+        (operadora.like('claro%'), 'claro'),
+        (operadora.like('tim%'), 'tim'),
+        else_=None
+    )
+
+
+def _ddd_valido(ddd_value):
+    """Condição SQL para DDD com exatamente 2 dígitos"""
+    if db.engine.dialect.name == 'postgresql':
+        return ddd_value.op('~')('^[0-9]{2}$')
+    return ddd_value.op('GLOB')('[0-9][0-9]')
+
+
+def _novo_uuid():
+    if db.engine.dialect.name == 'postgresql':
+        return func.gen_random_uuid()
+    # UUID(as_uuid=True) fora do Postgres é gravado como 32 dígitos hexadecimais
+    return func.lower(func.hex(func.randomblob(16)))
+
+
+def sincronizar_catalogo(user_uuid=None, operator_filter=None):
+    """Ajusta o catálogo oficial (tabela ddds) ao conteúdo de ddd_imports.
+
+    Feito inteiramente no banco (DELETE ... WHERE NOT EXISTS e
+    INSERT ... SELECT DISTINCT), sem carregar as tabelas em memória. Se algo
+    mudou, incrementa a versão do catálogo em cache.
+    Retorna (quantidade adicionada, quantidade removida). Não faz commit.
+    """
+    ddds = DDD.__table__
+    operadora = _operadora_normalizada()
+    ddd_value = func.substr(func.trim(DDDImport.ddd), 1, 2)
+
+    condicoes_alvo = [operadora.isnot(None), _ddd_valido(ddd_value)]
+    if operator_filter:
+        condicoes_alvo.append(operadora == operator_filter)
+
+    alvo = select(operadora.label('operator'), ddd_value.label('ddd')) \
+        .where(*condicoes_alvo).distinct().subquery('alvo')
+
+    # Operador de ddds é enum no Postgres; compara como texto
+    operador_catalogo = cast(ddds.c.operator, String)
+
+    remocao = delete(ddds).where(
+        ~exists().where(alvo.c.operator == operador_catalogo, alvo.c.ddd == ddds.c.ddd)
+    )
+    if operator_filter:
+        remocao = remocao.where(operador_catalogo == operator_filter)
+    removidos = db.session.execute(remocao).rowcount
+
+    agora = datetime.utcnow()
+    novos = select(
+        _novo_uuid(),
+        cast(alvo.c.operator, ddds.c.operator.type),
+        alvo.c.ddd,
+        literal(True),
+        literal(user_uuid, ddds.c.created_by.type),
+        literal(agora, ddds.c.created_at.type),
+        literal(agora, ddds.c.updated_at.type)
+    ).where(
+        ~exists().where(operador_catalogo == alvo.c.operator, ddds.c.ddd == alvo.c.ddd)
+    )
+    adicionados = db.session.execute(
+        insert(ddds).from_select(
+            ['id', 'operator', 'ddd', 'is_active', 'created_by', 'created_at', 'updated_at'],
+            novos
+        )
+    ).rowcount
+
+    if adicionados or removidos:
+        invalidar_catalogo()
+
+    return adicionados, removidos
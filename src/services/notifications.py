@@ -0,0 +1,245 @@
+"""
+Notificações do cliente: leitura em lote e contador de não lidas.
+
+Marcar como lidas é um único UPDATE ... WHERE read_at IS NULL no banco, sem
+carregar as notificações na sessão; o retorno é a quantidade de linhas
+efetivamente alteradas (já lidas ou de outro usuário não contam).
+
+A quantidade de não lidas de cada usuário fica materializada em
+notification_unread_counters, para o badge do frontend não contar (nem
+carregar) o histórico a cada consulta. Como nos agregados de ativações
+(services/activation_counters.py), listeners da sessão aplicam na mesma
+transação o saldo de cada flush: notificação nova não lida +1, lida ou
+excluída -1. As operações em massa deste módulo aplicam o próprio saldo; as
+demais (query.delete, SQL direto) são corrigidas pela reconciliação
+periódica.
+
+Avisos em massa (ex.: instabilidade de uma operadora em um DDD) são
+gravados com INSERT ... SELECT a partir de users/activations, em faixas de
+ids de usuário com um commit por faixa, sem carregar usuários no Python.
+Cada faixa confirmada publica um evento no canal SSE (services/client_events.py).
+"""
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func, insert, inspect, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config.database import db
+from models.user import Activation, Notification, NotificationUnreadCounter, User
+from services.client_events import evento_aviso, preparar_eventos, publicar_eventos
+from services.periodic_tasks import bloquear_tarefa, registrar_tarefa
+
+MAXIMO_IDS_POR_LOTE = 500
+TAMANHO_FAIXA_AVISOS = 1000  # usuários por INSERT ... SELECT
+STATUS_AVISOS_PADRAO = ('ativada',)
+INTERVALO_RECONCILIACAO_PADRAO = 3600  # segundos
+
+
+def _lida_antes(obj):
+    historico = inspect(obj).attrs['read_at'].history
+    valores = historico.deleted or historico.unchanged
+    return (valores[0] if valores else obj.read_at) is not None
+
+
+def _calcular_saldos(session):
+    saldos = Counter()
+    for obj in session.new:
+        if isinstance(obj, Notification) and obj.read_at is None:
+            saldos[obj.user_id] += 1
+    for obj in session.dirty:
+        if not isinstance(obj, Notification) or not inspect(obj).attrs['read_at'].history.added:
+            continue
+        lida_antes, lida_agora = _lida_antes(obj), obj.read_at is not None
+        if lida_antes != lida_agora:
+            saldos[obj.user_id] += 1 if lida_antes else -1
+    for obj in session.deleted:
+        if isinstance(obj, Notification) and not _lida_antes(obj):
+            saldos[obj.user_id] -= 1
+    return {user_id: saldo for user_id, saldo in saldos.items() if user_id and saldo}
+
+
+def aplicar_saldo(connection, user_id, saldo, somar=True):
+    """Soma saldo ao contador do usuário (ou o substitui, com somar=False); cria a linha se não existir"""
+    if somar and not saldo:
+        return
+    tabela = NotificationUnreadCounter.__table__
+    insert = pg_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(tabela).values(user_id=user_id, total=saldo, updated_at=datetime.utcnow())
+    total = tabela.c.total + stmt.excluded.total if somar else stmt.excluded.total
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'total': total, 'updated_at': stmt.excluded.updated_at}
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _registrar_saldos(session, flush_context, instances):
+    session.info['saldos_notificacoes'] = _calcular_saldos(session)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _aplicar_saldos(session, flush_context):
+    saldos = session.info.pop('saldos_notificacoes', None)
+    if not saldos:
+        return
+    connection = session.connection()
+    for user_id, saldo in saldos.items():
+        aplicar_saldo(connection, user_id, saldo)
+
+
+def marcar_como_lidas(user_id, ids=None):
+    """Marca como lidas as notificações não lidas do usuário (todas, ou só ids).
+
+    Não faz commit; retorna o número de notificações alteradas.
+    """
+    consulta = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.read_at.is_(None)
+    )
+    if ids is not None:
+        if not ids:
+            return 0
+        consulta = consulta.filter(Notification.id.in_(ids))
+    atualizadas = consulta.update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    aplicar_saldo(db.session.connection(), user_id, -atualizadas)
+    return atualizadas
+
+
+def contar_nao_lidas(user_id):
+    """Quantidade de notificações não lidas do usuário, lida do contador"""
+    total = db.session.query(NotificationUnreadCounter.total).filter(
+        NotificationUnreadCounter.user_id == user_id
+    ).scalar()
+    return max(total or 0, 0)
+
+
+def remover_contador(user_id):
+    """Exclui o contador do usuário (antes de excluir o próprio usuário). Não faz commit."""
+    NotificationUnreadCounter.query.filter_by(user_id=user_id).delete()
+
+
+def _filtro_destinatarios(operator=None, ddd=None, statuses=STATUS_AVISOS_PADRAO):
+    """Condições sobre users: clientes ativos com ativação que corresponde aos filtros"""
+    ativacoes = select(Activation.user_id)
+    if operator:
+        ativacoes = ativacoes.where(Activation.operator == operator)
+    if ddd:
+        ativacoes = ativacoes.where(Activation.ddd == ddd)
+    if statuses:
+        ativacoes = ativacoes.where(Activation.status.in_(statuses))
+    return [User.user_type == 'cliente', User.is_active.is_(True), User.id.in_(ativacoes)]
+
+
+def _novo_id():
+    # Gerado no banco, uma linha por usuário do SELECT
+    if db.engine.dialect.name == 'postgresql':
+        return func.gen_random_uuid()
+    return func.lower(func.hex(func.randomblob(16)))
+
+
+def notificar_em_massa(title, message, operator=None, ddd=None, statuses=STATUS_AVISOS_PADRAO,
+                       tamanho_faixa=TAMANHO_FAIXA_AVISOS):
+    """Cria uma notificação de sistema para cada destinatário. Faz commit por faixa.
+
+    Retorna a quantidade de notificações criadas.
+    """
+    condicoes = _filtro_destinatarios(operator, ddd, statuses)
+    notificacoes = Notification.__table__
+    contadores = NotificationUnreadCounter.__table__
+    agora = datetime.utcnow()
+    insert_contador = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    total = 0
+    ultimo = None
+    while True:
+        faixa = list(condicoes)
+        if ultimo is not None:
+            faixa.append(User.id > ultimo)
+        # Último id da faixa: as faixas são contíguas em users.id
+        limite = db.session.execute(
+            select(User.id).where(*faixa).order_by(User.id).offset(tamanho_faixa - 1).limit(1)
+        ).scalar()
+        if limite is not None:
+            faixa.append(User.id <= limite)
+
+        inseridas = db.session.execute(
+            insert(notificacoes).from_select(
+                ['id', 'user_id', 'type', 'title', 'message', 'created_at'],
+                select(
+                    _novo_id(), User.id,
+                    literal('system', notificacoes.c.type.type),
+                    literal(title, notificacoes.c.title.type),
+                    literal(message, notificacoes.c.message.type),
+                    literal(agora, notificacoes.c.created_at.type)
+                ).where(*faixa)
+            )
+        ).rowcount
+        if inseridas:
+            # +1 no contador de não lidas de cada destinatário (sem passar pelo ORM)
+            stmt = insert_contador(contadores).from_select(
+                ['user_id', 'total', 'updated_at'],
+                select(User.id, literal(1), literal(agora, contadores.c.updated_at.type)).where(*faixa)
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id'],
+                set_={'total': contadores.c.total + stmt.excluded.total, 'updated_at': stmt.excluded.updated_at}
+            )
+            db.session.execute(stmt)
+        eventos = [evento_aviso(title, agora, ultimo, limite)] if inseridas else []
+        preparar_eventos(eventos)
+        db.session.commit()
+        publicar_eventos(eventos)
+        total += inseridas
+
+        if limite is None:
+            return total
+        ultimo = limite
+
+
+def reconciliar_contadores_notificacoes():
+    """Recalcula os contadores a partir de notifications. Faz commit.
+
+    Um worker por vez (bloquear_tarefa); os demais pulam a execução.
+    """
+    if not bloquear_tarefa('reconciliar_contadores_notificacoes'):
+        db.session.rollback()
+        return
+    contadores = NotificationUnreadCounter.query.with_for_update().all()
+    reais = dict(
+        db.session.query(Notification.user_id, func.count())
+        .filter(Notification.read_at.is_(None))
+        .group_by(Notification.user_id)
+        .all()
+    )
+    agora = datetime.utcnow()
+    for contador in contadores:
+        total = reais.pop(contador.user_id, 0)
+        if contador.total != total:
+            contador.total = total
+            contador.updated_at = agora
+    connection = db.session.connection()
+    # Usuário sem contador ainda: um listener concorrente pode criá-lo antes deste INSERT
+    for user_id, total in reais.items():
+        aplicar_saldo(connection, user_id, total, somar=False)
+    db.session.commit()
+
+
+def inicializar_contadores_notificacoes(app):
+    """Popula os contadores na primeira execução (tabela vazia)"""
+    with app.app_context():
+        try:
+            if NotificationUnreadCounter.query.first() is None:
+                reconciliar_contadores_notificacoes()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Erro ao inicializar contadores de notificações: {e}")
+
+
+registrar_tarefa(
+    'reconciliar_contadores_notificacoes',
+    reconciliar_contadores_notificacoes,
+    'NOTIFICATION_COUNTERS_RECONCILE_INTERVAL',
+    INTERVALO_RECONCILIACAO_PADRAO
+)
@@ -0,0 +1,130 @@
+"""
+Paginação por cursor (keyset) para as listagens do painel administrativo.
+
+Em vez de OFFSET, cada página continua a partir da última linha da anterior
+pela chave (created_at, id), em ordem decrescente, e o custo de uma página
+não depende da sua profundidade. Linhas sem created_at vêm depois de todas
+as outras, por id decrescente. O cursor é opaco para o cliente: base64 de
+um JSON com a chave da última linha entregue.
+
+O total é opcional (parâmetro total): 'none' (padrão, sem contagem),
+'approximate' (estimativa do planejador do PostgreSQL; COUNT nos demais
+bancos) ou 'exact' (COUNT(*)).
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Uuid, and_, or_, text
+
+from config.database import db
+
+MODOS_TOTAL = ('none', 'approximate', 'exact')
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(created_at, id):
+    dados = json.dumps({'c': created_at.isoformat() if created_at else None, 'i': str(id)})
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (created_at, id) do cursor, ou None para a primeira página.
+
+    created_at é None quando a última linha entregue não tinha data.
+    """
+    if not cursor:
+        return None
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(dados['c']) if dados['c'] is not None else None
+        return created_at, str(dados['i'])
+    except (ValueError, TypeError, KeyError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def _valor_id(modelo, id):
+    # Colunas UUID(as_uuid=True) só aceitam uuid.UUID como parâmetro
+    tipo = modelo.id.type
+    if isinstance(tipo, Uuid) and tipo.as_uuid:
+        try:
+            return uuid.UUID(id)
+        except ValueError:
+            raise CursorInvalido('Cursor inválido')
+    return id
+
+
+def paginar_por_cursor(query, modelo, cursor, limite, total='none'):
+    """Página de query a partir do cursor, ordenada por (created_at, id) desc.
+
+    Retorna (itens, paginacao), com paginacao = {"per_page", "next_cursor",
+    "has_next", "total"}. next_cursor é None na última página.
+    """
+    if total not in MODOS_TOTAL:
+        total = 'none'
+    chave = decodificar_cursor(cursor)
+
+    base = query.order_by(None)
+    created_at, id = chave if chave else (None, None)
+    if id is not None:
+        id = _valor_id(modelo, id)
+
+    # Uma linha a mais indica se existe próxima página, sem COUNT
+    itens = []
+    if chave is None or created_at is not None:
+        consulta = base.filter(modelo.created_at.isnot(None)).order_by(modelo.created_at.desc(), modelo.id.desc())
+        if chave:
+            consulta = consulta.filter(or_(
+                modelo.created_at < created_at,
+                and_(modelo.created_at == created_at, modelo.id < id)
+            ))
+        itens = consulta.limit(limite + 1).all()
+    if len(itens) <= limite:
+        # Página incompleta: continua pelas linhas sem created_at, em ordem de id
+        consulta = base.filter(modelo.created_at.is_(None)).order_by(modelo.id.desc())
+        if chave and created_at is None:
+            consulta = consulta.filter(modelo.id < id)
+        itens += consulta.limit(limite + 1 - len(itens)).all()
+    has_next = len(itens) > limite
+    itens = itens[:limite]
+    ultimo = itens[-1] if itens else None
+
+    return itens, {
+        'per_page': limite,
+        'next_cursor': codificar_cursor(ultimo.created_at, ultimo.id) if has_next else None,
+        'has_next': has_next,
+        'total': contar(query, modelo, total),
+    }
+
+
+def contar(query, modelo, modo='exact'):
+    """Total de linhas de query conforme o modo (None para 'none')"""
+    if modo == 'none':
+        return None
+    consulta = query.order_by(None)
+    if modo == 'approximate' and db.engine.dialect.name == 'postgresql':
+        return _estimar(consulta, modelo)
+    return consulta.count()
+
+
+def _estimar(consulta, modelo):
+    if consulta.whereclause is None:
+        # Tabela inteira: estatística mantida pelo ANALYZE/autovacuum
+        estimativa = db.session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:tabela AS regclass)"),
+            {'tabela': modelo.__tablename__}
+        ).scalar()
+        if estimativa is not None and estimativa >= 0:
+            return int(estimativa)
+    # Com filtros: linhas estimadas pelo planejador para a consulta
+    compilado = consulta.statement.compile(dialect=db.engine.dialect)
+    plano = db.session.connection().exec_driver_sql(
+        'EXPLAIN (FORMAT JSON) ' + compilado.string, compilado.params
+    ).scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]['Plan']['Plan Rows'])
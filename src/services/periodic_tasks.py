@@ -0,0 +1,73 @@
+"""
+Tarefas periódicas executadas em segundo plano.
+
+Uma única thread daemon por processo percorre as tarefas registradas e
+executa cada uma, dentro do app context, quando seu intervalo vence. A
+primeira execução acontece um intervalo depois da inicialização; tarefas
+que precisam rodar no boot devem ser chamadas diretamente no create_app.
+"""
+import threading
+import time
+
+from sqlalchemy import text
+
+from config.database import db
+
+_tarefas = {}
+_app = None
+_thread = None
+_lock = threading.Lock()
+
+
+def registrar_tarefa(nome, funcao, chave_intervalo, intervalo_padrao):
+    """Registra funcao para rodar a cada app.config[chave_intervalo] segundos"""
+    _tarefas[nome] = (funcao, chave_intervalo, intervalo_padrao)
+
+
+def bloquear_tarefa(nome):
+    """Lock exclusivo de nome até o fim da transação atual, entre processos.
+
+    No PostgreSQL é um advisory lock; retorna False se outro worker já o tem
+    (a execução deve ser pulada). Nos demais bancos retorna True: o SQLite
+    já serializa as escritas.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return True
+    return bool(db.session.execute(
+        text("SELECT pg_try_advisory_xact_lock(hashtext(:nome))"), {'nome': nome}
+    ).scalar())
+
+
+def iniciar_tarefas_periodicas(app):
+    """Inicia a thread de tarefas do processo (idempotente)"""
+    global _app, _thread
+    if not app.config.get('PERIODIC_TASKS_ENABLED', False):
+        return
+    with _lock:
+        _app = app
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name='periodic-tasks', daemon=True)
+            _thread.start()
+
+
+def _intervalo(app, chave, padrao):
+    return app.config.get(chave, padrao)
+
+
+def _loop():
+    inicio = time.monotonic()
+    ultima_execucao = {}
+    while True:
+        app = _app
+        agora = time.monotonic()
+        for nome, (funcao, chave, padrao) in list(_tarefas.items()):
+            if agora - ultima_execucao.get(nome, inicio) < _intervalo(app, chave, padrao):
+                continue
+            ultima_execucao[nome] = agora
+            with app.app_context():
+                try:
+                    funcao()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Erro na tarefa periódica {nome}: {e}")
+        time.sleep(1)
@@ -0,0 +1,326 @@
+"""
+Retenção e arquivamento de admin_logs e activation_history.
+
+Uma tarefa diária exporta os meses inteiros mais antigos que o período de
+retenção (ADMIN_LOGS_RETENTION_DAYS, ACTIVATION_HISTORY_RETENTION_DAYS) para
+arquivos JSONL compactados em ARCHIVE_FOLDER/<tabela>/<AAAA-MM>.jsonl.gz,
+cada linha no formato do to_dict() do modelo, e então remove essas linhas
+do banco. O arquivo é gravado em disco (fsync) antes da remoção.
+
+O arquivamento só roda com ARCHIVE_FOLDER definido, e a pasta precisa
+sobreviver a novos deploys (no docker-compose, o volume backend_archive):
+o histórico removido do banco só existe nela.
+
+No PostgreSQL as duas tabelas são particionadas por mês
+(migrations/partition_admin_logs_activation_history.sql): a inicialização
+e a tarefa criam as partições do mês atual e do próximo, e a tarefa remove
+um mês arquivado com DROP da partição, sem DELETE linha a linha. Sem partições
+(SQLite, bancos não migrados) a remoção é um DELETE pelo intervalo do mês.
+
+Os meses arquivados continuam consultáveis por consultar_arquivo (rota
+/api/admin/archive/<tabela>), que lê os arquivos sob demanda e para ao
+completar a página.
+"""
+import fcntl
+import glob
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import text
+
+from config.database import db
+from models.user import ActivationHistory, AdminLog
+from services.periodic_tasks import registrar_tarefa
+
+INTERVALO_RETENCAO_PADRAO = 86400  # segundos
+LINHAS_POR_LEITURA = 1000
+
+# tabela: (modelo, coluna de data, chave de configuração da retenção, dias padrão, filtros aceitos)
+TABELAS = {
+    'admin_logs': (
+        AdminLog, 'created_at', 'ADMIN_LOGS_RETENTION_DAYS', 180,
+        ('user_id', 'action', 'resource_type', 'resource_id')
+    ),
+    'activation_history': (
+        ActivationHistory, 'changed_at', 'ACTIVATION_HISTORY_RETENTION_DAYS', 730,
+        ('activation_id', 'changed_by', 'new_status')
+    ),
+}
+
+
+def _pasta(tabela=None):
+    pasta = current_app.config['ARCHIVE_FOLDER']
+    return os.path.join(pasta, tabela) if tabela else pasta
+
+
+def arquivamento_ativo():
+    return bool(current_app.config.get('ARCHIVE_FOLDER'))
+
+
+def _sincronizar(caminho):
+    # fsync de arquivo ou diretório
+    descritor = os.open(caminho, os.O_RDONLY)
+    try:
+        os.fsync(descritor)
+    finally:
+        os.close(descritor)
+
+
+def _inicio_mes(dia):
+    return datetime(dia.year, dia.month, 1)
+
+
+def _proximo_mes(inicio):
+    return datetime(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+
+
+def _particionada(tabela):
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :tabela"
+    ), {'tabela': tabela}).first() is not None
+
+
+def _nome_particao(tabela, inicio):
+    return f"{tabela}_{inicio:%Y%m}"
+
+
+def _criar_particao(tabela, inicio, fim):
+    nome = _nome_particao(tabela, inicio)
+    if db.session.execute(text("SELECT to_regclass(:nome)"), {'nome': nome}).scalar() is not None:
+        return
+    limites = f"FOR VALUES FROM ('{inicio:%Y-%m-%d}') TO ('{fim:%Y-%m-%d}')"
+    try:
+        db.session.execute(text(f"CREATE TABLE {nome} PARTITION OF {tabela} {limites}"))
+        db.session.commit()
+        return
+    except Exception:
+        # Linhas do mês já gravadas na partição default impedem o CREATE
+        db.session.rollback()
+    campo = TABELAS[tabela][1]
+    intervalo = f"{campo} >= '{inicio:%Y-%m-%d}' AND {campo} < '{fim:%Y-%m-%d}'"
+    # Move as linhas da default para a nova tabela e a anexa como partição, numa transação
+    db.session.execute(text(f"CREATE TABLE {nome} (LIKE {tabela} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.session.execute(text(f"INSERT INTO {nome} SELECT * FROM {tabela}_default WHERE {intervalo}"))
+    db.session.execute(text(f"DELETE FROM {tabela}_default WHERE {intervalo}"))
+    db.session.execute(text(f"ALTER TABLE {tabela} ATTACH PARTITION {nome} {limites}"))
+    db.session.commit()
+
+
+def garantir_particoes(meses=2):
+    """PostgreSQL: cria as partições mensais a partir do mês atual. Faz commit.
+
+    Roda na inicialização e na tarefa de retenção. Um mês cujas linhas já
+    caíram na partição default (servidor parado na virada) tem as linhas
+    movidas para a partição criada.
+    """
+    inicio = _inicio_mes(datetime.utcnow())
+    for tabela in TABELAS:
+        if not _particionada(tabela):
+            continue
+        mes = inicio
+        for _ in range(meses):
+            fim = _proximo_mes(mes)
+            try:
+                _criar_particao(tabela, mes, fim)
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️ Partição {_nome_particao(tabela, mes)} não criada: {e}")
+            mes = fim
+
+
+def inicializar_particoes(app):
+    """Garante as partições do mês atual e do próximo ao subir a aplicação"""
+    with app.app_context():
+        try:
+            garantir_particoes()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Erro ao criar partições de logs: {e}")
+
+
+def _arquivo_novo(tabela, inicio):
+    pasta = _pasta(tabela)
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"{inicio:%Y-%m}.jsonl.gz")
+    sequencia = 1
+    # Linhas que chegaram depois do arquivamento do mês vão para outro arquivo
+    while os.path.exists(caminho):
+        caminho = os.path.join(pasta, f"{inicio:%Y-%m}.{sequencia}.jsonl.gz")
+        sequencia += 1
+    return caminho
+
+
+def _exportar_mes(tabela, inicio, fim):
+    modelo, campo = TABELAS[tabela][:2]
+    coluna = getattr(modelo, campo)
+    consulta = modelo.query.filter(coluna >= inicio, coluna < fim).order_by(coluna)
+    caminho = _arquivo_novo(tabela, inicio)
+    temporario = caminho + '.tmp'
+    quantidade = 0
+    with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+        for registro in consulta.yield_per(LINHAS_POR_LEITURA):
+            arquivo.write(json.dumps(registro.to_dict(), ensure_ascii=False) + '\n')
+            quantidade += 1
+    if not quantidade:
+        os.remove(temporario)
+        return None, 0
+    # Em disco antes do DELETE/DROP: o mês só existe no arquivo depois do commit
+    _sincronizar(temporario)
+    os.replace(temporario, caminho)
+    _sincronizar(os.path.dirname(caminho))
+    return caminho, quantidade
+
+
+def _remover_mes(tabela, inicio, fim):
+    modelo, campo = TABELAS[tabela][:2]
+    coluna = getattr(modelo, campo)
+    if _particionada(tabela):
+        db.session.execute(text(f"DROP TABLE IF EXISTS {_nome_particao(tabela, inicio)}"))
+    # Linhas fora das partições mensais (partição default ou tabela comum)
+    modelo.query.filter(coluna >= inicio, coluna < fim).delete(synchronize_session=False)
+
+
+def arquivar_tabela(tabela, dias=None):
+    """Arquiva os meses anteriores ao período de retenção. Faz commit por mês.
+
+    Retorna a quantidade de linhas arquivadas (0 sem ARCHIVE_FOLDER).
+    """
+    modelo, campo, chave, padrao, _ = TABELAS[tabela]
+    dias = current_app.config.get(chave, padrao) if dias is None else dias
+    if dias <= 0 or not arquivamento_ativo():
+        return 0
+    coluna = getattr(modelo, campo)
+    # Só meses inteiros: o corte é o início do mês que contém o limite de retenção
+    corte = _inicio_mes(datetime.utcnow() - timedelta(days=dias))
+    mais_antiga = db.session.query(db.func.min(coluna)).filter(coluna < corte).scalar()
+    if mais_antiga is None:
+        return 0
+    if isinstance(mais_antiga, str):
+        mais_antiga = datetime.fromisoformat(mais_antiga)
+
+    total = 0
+    mes = _inicio_mes(mais_antiga)
+    while mes < corte:
+        fim = _proximo_mes(mes)
+        caminho, quantidade = _exportar_mes(tabela, mes, fim)
+        try:
+            _remover_mes(tabela, mes, fim)
+            db.session.commit()
+        except Exception:
+            # Sem remoção, sem arquivo: o mês é refeito na próxima execução
+            db.session.rollback()
+            if caminho:
+                os.remove(caminho)
+            raise
+        total += quantidade
+        mes = fim
+    return total
+
+
+def executar_retencao():
+    """Tarefa periódica: partições futuras e arquivamento das duas tabelas.
+
+    Um lock de arquivo na pasta do arquivo impede execuções simultâneas
+    pelos workers do mesmo servidor.
+    """
+    if not arquivamento_ativo():
+        garantir_particoes()
+        return
+    os.makedirs(_pasta(), exist_ok=True)
+    with open(os.path.join(_pasta(), '.lock'), 'w') as trava:
+        try:
+            fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        garantir_particoes()
+        for tabela in TABELAS:
+            arquivadas = arquivar_tabela(tabela)
+            if arquivadas:
+                print(f"📦 {arquivadas} linha(s) de {tabela} arquivada(s)")
+
+
+def listar_arquivos():
+    """Meses arquivados por tabela: [{table, month, files, size}]"""
+    meses = []
+    if not arquivamento_ativo():
+        return meses
+    for tabela in TABELAS:
+        por_mes = {}
+        for caminho in glob.glob(os.path.join(_pasta(tabela), '*.jsonl.gz')):
+            mes = os.path.basename(caminho)[:7]
+            item = por_mes.setdefault(mes, {'table': tabela, 'month': mes, 'files': 0, 'size': 0})
+            item['files'] += 1
+            item['size'] += os.path.getsize(caminho)
+        meses.extend(por_mes[mes] for mes in sorted(por_mes))
+    return meses
+
+
+def _ler_arquivo(caminho, campo):
+    with gzip.open(caminho, 'rt', encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            registro = json.loads(linha)
+            # No PostgreSQL o to_dict() grava a data com fuso (+00:00)
+            momento = interpretar_data(registro[campo])
+            if momento is not None:
+                yield momento, registro
+
+
+def percorrer_arquivo(tabela, inicio, fim, filtros=None):
+    """Registros arquivados de tabela com data em [inicio, fim), em ordem cronológica.
+
+    Os arquivos são lidos sob demanda, linha a linha: quem consome decide
+    quando parar. filtros: {campo: valor} com os campos aceitos pela tabela
+    (igualdade).
+    """
+    if not arquivamento_ativo():
+        return
+    campo, aceitos = TABELAS[tabela][1], TABELAS[tabela][4]
+    filtros = {chave: str(valor) for chave, valor in (filtros or {}).items() if chave in aceitos and valor}
+    mes = _inicio_mes(inicio)
+    while mes < fim:
+        caminhos = sorted(glob.glob(os.path.join(_pasta(tabela), f"{mes:%Y-%m}*.jsonl.gz")))
+        # Cada arquivo já está em ordem cronológica; o merge mantém a ordem no mês
+        linhas = heapq.merge(*(_ler_arquivo(caminho, campo) for caminho in caminhos), key=lambda item: item[0])
+        momento_anterior, ids = None, set()
+        for momento, registro in linhas:
+            if momento >= fim:
+                return
+            if momento < inicio:
+                continue
+            if any(registro.get(chave) != valor for chave, valor in filtros.items()):
+                continue
+            # Um mês refeito após falha pode aparecer em dois arquivos; as cópias têm a mesma data
+            if momento != momento_anterior:
+                momento_anterior, ids = momento, set()
+            if registro['id'] in ids:
+                continue
+            ids.add(registro['id'])
+            yield registro
+        mes = _proximo_mes(mes)
+
+
+def consultar_arquivo(tabela, inicio, fim, filtros=None, deslocamento=0, limite=None):
+    """Lista dos registros de percorrer_arquivo, a partir de deslocamento e até limite"""
+    fim_fatia = None if limite is None else deslocamento + limite
+    return list(islice(percorrer_arquivo(tabela, inicio, fim, filtros), deslocamento, fim_fatia))
+
+
+def interpretar_data(valor):
+    """AAAA-MM-DD (ou ISO completo) em datetime UTC sem fuso; None se inválido"""
+    try:
+        valor = datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+    if valor.tzinfo:
+        valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor
+
+
+registrar_tarefa('retencao_logs', executar_retencao, 'RETENTION_INTERVAL', INTERVALO_RETENCAO_PADRAO)
@@ -0,0 +1,84 @@
+"""
+Unidade de trabalho das ações sobre ativações.
+
+Uma ação (aprovar documento, enviar QR Code, mudar status...) altera a
+ativação e gera histórico, notificações ao cliente e log de auditoria. A
+UnidadeDeTrabalho só adiciona histórico e notificações à sessão e guarda as
+entradas de auditoria; commit() grava tudo numa única transação e só então
+envia a auditoria ao gravador em lote. Se algo falhar antes do commit, o
+rollback da rota descarta tudo junto, sem estado parcial.
+
+Notificações e mudanças de status também viram eventos para os clientes
+conectados em /api/client/events (ver services/client_events.py).
+"""
+from flask import has_request_context, request
+
+from config.database import db
+from models.user import ActivationHistory, Notification
+from services.audit_log import registrar_auditoria
+from services.client_events import evento_notificacao, evento_status, preparar_eventos, publicar_eventos
+
+
+class UnidadeDeTrabalho:
+
+    def __init__(self, user_id):
+        # Usuário que executa a ação (changed_by do histórico e autor da auditoria)
+        self.user_id = user_id
+        self._auditoria = []
+        self._notificacoes = []
+        self._mudancas = []
+
+    def historico(self, activation, previous_status, new_status, reason=None):
+        """Registra a mudança de status (a ativação pode ainda não ter id)"""
+        if previous_status != new_status:
+            self._mudancas.append((activation, previous_status, new_status))
+        db.session.add(ActivationHistory(
+            activation=activation,
+            previous_status=previous_status,
+            new_status=new_status,
+            changed_by=self.user_id,
+            change_reason=reason
+        ))
+
+    def notificacao(self, user_id, title, message, activation=None):
+        """Cria notificação de sistema para o usuário"""
+        notification = Notification(
+            user_id=user_id,
+            activation=activation,
+            type="system",
+            title=title,
+            message=message
+        )
+        db.session.add(notification)
+        self._notificacoes.append(notification)
+
+    def auditoria(self, action, resource_type=None, resource_id=None, details=None):
+        """Log administrativo, registrado somente após o commit"""
+        entrada = {
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'details': details,
+        }
+        if has_request_context():
+            entrada['ip_address'] = request.remote_addr
+            entrada['user_agent'] = request.headers.get("User-Agent")
+        self._auditoria.append(entrada)
+
+    def commit(self):
+        eventos = []
+        if self._notificacoes or self._mudancas:
+            # ids e defaults preenchidos antes de montar os eventos
+            db.session.flush()
+            eventos = [evento_status(*mudanca) for mudanca in self._mudancas]
+            eventos += [evento_notificacao(n) for n in self._notificacoes]
+            self._notificacoes, self._mudancas = [], []
+        preparar_eventos(eventos)
+        db.session.commit()
+        publicar_eventos(eventos)
+        entradas, self._auditoria = self._auditoria, []
+        for entrada in entradas:
+            try:
+                registrar_auditoria(self.user_id, **entrada)
+            except Exception as e:
+                print(f"Erro ao registrar log: {e}")
@@ -0,0 +1,144 @@
+"""
+Busca de usuários por nome, CPF e e-mail.
+
+PostgreSQL: ILIKE '%termo%' atendido pelos índices GIN de trigramas
+(pg_trgm, migrations/create_user_search_indexes.sql), com relevância pela
+maior similarity() entre as três colunas.
+
+SQLite: tabela FTS5 users_fts com tokenizador trigram, mantida por triggers
+em users (insert/update/delete) e criada na inicialização se não existir; a
+relevância é o bm25 do FTS5. users não tem rowid estável (o id é UUID, não
+INTEGER PRIMARY KEY), então users_fts_map dá a cada users.id um inteiro
+fixo, usado como rowid no FTS5: os triggers removem a linha antiga pelo
+rowid, sem varrer o índice. Termos com menos de 3 caracteres não formam
+trigramas e caem no LIKE comum, assim como bancos sem FTS5.
+"""
+from flask import current_app
+from sqlalchemy import column, func, literal_column, or_, select, table, text
+
+from config.database import db
+from models.user import User
+
+CHAVE_FTS = 'busca_usuarios_fts'
+TAMANHO_MINIMO_TRIGRAMA = 3
+
+_users_fts = table('users_fts', column('rowid'), column('rank'))
+_users_fts_map = table('users_fts_map', column('fts_rowid'), column('user_id'))
+
+_ROWID_NOVO = "(SELECT fts_rowid FROM users_fts_map WHERE user_id = new.id)"
+_ROWID_ANTIGO = "(SELECT fts_rowid FROM users_fts_map WHERE user_id = old.id)"
+
+DDL_SQLITE = (
+    "CREATE TABLE IF NOT EXISTS users_fts_map (fts_rowid INTEGER PRIMARY KEY, user_id TEXT NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(name, email, cpf, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts_map(user_id) VALUES (new.id);
+        INSERT INTO users_fts(rowid, name, email, cpf) VALUES ({_ROWID_NOVO}, new.name, new.email, new.cpf);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF id, name, email, cpf ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = {_ROWID_ANTIGO};
+        UPDATE users_fts_map SET user_id = new.id WHERE user_id = old.id;
+        INSERT INTO users_fts(rowid, name, email, cpf) VALUES ({_ROWID_NOVO}, new.name, new.email, new.cpf);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = {_ROWID_ANTIGO};
+        DELETE FROM users_fts_map WHERE user_id = old.id;
+    END""",
+)
+
+POPULAR_SQLITE = (
+    "INSERT INTO users_fts_map(user_id) SELECT id FROM users",
+    """INSERT INTO users_fts(rowid, name, email, cpf)
+        SELECT m.fts_rowid, u.name, u.email, u.cpf FROM users u JOIN users_fts_map m ON m.user_id = u.id""",
+)
+
+# Versões anteriores do índice (sem users_fts_map) são recriadas na inicialização
+REMOVER_FTS_SQLITE = (
+    "DROP TRIGGER IF EXISTS users_fts_insert",
+    "DROP TRIGGER IF EXISTS users_fts_update",
+    "DROP TRIGGER IF EXISTS users_fts_delete",
+    "DROP TABLE IF EXISTS users_fts",
+    "DROP TABLE IF EXISTS users_fts_map",
+)
+
+
+def inicializar_busca(app):
+    """Cria (e popula, se nova) a tabela FTS5 de usuários no SQLite"""
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return
+        try:
+            tabelas = {linha[0] for linha in db.session.execute(text(
+                "SELECT name FROM sqlite_master WHERE name IN ('users_fts', 'users_fts_map')"
+            ))}
+            atual = tabelas == {'users_fts', 'users_fts_map'}
+            if not atual:
+                for comando in REMOVER_FTS_SQLITE:
+                    db.session.execute(text(comando))
+            for comando in DDL_SQLITE:
+                db.session.execute(text(comando))
+            if not atual:
+                for comando in POPULAR_SQLITE:
+                    db.session.execute(text(comando))
+            db.session.commit()
+            app.extensions[CHAVE_FTS] = True
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Busca FTS5 de usuários indisponível, usando LIKE: {e}")
+
+
+def _usa_fts(termo):
+    return current_app.extensions.get(CHAVE_FTS, False) and len(termo) >= TAMANHO_MINIMO_TRIGRAMA
+
+
+def _consulta_fts(termo):
+    # Frase entre aspas: o termo inteiro como substring, sem sintaxe do FTS5
+    return '"' + termo.replace('"', '""') + '"'
+
+
+def _padrao_like(termo):
+    escapado = termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escapado}%'
+
+
+def filtro_usuarios(termo):
+    """Condição sobre User para os usuários que correspondem ao termo"""
+    termo = termo.strip()
+    if db.engine.dialect.name == 'sqlite' and _usa_fts(termo):
+        correspondentes = select(_users_fts_map.c.user_id).join(
+            _users_fts, _users_fts.c.rowid == _users_fts_map.c.fts_rowid
+        ).where(literal_column('users_fts').op('MATCH')(_consulta_fts(termo)))
+        return User.id.in_(correspondentes)
+
+    padrao = _padrao_like(termo)
+    return or_(
+        User.name.ilike(padrao, escape='\\'),
+        User.email.ilike(padrao, escape='\\'),
+        User.cpf.ilike(padrao, escape='\\')
+    )
+
+
+def relevancia_usuarios(termo):
+    """Expressão de ordenação (mais relevantes primeiro) para o termo"""
+    termo = termo.strip()
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        return func.greatest(
+            func.similarity(User.name, termo),
+            func.similarity(User.email, termo),
+            func.similarity(User.cpf, termo)
+        ).desc()
+    if dialeto == 'sqlite' and _usa_fts(termo):
+        # rank do FTS5 é o bm25: menor é mais relevante
+        return select(_users_fts.c.rank).select_from(
+            _users_fts.join(_users_fts_map, _users_fts_map.c.fts_rowid == _users_fts.c.rowid)
+        ).where(
+            _users_fts_map.c.user_id == User.id,
+            literal_column('users_fts').op('MATCH')(_consulta_fts(termo))
+        ).scalar_subquery().asc()
+    return User.name.asc()
+
+
+def buscar_usuarios(query, termo):
+    """Filtra uma consulta de User pelo termo, ordenando por relevância"""
+    return query.filter(filtro_usuarios(termo)).order_by(relevancia_usuarios(termo), User.name)
@@ -0,0 +1,59 @@
+"""
+Os testes rodam sobre uma cópia temporária do banco de desenvolvimento, com
+as migrações SQLite aplicadas; instance/federal_associados.db não é alterado.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(RAIZ)
+
+from run_sqlite_migrations import aplicar_migracoes  # noqa: E402
+
+_PASTA_BANCO = tempfile.mkdtemp(prefix="federal_testes_")
+BANCO_TESTES = os.path.join(_PASTA_BANCO, "federal_associados.db")
+shutil.copy(os.path.join(RAIZ, "instance", "federal_associados.db"), BANCO_TESTES)
+aplicar_migracoes(BANCO_TESTES, verbose=False)
+
+# Antes de qualquer import de app (que cria a aplicação no import)
+os.environ["SQLITE_DATABASE_PATH"] = BANCO_TESTES
+os.environ["PERIODIC_TASKS_ENABLED"] = "false"
+
+
+@pytest.fixture
+def banco_isolado(tmp_path, monkeypatch):
+    """Cópia do banco de testes só para o teste; create_app() chamado depois a usa"""
+    caminho = tmp_path / "federal_associados.db"
+    shutil.copy(BANCO_TESTES, caminho)
+    monkeypatch.setenv("SQLITE_DATABASE_PATH", str(caminho))
+    return caminho
+
+
+
+@pytest.fixture
+def limpar_logs_admin():
+    """Registra (app, ações) cujos admin_logs gravados durante o teste são removidos ao fim.
+
+    Use com AUDIT_LOG_ASYNC = False, para os logs já estarem no banco.
+    """
+    from config.database import db
+    from models.user import AdminLog
+
+    inicio = datetime.utcnow() - timedelta(seconds=1)
+    registrados = []
+    yield lambda app, *acoes: registrados.append((app, acoes))
+    for app, acoes in registrados:
+        with app.app_context():
+            AdminLog.query.filter(
+                AdminLog.action.in_(acoes), AdminLog.created_at >= inicio
+            ).delete(synchronize_session=False)
+            db.session.commit()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_PASTA_BANCO, ignore_errors=True)
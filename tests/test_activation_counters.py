@@ -0,0 +1,77 @@
+import os
+import sys
+import uuid
+from datetime import date, datetime
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from sqlalchemy import func
+
+from app import create_app
+from config.database import db
+from models.user import Activation, ActivationDailyRollup
+from services.activation_counters import contar_ativacoes_por_status
+
+
+def contagem_real():
+    return dict(db.session.query(Activation.status, func.count()).group_by(Activation.status).all())
+
+
+def test_contadores_acompanham_criacao_mudanca_e_exclusao():
+    app = create_app()
+    with app.app_context():
+        try:
+            assert contar_ativacoes_por_status() == contagem_real()
+
+            activation = Activation(user_id=uuid.uuid4(), operator="vivo", chip_type="esim", ddd="11")
+            db.session.add(activation)
+            db.session.flush()
+            assert contar_ativacoes_por_status() == contagem_real()
+
+            # Alteração após expirar o objeto (como depois de um commit)
+            db.session.expire(activation)
+            activation.status = "em_analise"
+            db.session.flush()
+            assert contar_ativacoes_por_status() == contagem_real()
+
+            db.session.expire(activation)
+            db.session.delete(activation)
+            db.session.flush()
+            assert contar_ativacoes_por_status() == contagem_real()
+        finally:
+            db.session.rollback()
+
+
+def rollup_do_dia(dia):
+    return {
+        (r.operator, r.chip_type, r.status): r.total
+        for r in ActivationDailyRollup.query.filter_by(dia=dia).all() if r.total
+    }
+
+
+def test_rollup_diario_acompanha_alteracoes_de_ativacoes():
+    app = create_app()
+    with app.app_context():
+        try:
+            dia = date(2002, 5, 10)
+            a = Activation(user_id=uuid.uuid4(), operator="vivo", chip_type="esim", ddd="11",
+                           created_at=datetime(2002, 5, 10, 13))
+            b = Activation(user_id=uuid.uuid4(), operator="tim", chip_type="fisico", ddd="21",
+                           created_at=datetime(2002, 5, 10, 15), status="em_analise")
+            db.session.add_all([a, b])
+            db.session.flush()
+            assert rollup_do_dia(dia) == {("vivo", "esim", "pendente_contrato"): 1, ("tim", "fisico", "em_analise"): 1}
+
+            db.session.expire(a)
+            a.status = "ativada"
+            a.operator = "claro"
+            db.session.flush()
+            assert rollup_do_dia(dia) == {("claro", "esim", "ativada"): 1, ("tim", "fisico", "em_analise"): 1}
+
+            db.session.expire(b)
+            db.session.delete(b)
+            db.session.flush()
+            assert rollup_do_dia(dia) == {("claro", "esim", "ativada"): 1}
+        finally:
+            db.session.rollback()
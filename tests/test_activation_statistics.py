@@ -0,0 +1,56 @@
+import os
+import sys
+import uuid
+from datetime import date, datetime
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from app import create_app
+from config.database import db
+from models.user import Activation
+from services.activation_statistics import serie_ativacoes
+
+
+def ativacao(criada_em, status):
+    return Activation(
+        user_id=uuid.uuid4(), operator="vivo", chip_type="esim", ddd="11",
+        status=status, created_at=criada_em
+    )
+
+
+def test_series_agrupam_por_intervalo_e_zeram_intervalos_vazios():
+    app = create_app()
+    with app.app_context():
+        try:
+            db.session.add_all([
+                ativacao(datetime(2001, 1, 1, 8), "ativada"),        # segunda-feira
+                ativacao(datetime(2001, 1, 7, 23, 59), "em_analise"),  # domingo, mesma semana
+                ativacao(datetime(2001, 1, 8, 0, 0), "reprovado"),
+                ativacao(datetime(2001, 3, 31, 12), "cancelado"),
+                ativacao(datetime(2001, 7, 1, 12), "aprovado"),
+            ])
+            db.session.flush()
+
+            diaria = serie_ativacoes("daily", date(2001, 1, 1), date(2001, 1, 8))
+            assert len(diaria) == 8
+            assert [d["total"] for d in diaria] == [1, 0, 0, 0, 0, 0, 1, 1]
+            assert diaria[0]["period"] == "01/01"
+
+            semanal = serie_ativacoes("weekly", date(2001, 1, 3), date(2001, 1, 20))
+            assert [d["key"] for d in semanal] == ["2001-01-01", "2001-01-08", "2001-01-15"]
+            assert semanal[0] == {"period": "Sem 01/01", "key": "2001-01-01", "total": 1,
+                                  "approved": 0, "pending": 1, "rejected": 0}
+            assert semanal[1]["rejected"] == 1
+
+            mensal = serie_ativacoes("monthly", date(2001, 1, 1), date(2001, 4, 30))
+            assert [d["total"] for d in mensal] == [3, 0, 1, 0]
+            assert mensal[0]["approved"] == 1 and mensal[0]["period"] == "Jan/2001"
+
+            semestral = serie_ativacoes("semiannual", date(2001, 1, 1), date(2001, 12, 31))
+            assert [(d["key"], d["total"]) for d in semestral] == [("2001-S1", 4), ("2001-S2", 1)]
+
+            anual = serie_ativacoes("annual", date(2000, 1, 1), date(2001, 12, 31))
+            assert [(d["key"], d["total"], d["approved"]) for d in anual] == [("2000", 0, 0), ("2001", 5, 2)]
+        finally:
+            db.session.rollback()
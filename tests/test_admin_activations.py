@@ -0,0 +1,85 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+
+from app import create_app
+from config.database import db
+from models.user import Activation
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def test_listagem_de_ativacoes_carrega_usuarios_no_join(limpar_logs_admin):
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    limpar_logs_admin(app, "ACTIVATIONS_LIST")
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+            engine = db.engine
+
+        consultas_users = []
+        consultas_join = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+                consultas_users.append(statement)
+            if "FROM activations LEFT OUTER JOIN users" in statement:
+                consultas_join.append(statement)
+
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            resp = client.get("/api/admin/activations?per_page=50", headers={"Authorization": f"Bearer {token}"})
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        activations = resp.get_json()["activations"]
+        assert activations
+        assert all(a["user"] and a["user"]["id"].replace("-", "") == a["user_id"].replace("-", "") for a in activations)
+        assert consultas_users == []
+        assert len(consultas_join) == 1
+
+
+def test_busca_de_ativacoes_filtra_pelo_usuario(limpar_logs_admin):
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    limpar_logs_admin(app, "ACTIVATIONS_LIST")
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+            activation = Activation.query.options(joinedload(Activation.user)).first()
+            assert activation.user is not None
+            email = activation.user.email
+            user_id = activation.user.id
+            db.session.rollback()
+
+        resp = client.get(f"/api/admin/activations?search={email}", headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        activations = resp.get_json()["activations"]
+        assert activations
+        assert all(a["user"]["id"] == user_id for a in activations)
+
+        resp = client.get("/api/admin/activations?search=nao-existe@example.invalid", headers={"Authorization": f"Bearer {token}"})
+        assert resp.get_json()["activations"] == []
+
+
+def test_guid_com_texto_invalido_nao_encontra_registros():
+    from sqlalchemy.dialects import postgresql
+
+    from models.types import GUID
+    from models.user import User
+
+    assert GUID().process_bind_param("nao-e-um-uuid", postgresql.dialect()) is None
+    assert GUID().process_bind_param(ADMIN_ID.replace("-", ""), postgresql.dialect()) == ADMIN_ID
+
+    app = create_app()
+    with app.app_context():
+        assert User.query.filter_by(id="nao-e-um-uuid").first() is None
+        assert User.query.filter_by(id=ADMIN_ID).first() is not None
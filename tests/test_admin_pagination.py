@@ -0,0 +1,92 @@
+import os
+import sys
+import uuid
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config.database import db
+from models.user import AdminLog
+from services.pagination import paginar_por_cursor
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def test_logs_por_cursor_percorrem_todas_as_linhas_sem_repetir(limpar_logs_admin):
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    limpar_logs_admin(app, "LOGS_VIEW")
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+            esperados = [str(log.id) for log in AdminLog.query.order_by(AdminLog.created_at.desc(), AdminLog.id.desc()).all()]
+            db.session.rollback()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        resp = client.get("/api/admin/logs?cursor=&per_page=300&total=exact", headers=headers)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        pagination = resp.get_json()["pagination"]
+        # A própria listagem registra um log, que entra na contagem
+        assert pagination["total"] >= len(esperados)
+
+        vistos = []
+        cursor = ""
+        while True:
+            resp = client.get(f"/api/admin/logs?cursor={cursor}&per_page=300", headers=headers)
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+            dados = resp.get_json()
+            assert dados["pagination"]["total"] is None
+            vistos.extend(log["id"] for log in dados["logs"])
+            cursor = dados["pagination"]["next_cursor"]
+            if not cursor:
+                assert dados["pagination"]["has_next"] is False
+                break
+
+        assert len(vistos) == len(set(vistos))
+        # Logs gravados durante o teste ficam antes do primeiro cursor
+        assert [i for i in vistos if i in set(esperados)] == esperados
+
+
+def test_cursor_invalido_retorna_400(limpar_logs_admin):
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    limpar_logs_admin(app, "ACTIVATIONS_LIST")
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+
+        resp = client.get("/api/admin/activations?cursor=nao-e-um-cursor", headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == 400
+
+
+def test_linhas_sem_created_at_vem_por_ultimo_sem_quebrar_o_cursor():
+    app = create_app()
+    acao = "PAGINACAO_SEM_DATA"
+    with app.app_context():
+        logs = [AdminLog(user_id=uuid.UUID(ADMIN_ID), action=acao, details=f"Teste {i}") for i in range(5)]
+        db.session.add_all(logs)
+        db.session.commit()
+        ids = [log.id for log in logs]
+        # Duas linhas legadas sem data
+        AdminLog.query.filter(AdminLog.id.in_(ids[:2])).update({AdminLog.created_at: None}, synchronize_session=False)
+        db.session.commit()
+        try:
+            consulta = AdminLog.query.filter_by(action=acao)
+            vistos = []
+            cursor = None
+            while True:
+                itens, pagination = paginar_por_cursor(consulta, AdminLog, cursor, 2)
+                vistos.extend(item.id for item in itens)
+                cursor = pagination["next_cursor"]
+                if not cursor:
+                    break
+
+            sem_data = sorted(ids[:2], key=str, reverse=True)
+            assert sorted(vistos, key=str) == sorted(ids, key=str)
+            assert vistos[-2:] == sem_data
+        finally:
+            AdminLog.query.filter_by(action=acao).delete()
+            db.session.commit()
@@ -0,0 +1,67 @@
+import os
+import sys
+import uuid
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from sqlalchemy import event
+
+from app import create_app
+from config.database import db
+from models.user import AdminLog
+from services import audit_log
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def _remover(marcador):
+    AdminLog.query.filter(AdminLog.details == marcador).delete()
+    db.session.commit()
+
+
+def test_logs_enfileirados_sao_gravados_em_lotes():
+    app = create_app()
+    # Worker iniciado por testes anteriores usa a configuração da app antiga
+    audit_log.drenar()
+    app.config.update(AUDIT_LOG_ASYNC=True, AUDIT_LOG_BATCH_SIZE=50, AUDIT_LOG_FLUSH_INTERVAL=5)
+    marcador = f"teste-auditoria-{uuid.uuid4()}"
+
+    with app.test_request_context():
+        inserts = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO admin_logs"):
+                inserts.append(executemany)
+
+        event.listen(db.engine, "before_cursor_execute", registrar)
+        try:
+            for _ in range(120):
+                audit_log.registrar_auditoria(ADMIN_ID, "TESTE_AUDITORIA", details=marcador)
+            # Nada é gravado na sessão da requisição
+            assert not db.session.new
+            audit_log.drenar()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", registrar)
+
+        try:
+            assert AdminLog.query.filter(AdminLog.details == marcador).count() == 120
+            # 50 + 50 + 20 (o restante gravado na drenagem)
+            assert len(inserts) == 3
+            assert all(inserts)
+        finally:
+            _remover(marcador)
+
+
+def test_modo_sincrono_grava_imediatamente():
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    marcador = f"teste-auditoria-{uuid.uuid4()}"
+
+    with app.test_request_context():
+        try:
+            audit_log.registrar_auditoria(ADMIN_ID, "TESTE_AUDITORIA", resource_id=uuid.uuid4(), details=marcador)
+            log = AdminLog.query.filter(AdminLog.details == marcador).one()
+            assert str(log.user_id) == ADMIN_ID
+        finally:
+            _remover(marcador)
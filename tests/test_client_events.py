@@ -0,0 +1,136 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+import json
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config.database import db
+from models.user import Activation, ActivationHistory, AdminLog, Notification, User
+from services.client_events import consultar_novos
+from services.unit_of_work import UnidadeDeTrabalho
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def _criar_ativacao(user_id):
+    activation = Activation(user_id=user_id, operator="vivo", chip_type="esim", ddd="11", status="em_analise")
+    db.session.add(activation)
+    db.session.commit()
+    return activation.id
+
+
+def _remover_ativacao(activation_id):
+    db.session.rollback()
+    ActivationHistory.query.filter_by(activation_id=activation_id).delete()
+    for notificacao in Notification.query.filter_by(activation_id=activation_id).all():
+        db.session.delete(notificacao)
+    AdminLog.query.filter_by(resource_id=str(activation_id)).delete()
+    db.session.delete(Activation.query.get(activation_id))
+    db.session.commit()
+
+
+def _mudar_status(activation_id, novo_status):
+    activation = Activation.query.get(activation_id)
+    uow = UnidadeDeTrabalho(ADMIN_ID)
+    anterior, activation.status = activation.status, novo_status
+    uow.historico(activation, anterior, novo_status)
+    uow.notificacao(activation.user_id, "Status atualizado", f"Novo status: {novo_status}", activation)
+    uow.commit()
+
+
+def _ler_evento(corpo):
+    linhas = dict(linha.split(": ", 1) for linha in corpo.strip().split("\n"))
+    return linhas["event"], json.loads(linhas["data"])
+
+
+def test_sse_entrega_notificacao_e_status():
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    app.config["CLIENT_EVENTS_BACKEND"] = "memory"
+    with app.app_context():
+        user_id = User.query.filter_by(user_type="cliente").first().id
+        token = create_access_token(identity=user_id, additional_claims={"user_type": "cliente"})
+        activation_id = _criar_ativacao(user_id)
+    try:
+        with app.test_client() as client:
+            # Access token comum não vale na URL; o de eventos não vale fora do canal
+            resp = client.get(f"/api/client/events?jwt={token}")
+            assert resp.status_code == 401
+            resp = client.post("/api/client/events/token", headers={"Authorization": f"Bearer {token}"})
+            assert resp.status_code == 200
+            token_eventos = resp.get_json()["token"]
+            resp = client.get("/api/client/notifications", headers={"Authorization": f"Bearer {token_eventos}"})
+            assert resp.status_code == 400
+
+            # Token de eventos na query string, como o EventSource do navegador envia
+            resp = client.get(f"/api/client/events?jwt={token_eventos}", buffered=False)
+            assert resp.status_code == 200
+            assert resp.mimetype == "text/event-stream"
+            corpo = iter(resp.response)
+            assert next(corpo).startswith(b"retry:")
+            evento, dados = _ler_evento(next(corpo).decode())
+            assert evento == "unread_count"
+
+            with app.test_request_context():
+                _mudar_status(activation_id, "aprovado")
+
+            evento, dados = _ler_evento(next(corpo).decode())
+            assert evento == "activation_status"
+            assert (dados["activation_id"], dados["status"]) == (str(activation_id), "aprovado")
+            evento, dados = _ler_evento(next(corpo).decode())
+            assert evento == "notification"
+            assert dados["title"] == "Status atualizado"
+            resp.close()
+
+            sem_token = client.get("/api/client/events")
+            assert sem_token.status_code == 401
+    finally:
+        with app.app_context():
+            _remover_ativacao(activation_id)
+
+
+def test_polling_encontra_notificacoes_e_mudancas_de_status():
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    with app.app_context():
+        user_id = User.query.filter_by(user_type="cliente").first().id
+        activation_id = _criar_ativacao(user_id)
+    try:
+        with app.test_request_context():
+            desde = datetime.utcnow() - timedelta(seconds=1)
+            _mudar_status(activation_id, "reprovado")
+            eventos = consultar_novos([user_id.replace("-", "")], desde)
+            tipos = [evento["type"] for _, _, evento in eventos]
+            assert tipos.count("activation_status") == 1
+            assert tipos.count("notification") == 1
+            assert consultar_novos([user_id], datetime.utcnow() + timedelta(seconds=1)) == []
+    finally:
+        with app.app_context():
+            _remover_ativacao(activation_id)
+
+
+def test_conexoes_acima_do_limite_recebem_503():
+    app = create_app()
+    app.config["CLIENT_EVENTS_BACKEND"] = "memory"
+    app.config["CLIENT_EVENTS_MAX_CONNECTIONS"] = 1
+    with app.app_context():
+        user_id = User.query.filter_by(user_type="cliente").first().id
+        token = create_access_token(identity=user_id, additional_claims={"user_type": "cliente"})
+    headers = {"Authorization": f"Bearer {token}"}
+    with app.test_client() as client:
+        primeira = client.get("/api/client/events", headers=headers, buffered=False)
+        assert primeira.status_code == 200
+        segunda = client.get("/api/client/events", headers=headers)
+        assert segunda.status_code == 503
+        assert segunda.headers["Retry-After"]
+        # Fechar a conexão libera a vaga, mesmo sem o stream ter sido lido
+        primeira.close()
+        terceira = client.get("/api/client/events", headers=headers, buffered=False)
+        assert terceira.status_code == 200
+        terceira.close()
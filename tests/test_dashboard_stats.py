@@ -0,0 +1,24 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from app import create_app
+from models.user import User, Activation
+from services.dashboard_stats import obter_estatisticas_dashboard
+
+
+def test_estatisticas_agrupadas_batem_com_contagens_individuais():
+    app = create_app()
+    with app.app_context():
+        esperado = {
+            "total_users": User.query.filter_by(user_type="cliente").count(),
+            "total_activations": Activation.query.count(),
+            "pending_activations": Activation.query.filter_by(status="em_analise").count(),
+            "approved_activations": Activation.query.filter_by(status="aprovado").count(),
+            "active_activations": Activation.query.filter_by(status="ativada").count(),
+            "active_users": User.query.filter_by(user_type="cliente", is_active=True).count(),
+            "total_admins": User.query.filter(User.user_type.in_(["admin", "super_admin"])).count(),
+        }
+        assert obter_estatisticas_dashboard() == esperado
@@ -0,0 +1,76 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from app import create_app
+from config.database import db
+from models.user import DDD
+from services.ddd_catalog import ddd_disponivel, invalidar_catalogo, CHAVE_VERSAO
+
+
+def test_catalogo_recarrega_quando_versao_muda():
+    app = create_app()
+    with app.app_context():
+        try:
+            app.config["DDD_CATALOG_CHECK_INTERVAL"] = 0
+            db.session.query(DDD).filter_by(operator="vivo", ddd="00").delete()
+            invalidar_catalogo()
+            assert not ddd_disponivel("vivo", "00")
+
+            # Alteração sem incremento de versão não é vista pelo cache
+            db.session.add(DDD(operator="vivo", ddd="00", is_active=True))
+            db.session.flush()
+            assert not ddd_disponivel("vivo", "00")
+
+            # Outro worker incrementando a versão invalida o cache deste processo
+            db.session.execute(
+                text("UPDATE system_settings SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = :k"),
+                {"k": CHAVE_VERSAO},
+            )
+            assert ddd_disponivel("vivo", "00")
+            assert not ddd_disponivel("claro", "00")
+
+            # Dentro do intervalo de verificação a versão nem é consultada
+            app.config["DDD_CATALOG_CHECK_INTERVAL"] = 60
+            db.session.query(DDD).filter_by(operator="vivo", ddd="00").delete()
+            db.session.execute(
+                text("UPDATE system_settings SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = :k"),
+                {"k": CHAVE_VERSAO},
+            )
+            assert ddd_disponivel("vivo", "00")
+        finally:
+            db.session.rollback()
+            invalidar_catalogo()
+            db.session.rollback()
+
+
+def test_listagem_de_ddds_responde_304_com_etag_atual():
+    app = create_app()
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user", additional_claims={"user_type": "admin"})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for url in ("/api/client/ddds/vivo", "/api/admin/ddds?operator=all"):
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200
+            etag = resp.headers["ETag"]
+            assert "no-cache" in resp.headers["Cache-Control"]
+
+            resp = client.get(url, headers={**headers, "If-None-Match": etag})
+            assert resp.status_code == 304
+            assert resp.get_data() == b""
+
+        with app.app_context():
+            invalidar_catalogo()
+            db.session.commit()
+
+        resp = client.get("/api/client/ddds/vivo", headers={**headers, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert all(d["operator"] == "vivo" and d["is_active"] for d in resp.get_json()["ddds"])
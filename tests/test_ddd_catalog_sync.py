@@ -0,0 +1,50 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from app import create_app
+from config.database import db
+from models.ddd_import import DDDImport
+from models.user import DDD
+from services.ddd_import_service import sincronizar_catalogo
+
+
+def importacao(ddd, operadora, n):
+    return DDDImport(
+        ddd=ddd, operadora=operadora, tipo_chip="smp", especificacao="150GB",
+        linha_original=ddd, arquivo_origem="teste.xlsx", hash_linha=f"sync-{n}"
+    )
+
+
+def test_sincronizar_catalogo_aplica_diferenca_no_banco():
+    app = create_app()
+    with app.app_context():
+        try:
+            db.session.query(DDDImport).delete()
+            db.session.query(DDD).delete()
+            db.session.add_all([
+                DDD(operator="vivo", ddd="11", is_active=True),
+                DDD(operator="tim", ddd="99", is_active=True),
+                DDD(operator="claro", ddd="98", is_active=True),
+                importacao("11", "Vivo", 1),
+                importacao(" 21 ", "CLARO S.A.", 2),
+                importacao("21", "claro", 3),
+                importacao("3a", "Tim", 4),
+                importacao("41", "Oi", 5),
+                importacao("41", " tim celular", 6),
+            ])
+            db.session.flush()
+
+            # Filtro por operadora só mexe nas linhas daquela operadora
+            assert sincronizar_catalogo(operator_filter="tim") == (1, 1)
+            catalogo = {(d.operator, d.ddd) for d in DDD.query.all()}
+            assert catalogo == {("vivo", "11"), ("claro", "98"), ("tim", "41")}
+
+            assert sincronizar_catalogo() == (1, 1)
+            catalogo = {(d.operator, d.ddd) for d in DDD.query.all()}
+            assert catalogo == {("vivo", "11"), ("claro", "21"), ("tim", "41")}
+            assert all(d.id for d in DDD.query.all())
+        finally:
+            db.session.rollback()
@@ -0,0 +1,80 @@
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from services.ddd_import_service import (
+    filtrar_ddds, linhas_filtradas_para_dicts, normalize_text, TIPOS_CHIP_PREVIEW
+)
+
+
+def filtro_linha_a_linha(df, arquivo):
+    """Filtro original do upload_ddds, usado como referência"""
+    linhas = []
+    rejeicoes = {"tipo_invalido": 0, "spec_invalida": 0, "linha_invalida": 0}
+    for _, row in df.iterrows():
+        tipo_chip_val = normalize_text(row.get('tipo_chip', ''))
+        if tipo_chip_val not in ['vazia', 'vazio', 'smp']:
+            rejeicoes["tipo_invalido"] += 1
+            continue
+        especificacao_raw = str(row.get('especificacao', '')).strip()
+        if re.sub(r'[^0-9]', '', especificacao_raw) != '150':
+            rejeicoes["spec_invalida"] += 1
+            continue
+        linha_raw = str(row.get('linha', str(row.get('ddd', '')))).strip()
+        linha_digits = ''.join(ch for ch in linha_raw if ch.isdigit())
+        if len(linha_digits) < 2:
+            rejeicoes["linha_invalida"] += 1
+            continue
+        linhas.append({
+            'ddd': linha_digits[:2],
+            'operadora': str(row.get('operadora', '')).strip(),
+            'tipo_chip': tipo_chip_val,
+            'especificacao': especificacao_raw,
+            'linha_original': linha_raw,
+            'arquivo_origem': arquivo,
+        })
+    return linhas, rejeicoes
+
+
+def make_frame():
+    return pd.DataFrame([
+        {"linha": "(11) 98765-4321", "operadora": " VIVO ", "tipo_chip": "Vazia", "especificacao": "150GB"},
+        {"linha": 21987654321, "operadora": "Claro", "tipo_chip": "SMP ", "especificacao": "150 GB"},
+        {"linha": "31", "operadora": "TIM", "tipo_chip": "Vázio", "especificacao": "150"},
+        {"linha": "4", "operadora": "TIM", "tipo_chip": "smp", "especificacao": "150GB"},
+        {"linha": "51999", "operadora": "Vivo", "tipo_chip": "esim", "especificacao": "150GB"},
+        {"linha": "61999", "operadora": "Vivo", "tipo_chip": "smp", "especificacao": "100GB"},
+        {"linha": np.nan, "operadora": np.nan, "tipo_chip": np.nan, "especificacao": np.nan},
+        {"linha": "²71234", "operadora": "Vivo", "tipo_chip": "vazia", "especificacao": "150GB"},
+    ])
+
+
+def test_filtrar_ddds_matches_row_by_row_filter():
+    df = make_frame()
+    esperado, rejeicoes_esperadas = filtro_linha_a_linha(df, "carga.xlsx")
+
+    filtradas, rejeicoes = filtrar_ddds(df, "carga.xlsx")
+
+    assert linhas_filtradas_para_dicts(filtradas) == esperado
+    assert rejeicoes == rejeicoes_esperadas
+    assert rejeicoes == {"tipo_invalido": 2, "spec_invalida": 1, "linha_invalida": 1}
+
+
+def test_filtrar_ddds_preview_rules():
+    df = pd.DataFrame([
+        {"ddd": "11", "operadora": "Vivo", "tipo_chip": "vazia", "especificacao": ""},
+        {"ddd": "21", "operadora": "Vivo", "tipo_chip": "vázia", "especificacao": ""},
+        {"ddd": "31", "operadora": "Vivo", "tipo_chip": "vazio", "especificacao": ""},
+    ])
+
+    filtradas, _ = filtrar_ddds(
+        df, "MANUAL", tipos_validos=TIPOS_CHIP_PREVIEW, remover_acentos=False, validar_especificacao=False
+    )
+
+    assert list(filtradas['ddd']) == ["11"]
@@ -0,0 +1,127 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+import json
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from config.database import db
+from models.user import Activation, Notification, User
+from services.notifications import contar_nao_lidas, notificar_em_massa, reconciliar_contadores_notificacoes
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+# DDD sem ativações no banco de desenvolvimento
+DDD_TESTE = "98"
+
+
+def _preparar(app):
+    with app.app_context():
+        reconciliar_contadores_notificacoes()
+        clientes = User.query.filter_by(user_type="cliente", is_active=True).all()
+        ativacoes = [
+            Activation(user_id=cliente.id, operator="tim", chip_type="esim", ddd=DDD_TESTE, status="ativada")
+            for cliente in clientes
+        ]
+        # Fora do filtro: outra operadora e status cancelado
+        ativacoes.append(Activation(user_id=clientes[0].id, operator="vivo", chip_type="esim", ddd=DDD_TESTE, status="ativada"))
+        ativacoes.append(Activation(user_id=clientes[0].id, operator="tim", chip_type="esim", ddd="97", status="cancelado"))
+        db.session.add_all(ativacoes)
+        db.session.commit()
+        return [c.id for c in clientes], [a.id for a in ativacoes], {c.id: contar_nao_lidas(c.id) for c in clientes}
+
+
+def _limpar(app, activation_ids, titulo):
+    with app.app_context():
+        db.session.rollback()
+        Notification.query.filter_by(title=titulo).delete()
+        for activation in Activation.query.filter(Activation.id.in_(activation_ids)).all():
+            db.session.delete(activation)
+        db.session.commit()
+        reconciliar_contadores_notificacoes()
+
+
+def test_aviso_em_massa_por_faixas():
+    app = create_app()
+    titulo = "Instabilidade TIM 98"
+    clientes, activation_ids, antes = _preparar(app)
+    try:
+        with app.app_context():
+            inserts = []
+            contar = lambda conn, cursor, sql, *args: inserts.append(sql) if sql.startswith("INSERT INTO notifications") else None
+            event.listen(db.engine, "before_cursor_execute", contar)
+            try:
+                criadas = notificar_em_massa(titulo, "Sinal instável na região", operator="tim", ddd=DDD_TESTE, tamanho_faixa=1)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", contar)
+
+            assert criadas == len(clientes)
+            # Um INSERT ... SELECT por faixa (tamanho_faixa=1), mais a última faixa, vazia
+            assert len(inserts) == len(clientes) + 1
+            notificacoes = Notification.query.filter_by(title=titulo).all()
+            assert sorted(str(n.user_id) for n in notificacoes) == sorted(clientes)
+            assert all(n.type == "system" and n.read_at is None for n in notificacoes)
+            for cliente in clientes:
+                assert contar_nao_lidas(cliente) == antes[cliente] + 1
+    finally:
+        _limpar(app, activation_ids, titulo)
+
+
+def test_rota_de_aviso_em_massa(limpar_logs_admin):
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    limpar_logs_admin(app, "NOTIFICATION_BROADCAST")
+    titulo = "Manutenção TIM 98"
+    clientes, activation_ids, _ = _preparar(app)
+    try:
+        with app.test_client() as client:
+            with app.app_context():
+                token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+            headers = {"Authorization": f"Bearer {token}"}
+            resp = client.post(
+                "/api/admin/notifications/broadcast",
+                json={"title": titulo, "message": "Manutenção programada", "operator": "tim", "ddd": DDD_TESTE},
+                headers=headers
+            )
+            invalido = client.post(
+                "/api/admin/notifications/broadcast",
+                json={"title": titulo, "message": "x", "ddd": "9"},
+                headers=headers
+            )
+        assert resp.status_code == 201, resp.get_data(as_text=True)
+        assert resp.get_json()["created"] == len(clientes)
+        assert invalido.status_code == 400
+    finally:
+        _limpar(app, activation_ids, titulo)
+
+
+def test_aviso_em_massa_chega_pelo_canal_sse():
+    app = create_app()
+    app.config["CLIENT_EVENTS_BACKEND"] = "memory"
+    titulo = "Queda de sinal TIM 98"
+    clientes, activation_ids, _ = _preparar(app)
+    try:
+        with app.app_context():
+            token = create_access_token(identity=clientes[0], additional_claims={"user_type": "cliente"})
+        with app.test_client() as client:
+            resp = client.get("/api/client/events", headers={"Authorization": f"Bearer {token}"}, buffered=False)
+            assert resp.status_code == 200
+            corpo = iter(resp.response)
+            next(corpo)  # retry
+            next(corpo)  # unread_count
+
+            with app.app_context():
+                notificar_em_massa(titulo, "Sinal instável na região", operator="tim", ddd=DDD_TESTE, tamanho_faixa=1)
+
+            linhas = dict(linha.split(": ", 1) for linha in next(corpo).decode().strip().split("\n"))
+            assert linhas["event"] == "notification"
+            dados = json.loads(linhas["data"])
+            assert dados["title"] == titulo
+            assert dados["user_id"].replace("-", "") == clientes[0].replace("-", "")
+            resp.close()
+    finally:
+        _limpar(app, activation_ids, titulo)
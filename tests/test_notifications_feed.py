@@ -0,0 +1,87 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config.database import db
+from models.user import Notification, User
+from services.notifications import contar_nao_lidas, reconciliar_contadores_notificacoes
+
+
+def _contexto():
+    app = create_app()
+    with app.app_context():
+        cliente = User.query.filter_by(user_type="cliente").first()
+        user_id = cliente.id
+        token = create_access_token(identity=user_id, additional_claims={"user_type": "cliente"})
+    return app, user_id, {"Authorization": f"Bearer {token}"}
+
+
+def _remover(ids):
+    db.session.rollback()
+    for notificacao in Notification.query.filter(Notification.id.in_(ids)).all():
+        db.session.delete(notificacao)
+    db.session.commit()
+
+
+def test_contador_acompanha_criacao_leitura_e_exclusao():
+    app, user_id, headers = _contexto()
+    with app.app_context():
+        reconciliar_contadores_notificacoes()
+        inicial = contar_nao_lidas(user_id)
+        notificacoes = [
+            Notification(user_id=user_id, type="system", title=f"Contador {i}", message="Teste")
+            for i in range(3)
+        ]
+        db.session.add_all(notificacoes)
+        db.session.commit()
+        ids = [n.id for n in notificacoes]
+    try:
+        with app.test_client() as client:
+            resp = client.get("/api/client/notifications/unread-count", headers=headers)
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+            assert resp.get_json()["unread_count"] == inicial + 3
+
+            client.post(f"/api/client/notifications/{ids[0]}/read", headers=headers)
+            client.post("/api/client/notifications/read", json={"ids": [str(ids[1])]}, headers=headers)
+            resp = client.get("/api/client/notifications/unread-count", headers=headers)
+            assert resp.get_json()["unread_count"] == inicial + 1
+    finally:
+        with app.app_context():
+            _remover(ids)
+            assert contar_nao_lidas(user_id) == inicial
+
+
+def test_feed_paginado_por_cursor():
+    app, user_id, headers = _contexto()
+    base = datetime.utcnow() + timedelta(days=1)
+    with app.app_context():
+        # Datas no futuro: as mais recentes do usuário, na ordem do feed
+        notificacoes = [
+            Notification(user_id=user_id, type="system", title=f"Feed {i}", message="Teste",
+                         created_at=base - timedelta(minutes=i))
+            for i in range(5)
+        ]
+        db.session.add_all(notificacoes)
+        db.session.commit()
+        ids = [n.id for n in notificacoes]
+    try:
+        with app.test_client() as client:
+            primeira = client.get("/api/client/notifications?per_page=2", headers=headers).get_json()
+            cursor = primeira["pagination"]["next_cursor"]
+            segunda = client.get(f"/api/client/notifications?per_page=2&cursor={cursor}", headers=headers).get_json()
+            invalido = client.get("/api/client/notifications?cursor=xyz", headers=headers)
+
+        assert [n["id"] for n in primeira["notifications"]] == [str(i) for i in ids[:2]]
+        assert primeira["pagination"]["has_next"]
+        assert [n["id"] for n in segunda["notifications"]] == [str(i) for i in ids[2:4]]
+        assert invalido.status_code == 400
+    finally:
+        with app.app_context():
+            _remover(ids)
@@ -0,0 +1,92 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from config.database import db
+from models.user import Notification, User
+
+
+def _criar_notificacoes(user_id, quantidade):
+    notificacoes = [
+        Notification(user_id=user_id, type="system", title=f"Teste {i}", message="Teste")
+        for i in range(quantidade)
+    ]
+    db.session.add_all(notificacoes)
+    db.session.commit()
+    return [n.id for n in notificacoes]
+
+
+def _remover(ids):
+    db.session.rollback()
+    Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _contexto():
+    app = create_app()
+    with app.app_context():
+        cliente = User.query.filter_by(user_type="cliente").first()
+        user_id = cliente.id
+        token = create_access_token(identity=user_id, additional_claims={"user_type": "cliente"})
+    return app, user_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_marcar_todas_como_lidas_em_um_update():
+    app, user_id, headers = _contexto()
+    with app.app_context():
+        # Parte do histórico do usuário pode já estar não lida no banco de desenvolvimento
+        Notification.query.filter_by(user_id=user_id, read_at=None).update(
+            {"read_at": Notification.created_at}, synchronize_session=False
+        )
+        db.session.commit()
+        ids = _criar_notificacoes(user_id, 5)
+
+    updates = []
+    contar = lambda conn, cursor, sql, *args: updates.append(sql) if sql.startswith("UPDATE notifications") else None
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        with app.test_client() as client:
+            resp = client.post("/api/client/notifications/read-all", headers=headers)
+            assert len(updates) == 1
+            repetida = client.post("/api/client/notifications/read-all", headers=headers)
+        with app.app_context():
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+            assert resp.get_json()["updated"] == 5
+            assert repetida.get_json()["updated"] == 0
+            assert Notification.query.filter(Notification.id.in_(ids), Notification.read_at.is_(None)).count() == 0
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", contar)
+            _remover(ids)
+
+
+def test_marcar_ids_como_lidas():
+    app, user_id, headers = _contexto()
+    with app.app_context():
+        ids = _criar_notificacoes(user_id, 3)
+    try:
+        with app.test_client() as client:
+            resp = client.post(
+                "/api/client/notifications/read",
+                json={"ids": [str(ids[0]), str(ids[1])]},
+                headers=headers
+            )
+            invalido = client.post("/api/client/notifications/read", json={"ids": ["x"]}, headers=headers)
+            vazio = client.post("/api/client/notifications/read", json={}, headers=headers)
+        with app.app_context():
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+            assert resp.get_json()["updated"] == 2
+            assert invalido.status_code == 400
+            assert vazio.status_code == 400
+            nao_lida = Notification.query.filter(Notification.id.in_(ids), Notification.read_at.is_(None)).one()
+            assert nao_lida.id == ids[2]
+    finally:
+        with app.app_context():
+            _remover(ids)
@@ -0,0 +1,139 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from config.database import db
+from models.user import AdminLog
+from services.retention import arquivar_tabela, consultar_arquivo, interpretar_data
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def _app(pasta):
+    # Sobre banco_isolado: o arquivamento remove todos os logs antigos do banco
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    app.config["ARCHIVE_FOLDER"] = str(pasta)
+    return app
+
+
+def _criar_logs(acao, quando, quantidade):
+    logs = [
+        AdminLog(user_id=uuid.UUID(ADMIN_ID), action=acao, details=f"Teste {i}", created_at=quando + timedelta(hours=i))
+        for i in range(quantidade)
+    ]
+    db.session.add_all(logs)
+    db.session.commit()
+    return [log.id for log in logs]
+
+
+def test_arquiva_meses_antigos_e_mantem_recentes(tmp_path, banco_isolado):
+    app = _app(tmp_path)
+    acao = f"RETENCAO_TESTE_{uuid.uuid4().hex[:8]}"
+    antigo = datetime(2020, 3, 10)
+    with app.app_context():
+        antigos = _criar_logs(acao, antigo, 3)
+        recentes = _criar_logs(acao, datetime.utcnow() - timedelta(days=1), 2)
+        try:
+            arquivadas = arquivar_tabela("admin_logs", dias=180)
+
+            assert arquivadas >= 3
+            assert AdminLog.query.filter(AdminLog.id.in_(antigos)).count() == 0
+            assert AdminLog.query.filter(AdminLog.id.in_(recentes)).count() == 2
+
+            arquivo = tmp_path / "admin_logs" / "2020-03.jsonl.gz"
+            with gzip.open(arquivo, "rt", encoding="utf-8") as f:
+                registros = [json.loads(linha) for linha in f]
+            assert {str(i) for i in antigos} <= {r["id"] for r in registros}
+
+            encontrados = consultar_arquivo("admin_logs", datetime(2020, 3, 1), datetime(2020, 4, 1), {"action": acao})
+            assert [r["id"] for r in encontrados] == [str(i) for i in antigos]
+            # Execução seguinte não encontra nada novo para arquivar
+            assert arquivar_tabela("admin_logs", dias=180) == 0
+        finally:
+            AdminLog.query.filter_by(action=acao).delete()
+            db.session.commit()
+
+
+def test_rota_de_consulta_ao_arquivo(tmp_path, banco_isolado):
+    app = _app(tmp_path)
+    acao = f"RETENCAO_ROTA_{uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        ids = _criar_logs(acao, datetime(2020, 5, 2), 3)
+        arquivar_tabela("admin_logs", dias=180)
+        token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        with app.test_client() as client:
+            resp = client.get(
+                f"/api/admin/archive/admin_logs?start=2020-05-01&end=2020-06-01&action={acao}&per_page=2",
+                headers=headers
+            )
+            segunda = client.get(
+                f"/api/admin/archive/admin_logs?start=2020-05-01&end=2020-06-01&action={acao}&per_page=2&page=2",
+                headers=headers
+            )
+            meses = client.get("/api/admin/archive", headers=headers)
+            sem_intervalo = client.get("/api/admin/archive/admin_logs", headers=headers)
+            tabela_invalida = client.get("/api/admin/archive/users?start=2020-05-01&end=2020-06-01", headers=headers)
+
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        dados = resp.get_json()
+        assert dados["pagination"]["has_next"] is True
+        assert [r["id"] for r in dados["records"]] == [str(i) for i in ids][:2]
+        assert [r["id"] for r in segunda.get_json()["records"]] == [str(ids[2])]
+        assert segunda.get_json()["pagination"]["has_next"] is False
+        assert ("admin_logs", "2020-05") in {(a["table"], a["month"]) for a in meses.get_json()["archives"]}
+        assert sem_intervalo.status_code == 400
+        assert tabela_invalida.status_code == 400
+    finally:
+        with app.app_context():
+            AdminLog.query.filter_by(action=acao).delete()
+            db.session.commit()
+
+
+def test_consulta_aceita_datas_com_fuso(tmp_path):
+    app = _app(tmp_path)
+    pasta = tmp_path / "admin_logs"
+    pasta.mkdir()
+    registros = [
+        {"id": "a", "action": "X", "created_at": "2020-03-10T12:00:00+00:00"},
+        # 2020-03-10T13:00 em UTC
+        {"id": "b", "action": "X", "created_at": "2020-03-10T10:00:00-03:00"},
+        {"id": "c", "action": "X", "created_at": "2020-03-10T11:00:00"},
+        # 2020-04-01T01:00 em UTC: fora do intervalo
+        {"id": "d", "action": "X", "created_at": "2020-03-31T22:00:00-03:00"},
+    ]
+    ordenados = sorted(registros, key=lambda r: interpretar_data(r["created_at"]))
+    with gzip.open(pasta / "2020-03.jsonl.gz", "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in ordenados)
+    # Mês refeito após falha: "a" repetido em outro arquivo
+    with gzip.open(pasta / "2020-03.1.jsonl.gz", "wt", encoding="utf-8") as f:
+        f.write(json.dumps(registros[0]) + "\n")
+
+    with app.app_context():
+        encontrados = consultar_arquivo("admin_logs", datetime(2020, 3, 1), datetime(2020, 4, 1), {"action": "X"})
+        pagina = consultar_arquivo("admin_logs", datetime(2020, 3, 1), datetime(2020, 4, 1), deslocamento=1, limite=1)
+
+    assert [r["id"] for r in encontrados] == ["c", "a", "b"]
+    assert [r["id"] for r in pagina] == ["a"]
+
+
+def test_sem_pasta_configurada_nada_e_arquivado(banco_isolado):
+    app = create_app()
+    assert app.config["ARCHIVE_FOLDER"] == ""
+    acao = f"RETENCAO_SEM_PASTA_{uuid.uuid4().hex[:8]}"
+    with app.app_context():
+        ids = _criar_logs(acao, datetime(2020, 3, 10), 2)
+        assert arquivar_tabela("admin_logs", dias=180) == 0
+        assert AdminLog.query.filter(AdminLog.id.in_(ids)).count() == 2
@@ -0,0 +1,88 @@
+import os
+import sys
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from config.database import db
+from models.user import Activation, ActivationHistory, AdminLog, Notification, User
+from services.unit_of_work import UnidadeDeTrabalho
+
+ADMIN_ID = "898eb4ab-e905-492c-8d92-99d1f496958f"
+
+
+def _criar_ativacao():
+    cliente = User.query.filter_by(user_type="cliente").first()
+    activation = Activation(user_id=cliente.id, operator="vivo", chip_type="esim", ddd="11", status="em_analise")
+    db.session.add(activation)
+    db.session.commit()
+    return activation.id
+
+
+def _remover_ativacao(activation_id):
+    db.session.rollback()
+    ActivationHistory.query.filter_by(activation_id=activation_id).delete()
+    Notification.query.filter_by(activation_id=activation_id).delete()
+    AdminLog.query.filter_by(resource_id=str(activation_id)).delete()
+    db.session.delete(Activation.query.get(activation_id))
+    db.session.commit()
+
+
+def test_mudanca_de_status_grava_tudo_em_um_commit():
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity=ADMIN_ID, additional_claims={"user_type": "admin"})
+            activation_id = _criar_ativacao()
+
+        commits = []
+        registrar = lambda session: commits.append(session)
+        event.listen(db.session, "after_commit", registrar)
+        try:
+            resp = client.put(
+                f"/api/admin/activations/{activation_id}/status",
+                json={"status": "aprovado"},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+        finally:
+            event.remove(db.session, "after_commit", registrar)
+
+        with app.app_context():
+            try:
+                assert resp.status_code == 200, resp.get_data(as_text=True)
+                assert len(commits) == 1
+                historico = ActivationHistory.query.filter_by(activation_id=activation_id).one()
+                assert (historico.previous_status, historico.new_status) == ("em_analise", "aprovado")
+                assert Notification.query.filter_by(activation_id=activation_id).count() == 1
+                log = AdminLog.query.filter_by(resource_id=str(activation_id)).one()
+                assert log.action == "ACTIVATION_STATUS_UPDATE"
+            finally:
+                _remover_ativacao(activation_id)
+
+
+def test_rollback_descarta_historico_notificacao_e_auditoria():
+    app = create_app()
+    app.config["AUDIT_LOG_ASYNC"] = False
+    with app.test_request_context():
+        activation_id = _criar_ativacao()
+        try:
+            activation = Activation.query.get(activation_id)
+            uow = UnidadeDeTrabalho(ADMIN_ID)
+            activation.status = "reprovado"
+            uow.historico(activation, "em_analise", "reprovado", "teste")
+            uow.notificacao(activation.user_id, "Teste", "Teste", activation)
+            uow.auditoria("ACTIVATION_STATUS_UPDATE", "activation", activation.id)
+            # Falha antes do commit: a rota faz rollback
+            db.session.rollback()
+
+            assert Activation.query.get(activation_id).status == "em_analise"
+            assert ActivationHistory.query.filter_by(activation_id=activation_id).count() == 0
+            assert Notification.query.filter_by(activation_id=activation_id).count() == 0
+            assert AdminLog.query.filter_by(resource_id=str(activation_id)).count() == 0
+        finally:
+            _remover_ativacao(activation_id)
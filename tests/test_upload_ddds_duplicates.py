@@ -1,3 +1,4 @@
+import time
 from io import BytesIO
 import pandas as pd
 from flask_jwt_extended import create_access_token
@@ -40,3 +41,209 @@ def test_upload_ddds_skips_batch_duplicates():
         assert stats.get("novos_registros") == 1
         assert stats.get("duplicatas_encontradas") >= 1
 
+
+
+def test_preview_ddds_detects_rows_already_imported():
+    app = create_app()
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        excel_bytes = make_excel_bytes_with_duplicates()
+        resp = client.post(
+            "/api/upload-ddds",
+            data={"file": (BytesIO(excel_bytes), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+        resp = client.post(
+            "/api/ddds/preview",
+            data={"file": (BytesIO(excel_bytes), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        stats = resp.get_json()["estatisticas"]
+        assert stats["linhas_filtradas"] == 2
+        assert stats["duplicatas_previstas"] == 2
+
+
+def test_upload_ddds_on_conflict_mode_lets_database_drop_duplicates():
+    app = create_app()
+    app.config["DDD_IMPORT_ON_CONFLICT"] = True
+    app.config["DDD_IMPORT_BATCH_SIZE"] = 1
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user")
+
+        resp = client.post(
+            "/api/upload-ddds",
+            data={"file": (BytesIO(make_excel_bytes_with_duplicates()), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        stats = resp.get_json()["estatisticas"]
+        assert stats["novos_registros"] == 1
+        assert stats["duplicatas_encontradas"] == 1
+
+
+def test_upload_ddds_streaming_detects_duplicates_across_chunks():
+    app = create_app()
+    app.config["DDD_IMPORT_CHUNK_SIZE"] = 1
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user")
+
+        resp = client.post(
+            "/api/upload-ddds",
+            data={"file": (BytesIO(make_excel_bytes_with_duplicates()), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        stats = resp.get_json()["estatisticas"]
+        assert stats["total_linhas"] == 2
+        assert stats["novos_registros"] == 1
+        assert stats["duplicatas_encontradas"] == 1
+
+
+def test_upload_ddds_async_job_reports_progress_until_completed():
+    app = create_app()
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        resp = client.post(
+            "/api/upload-ddds?async=1",
+            data={"file": (BytesIO(make_excel_bytes_with_duplicates()), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+
+        assert resp.status_code == 202, resp.get_data(as_text=True)
+        status_url = resp.get_json()["status_url"]
+
+        job = None
+        for _ in range(100):
+            job = client.get(status_url, headers=headers).get_json()["job"]
+            if job["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.1)
+
+        assert job["status"] == "completed", job
+        assert job["progress"] == 100
+        assert job["estatisticas"]["novos_registros"] == 1
+        assert job["estatisticas"]["duplicatas_encontradas"] == 1
+
+
+def test_upload_ddds_rejected_file_keeps_previous_import():
+    app = create_app()
+    with app.test_client() as client:
+        with app.app_context():
+            token = create_access_token(identity="test-user")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        resp = client.post(
+            "/api/upload-ddds",
+            data={"file": (BytesIO(make_excel_bytes_with_duplicates()), "dups.xlsx")},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+        df = pd.DataFrame([{"ddd": "32", "operadora": "Claro", "tipo_chip": "esim", "especificacao": "150GB"}])
+        bio = BytesIO()
+        with pd.ExcelWriter(bio, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False)
+
+        resp = client.post(
+            "/api/upload-ddds",
+            data={"file": (BytesIO(bio.getvalue()), "invalido.xlsx")},
+            content_type="multipart/form-data",
+            headers=headers,
+        )
+        assert resp.status_code == 400
+
+        with app.app_context():
+            from models import DDDImport, DDDImportStaging
+            assert [i.arquivo_origem for i in DDDImport.query.all()] == ["dups.xlsx"]
+            assert DDDImportStaging.query.count() == 0
+
+
+def test_worker_retoma_job_pendente_na_subida(tmp_path, banco_isolado):
+    # Job deixado 'pending' por um processo que parou antes de processá-lo
+    app = create_app()
+    arquivo = tmp_path / "pendente.xlsx"
+    arquivo.write_bytes(make_excel_bytes_with_duplicates())
+    with app.app_context():
+        import uuid
+        from config.database import db
+        from models import DDDImportJob
+        job = DDDImportJob(id=uuid.uuid4(), status="pending", arquivo_origem="pendente.xlsx",
+                           file_path=str(arquivo), progress=0, linhas_processadas=0)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    from services.ddd_import_jobs import iniciar_worker_importacoes
+    iniciar_worker_importacoes(app)
+    with app.app_context():
+        from models import DDDImportJob
+        assert DDDImportJob.query.get(job_id).status == "pending"
+
+    app.config["PERIODIC_TASKS_ENABLED"] = True
+    iniciar_worker_importacoes(app)
+
+    status = None
+    for _ in range(100):
+        with app.app_context():
+            from config.database import db
+            from models import DDDImportJob
+            status = DDDImportJob.query.get(job_id).status
+            db.session.remove()
+        if status in ("completed", "failed"):
+            break
+        time.sleep(0.1)
+    assert status == "completed"
+
+
+def test_publicacao_recusa_importacao_mais_antiga_que_a_publicada(banco_isolado):
+    import pytest
+    from datetime import datetime, timedelta
+    from config.database import db
+    from models import DDDImport, DDDImportStaging
+    from services.ddd_import_service import (
+        ImportacaoDesatualizada, importar_lotes, nova_importacao, publicar_importacao
+    )
+
+    app = create_app()
+    with app.app_context():
+        df = pd.DataFrame([{"ddd": "32", "operadora": "Claro", "tipo_chip": "smp", "especificacao": "150GB"}])
+        antiga, recente = nova_importacao(), nova_importacao()
+        importar_lotes([df], "antiga.xlsx", antiga)
+        importar_lotes([df], "recente.xlsx", recente)
+        db.session.commit()
+
+        agora = datetime.utcnow()
+        publicar_importacao(recente, agora)
+        db.session.commit()
+
+        with pytest.raises(ImportacaoDesatualizada):
+            publicar_importacao(antiga, agora - timedelta(minutes=1))
+        db.session.rollback()
+
+        assert [i.arquivo_origem for i in DDDImport.query.all()] == ["recente.xlsx"]
+        assert DDDImportStaging.query.filter_by(importacao_id=antiga).count() == 1
+
+        # Uma importação posterior à publicada continua sendo aceita
+        publicar_importacao(antiga, agora + timedelta(minutes=1))
+        db.session.commit()
+        assert [i.arquivo_origem for i in DDDImport.query.all()] == ["antiga.xlsx"]
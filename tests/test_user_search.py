@@ -0,0 +1,83 @@
+import os
+import sys
+import uuid
+
+SRC_PATH = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.append(os.path.abspath(SRC_PATH))
+
+from sqlalchemy import text
+
+from app import create_app
+from config.database import db
+from models.user import User
+from services.user_search import buscar_usuarios
+
+
+def _buscar(termo):
+    return [user.email for user in buscar_usuarios(User.query, termo).all()]
+
+
+def test_busca_acompanha_criacao_e_alteracao_de_usuarios():
+    app = create_app()
+    with app.app_context():
+        try:
+            user = User(
+                id=str(uuid.uuid4()),
+                cpf="98765098765",
+                email="zuleica.busca@example.com",
+                password_hash="x",
+                name="Zuleica Pesquisada",
+            )
+            db.session.add(user)
+            db.session.flush()
+
+            assert _buscar("uleica") == ["zuleica.busca@example.com"]
+            assert _buscar("650987") == ["zuleica.busca@example.com"]
+            assert "zuleica.busca@example.com" in _buscar("ZULEICA")
+
+            user.name = "Zenaide Renomeada"
+            db.session.flush()
+            assert _buscar("Zuleica Pesq") == []
+            assert _buscar("naide Reno") == ["zuleica.busca@example.com"]
+
+            # Termos curtos não formam trigramas e usam LIKE
+            assert "zuleica.busca@example.com" in _buscar("Ze")
+            assert _buscar("%") == []
+        finally:
+            db.session.rollback()
+
+
+def test_busca_ordena_por_relevancia():
+    app = create_app()
+    with app.app_context():
+        try:
+            for nome, email in (
+                ("Odete Quaresma", "contato.quaresma@example.com"),
+                ("Quaresma", "quaresma@example.com"),
+            ):
+                db.session.add(User(
+                    id=str(uuid.uuid4()), cpf=str(uuid.uuid4().int)[:11], email=email, password_hash="x", name=nome
+                ))
+            db.session.flush()
+
+            assert _buscar("quaresma") == ["quaresma@example.com", "contato.quaresma@example.com"]
+        finally:
+            db.session.rollback()
+
+
+def test_busca_usa_users_id_e_nao_o_rowid():
+    app = create_app()
+    with app.app_context():
+        try:
+            user = User(
+                id=str(uuid.uuid4()), cpf="12309812309", email="rowid.instavel@example.com", password_hash="x",
+                name="Rosalvo Renumerado"
+            )
+            db.session.add(user)
+            db.session.flush()
+            # VACUUM pode renumerar o rowid de tabelas sem INTEGER PRIMARY KEY
+            db.session.execute(text("UPDATE users SET rowid = rowid + 1000000 WHERE email = :email"), {"email": user.email})
+
+            assert _buscar("Rosalvo Renum") == ["rowid.instavel@example.com"]
+        finally:
+            db.session.rollback()